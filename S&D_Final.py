@@ -8,15 +8,24 @@ Modified Overview page with requested changes
 import streamlit as st
 import pandas as pd
 import numpy as np
-import plotly.express as px
 import plotly.graph_objects as go
-from plotly.subplots import make_subplots
 from datetime import datetime, timedelta
 import streamlit.components.v1 as components
 import json
+import logging
 import os
-from PIL import Image
-import geopandas as gpd
+import sys
+import time
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+from dataclasses import astuple, dataclass
+
+# geopandas, plotly.express and plotly.subplots are imported inside the functions
+# that use them: they dominate cold-start time and most sessions never need them
+
+logger = logging.getLogger(__name__)
 
 # Page configuration - Remove sidebar
 st.set_page_config(
@@ -205,6 +214,43 @@ st.markdown("""
         font-weight: 700;
     }
     
+    /* Page Navigation - radio rendered as Power BI tabs */
+    div[data-testid="stRadio"] [role="radiogroup"] {
+        gap: 0;
+        background-color: #FFFFFF;
+        border-bottom: 2px solid #E0E0E0;
+        margin: 20px 0 16px 0;
+        flex-wrap: nowrap;
+    }
+    
+    div[data-testid="stRadio"] [role="radiogroup"] label {
+        padding: 12px 24px;
+        margin: 0;
+        font-weight: 600;
+        font-size: 13px;
+        color: #4A4A4A;
+        border-bottom: 3px solid transparent;
+        transition: all 0.2s;
+        cursor: pointer;
+    }
+    
+    div[data-testid="stRadio"] [role="radiogroup"] label > div:first-child {
+        display: none;
+    }
+    
+    div[data-testid="stRadio"] [role="radiogroup"] label:hover {
+        background-color: #FFF9E6;
+        color: #000000;
+        border-bottom: 3px solid #FFE082;
+    }
+    
+    div[data-testid="stRadio"] [role="radiogroup"] label:has(input:checked) {
+        background-color: #FFCB05;
+        color: #000000;
+        border-bottom: 3px solid #000000;
+        font-weight: 700;
+    }
+    
     /* KPI Cards - Compact Power BI Style */
     .kpi-card {
         background: #FFFFFF;
@@ -373,227 +419,3019 @@ st.markdown("""
     ::-webkit-scrollbar-thumb:hover {
         background: #E6B800;
     }
-</style>
-""", unsafe_allow_html=True)
-
-# ==================== DATA GENERATION ====================
-@st.cache_data
-def generate_sample_data():
-    """Generate sample data for MTN Benin dashboard"""
-    
-    dates = pd.date_range(end=datetime.now(), periods=90, freq='D')
-    
-    kpi_data = {
-        'market_share': 46.10,
-        'budget_market_share': 45.80,
-        'total_gross_adds': 16240,
-        'budget_gross_adds': 17000,
-        'net_adds': -6100,
-        'budget_net_adds': -5000,
-        'returners': 11460,
-        'budget_returners': 12000,
-        'airtime_sales': 156.5,
-        'budget_airtime_sales': 145.0,
-        'float_distributed': 245.8,
-        'budget_float_distributed': 230.0,
-        'total_agents': 4500,
-        'active_agents': 3850,
-        'momo_conversions': 3120,
-        'data_conversions': 4020,
-        'churners': 22340
-    }
-    
-    daily_data = pd.DataFrame({
-        'date': pd.date_range(end=datetime.now(), periods=7, freq='D'),
-        'market_share': np.random.uniform(45.8, 46.3, 7),
-        'gross_adds': np.random.randint(2200, 2500, 7),
-        'net_adds': np.random.randint(-220000, -180000, 7),
-        'returners': np.random.randint(1500, 1700, 7),
-        'airtime_sales': np.random.uniform(5.0, 6.5, 7),
-        'float': np.random.uniform(7.5, 9.0, 7),
-        'dod': np.random.uniform(-5, 10, 7),
-        'mom': np.random.uniform(-8, 12, 7)
-    })
     
-    trend_data = pd.DataFrame({
-        'date': dates,
-        'airtime_sales': np.random.normal(5.5, 0.5, 90) + np.linspace(0, 1, 90),
-        'float': np.random.normal(8.0, 0.8, 90) + np.linspace(0, 1.5, 90),
-        'gross_adds': np.random.normal(2300, 150, 90),
-        'net_adds': np.random.normal(-6500, 500, 90),
-        'returners': np.random.normal(1600, 100, 90),
-        'churners': np.random.normal(8900, 300, 90),
-        'momo_conv': np.random.normal(100, 15, 90) + np.linspace(0, 20, 90),
-        'data_conv': np.random.normal(130, 20, 90) + np.linspace(0, 25, 90)
-    })
+    /* Daily KPI tables */
+    .daily-table {
+        max-height: 350px;
+        overflow-y: auto;
+        border: 1px solid #E0E0E0;
+    }
     
-    channel_data = pd.DataFrame({
-        'channel': ['YC (Yellow Centers)', 'DTC (MTN Shops)', 'DTR (Dealers)', 'Digital'],
-        'ga_count': [7795, 5686, 2113, 646],
-        'airtime_sales': [52.1, 54.8, 23.5, 26.1],
-        'share_pct': [48, 35, 13, 4]
-    })
+    .daily-table table {
+        width: 100%;
+        border-collapse: collapse;
+    }
     
-    regional_data = pd.DataFrame({
-        'region': ['Littoral', 'Atlantique', 'Borgou', 'Ouémé', 'Mono', 'Zou', 
-                   'Collines', 'Couffo', 'Plateau', 'Donga', 'Atacora', 'Alibori'],
-        'gross_adds': [8980, 6500, 3200, 1200, 1640, 2800, 900, 680, 590, 750, 480, 520],
-        'airtime_sales': [95.8, 68.2, 32.1, 12.2, 18.6, 28.4, 9.5, 6.9, 6.1, 7.8, 5.0, 5.4],
-        'agents': [1565, 1200, 650, 320, 420, 580, 250, 150, 130, 180, 95, 110],
-        'float': [131.5, 98.5, 52.3, 19.7, 32.1, 45.8, 15.4, 11.2, 9.9, 12.8, 8.1, 8.7]
-    })
+    .daily-table th {
+        position: sticky;
+        top: 0;
+        background-color: #000000;
+        color: #FFCB05;
+        font-weight: bold;
+        text-align: center;
+        font-size: 10px;
+        padding: 8px;
+    }
     
-    agent_tiers = pd.DataFrame({
-        'tier': ['Gold (Top 10%)', 'Silver (Next 20%)', 'Bronze (Next 30%)', 'Inactive (40%)'],
-        'count': [450, 900, 1350, 1800],
-        'avg_revenue': [198.2, 89.6, 45.4, 8.3],
-        'productivity_score': [95, 78, 62, 25]
-    })
+    .daily-table td {
+        text-align: center;
+        font-size: 11px;
+        border: 1px solid #E0E0E0;
+        padding: 6px;
+    }
     
-    hourly_pattern = pd.DataFrame({
-        'hour': list(range(24)),
-        'airtime_sales': [2.1, 1.8, 1.5, 1.2, 1.1, 1.8, 3.5, 5.2, 6.8, 7.5,
-                          8.2, 8.9, 9.2, 8.5, 7.8, 8.1, 8.9, 9.5, 9.8, 8.2, 6.5, 5.1, 3.8, 2.8],
-        'transactions': [850, 720, 610, 490, 450, 740, 1420, 2100, 2750, 3050,
-                         3340, 3620, 3740, 3450, 3160, 3290, 3610, 3860, 3980, 3330, 2640, 2070, 1540, 1140]
+    .daily-table td.band-strong { background-color: #90EE90; color: white; font-weight: bold; }
+    .daily-table td.band-positive { background-color: #FFEB3B; color: black; font-weight: bold; }
+    .daily-table td.band-negative { background-color: #FFCDD2; color: white; font-weight: bold; }
+    .daily-table td.band-up { background-color: #107C10; color: white; font-weight: bold; }
+    .daily-table td.band-ahead { background-color: #FFA500; color: white; font-weight: bold; }
+    .daily-table td.band-flat { background-color: #FFD700; color: white; font-weight: bold; }
+    .daily-table td.band-down { background-color: #D13438; color: white; font-weight: bold; }
+</style>
+""", unsafe_allow_html=True)
+
+# ==================== PROFILING ====================
+# Set MTN_PROFILE=0 to skip timing pages, charts and queries
+PROFILE_ENABLED = os.environ.get('MTN_PROFILE', '1') != '0'
+# Optional sinks: one JSON line per span, and a Prometheus textfile rewritten after every rerun
+PROFILE_LOG = os.environ.get('MTN_PROFILE_LOG')
+METRICS_FILE = os.environ.get('MTN_METRICS_FILE')
+# Latency histogram buckets in seconds, sized around the dashboard's render SLOs
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Profiler:
+    """Process-wide latency, volume and cache statistics of rendered pages, charts and queries
+
+    Every span is folded into per (kind, name) aggregates: a latency
+    histogram, rows scanned, payload bytes and result cache hits/misses.
+    Spans opened on a script thread between `begin_run` and the next call
+    are also kept as that rerun's trace for the debug panel.
+    """
+
+    def __init__(self, log_path=PROFILE_LOG):
+        self.lock = threading.Lock()
+        self.series = {}
+        self.local = threading.local()
+        self.log = open(log_path, 'a', encoding='utf-8') if log_path else None
+
+    def begin_run(self):
+        """Start collecting the spans of the current thread's rerun; returns the list they land in"""
+        self.local.trace = []
+        return self.local.trace
+
+    def current_trace(self):
+        """The current thread's rerun trace (or None), for worker threads doing that rerun's work"""
+        return getattr(self.local, 'trace', None)
+
+    @contextmanager
+    def joined(self, trace):
+        """Record this thread's spans into another thread's rerun trace for the duration of a block"""
+        previous = self.current_trace()
+        self.local.trace = trace
+        try:
+            yield
+        finally:
+            self.local.trace = previous
+
+    def _stack(self):
+        stack = getattr(self.local, 'stack', None)
+        if stack is None:
+            stack = self.local.stack = []
+        return stack
+
+    @contextmanager
+    def span(self, kind, name):
+        """Time a block; the yielded dict takes 'rows', 'bytes' and 'cache' from the code inside"""
+        span = {'kind': kind, 'name': name, 'rows': 0, 'bytes': 0, 'cache': None}
+        stack = self._stack()
+        stack.append(span)
+        started = time.perf_counter()
+        try:
+            yield span
+        finally:
+            span['seconds'] = time.perf_counter() - started
+            stack.pop()
+            self.record(span)
+
+    def annotate(self, **fields):
+        """Set fields on the innermost open span of this thread; a no-op outside any span"""
+        stack = self._stack()
+        if stack:
+            stack[-1].update(fields)
+
+    def record(self, span):
+        """Fold a finished span into the aggregates, the rerun trace and the JSON log"""
+        with self.lock:
+            series = self.series.get((span['kind'], span['name']))
+            if series is None:
+                series = self.series[(span['kind'], span['name'])] = {
+                    'count': 0, 'seconds': 0.0, 'buckets': [0] * len(LATENCY_BUCKETS),
+                    'rows': 0, 'bytes': 0, 'hits': 0, 'misses': 0
+                }
+            series['count'] += 1
+            series['seconds'] += span['seconds']
+            # Prometheus buckets are cumulative: a span counts in every bucket at or above its time
+            for i, bound in enumerate(LATENCY_BUCKETS):
+                if span['seconds'] <= bound:
+                    series['buckets'][i] += 1
+            series['rows'] += span['rows']
+            series['bytes'] += span['bytes']
+            if span['cache'] == 'hit':
+                series['hits'] += 1
+            elif span['cache'] == 'miss':
+                series['misses'] += 1
+            if self.log is not None:
+                self.log.write(json.dumps({'time': time.time(), **span}, ensure_ascii=False) + '\n')
+                self.log.flush()
+        trace = getattr(self.local, 'trace', None)
+        if trace is not None:
+            trace.append(span)
+
+    def summary(self):
+        """One row per (kind, name): calls, mean and total seconds, rows, bytes and cache hit rate"""
+        with self.lock:
+            rows = [
+                {
+                    'kind': kind, 'name': name, 'calls': s['count'],
+                    'mean_ms': s['seconds'] / s['count'] * 1000, 'total_s': s['seconds'],
+                    'rows': s['rows'], 'bytes': s['bytes'],
+                    'hit_rate': s['hits'] / (s['hits'] + s['misses']) if s['hits'] + s['misses'] else None
+                }
+                for (kind, name), s in self.series.items()
+            ]
+        return pd.DataFrame(rows, columns=['kind', 'name', 'calls', 'mean_ms', 'total_s', 'rows', 'bytes', 'hit_rate'])
+
+    def prometheus(self):
+        """Aggregates in the Prometheus text exposition format"""
+        def labels(kind, name, **extra):
+            pairs = {'kind': kind, 'name': name, **extra}
+            escaped = (
+                f'{key}="' + str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') + '"'
+                for key, value in pairs.items()
+            )
+            return '{' + ','.join(escaped) + '}'
+
+        with self.lock:
+            series = {key: dict(value, buckets=list(value['buckets'])) for key, value in self.series.items()}
+        lines = [
+            '# HELP mtn_dashboard_span_seconds Wall time of rendered pages, charts and data queries',
+            '# TYPE mtn_dashboard_span_seconds histogram'
+        ]
+        for (kind, name), s in series.items():
+            for bound, count in zip(LATENCY_BUCKETS, s['buckets']):
+                lines.append(f"mtn_dashboard_span_seconds_bucket{labels(kind, name, le=bound)} {count}")
+            lines.append(f"mtn_dashboard_span_seconds_bucket{labels(kind, name, le='+Inf')} {s['count']}")
+            lines.append(f"mtn_dashboard_span_seconds_sum{labels(kind, name)} {s['seconds']:.6f}")
+            lines.append(f"mtn_dashboard_span_seconds_count{labels(kind, name)} {s['count']}")
+        for metric, field, help_text in (
+            ('rows_scanned_total', 'rows', 'Fact table rows read'),
+            ('payload_bytes_total', 'bytes', 'Bytes of cached results and figures served')
+        ):
+            lines += [f'# HELP mtn_dashboard_{metric} {help_text}', f'# TYPE mtn_dashboard_{metric} counter']
+            lines += [f"mtn_dashboard_{metric}{labels(kind, name)} {s[field]}" for (kind, name), s in series.items()]
+        lines += [
+            '# HELP mtn_dashboard_cache_requests_total Result cache lookups by outcome',
+            '# TYPE mtn_dashboard_cache_requests_total counter'
+        ]
+        for (kind, name), s in series.items():
+            if s['hits'] or s['misses']:
+                lines.append(f"mtn_dashboard_cache_requests_total{labels(kind, name, result='hit')} {s['hits']}")
+                lines.append(f"mtn_dashboard_cache_requests_total{labels(kind, name, result='miss')} {s['misses']}")
+        return '\n'.join(lines) + '\n'
+
+    def write_metrics(self, path=METRICS_FILE):
+        """Atomically replace the Prometheus textfile (for node_exporter's textfile collector)"""
+        if not path:
+            return
+        partial = f"{path}.{os.getpid()}.tmp"
+        with open(partial, 'w', encoding='utf-8') as f:
+            f.write(self.prometheus())
+        os.replace(partial, path)
+
+
+@st.cache_resource(show_spinner=False)
+def get_profiler():
+    """Process-wide profiler shared by every session and background thread"""
+    return Profiler()
+
+
+@contextmanager
+def profile(kind, name):
+    """Time a page, chart or query into the shared profiler; yields the span's dict (or {} when off)"""
+    if not PROFILE_ENABLED:
+        yield {}
+        return
+    with get_profiler().span(kind, name) as span:
+        yield span
+
+
+def annotate_span(**fields):
+    """Attach rows, bytes or a cache outcome to the innermost open span"""
+    if PROFILE_ENABLED:
+        get_profiler().annotate(**fields)
+
+
+def render_debug_panel(trace):
+    """Hidden panel (open the app with ?debug=1): this rerun's spans, process aggregates and cache state"""
+    profiler = get_profiler()
+    run = pd.DataFrame(trace, columns=['kind', 'name', 'seconds', 'rows', 'bytes', 'cache'])
+    run['ms'] = run.pop('seconds') * 1000
+    with st.expander("⏱️ Profiling", expanded=True):
+        st.caption(f"This rerun: {len(run)} spans, {run.loc[run['kind'] == 'page', 'ms'].sum():.0f} ms rendering the page")
+        st.dataframe(run, use_container_width=True, hide_index=True)
+        st.caption("Since process start")
+        st.dataframe(profiler.summary(), use_container_width=True, hide_index=True)
+        scheduler = get_precompute_scheduler()
+        st.json({
+            'result_cache': get_result_cache().stats(),
+            'precompute': scheduler.stats() if scheduler else None
+        })
+        st.code(profiler.prometheus(), language='text')
+
+
+# ==================== DATA LAYER ====================
+# Dimension members shared by every fact table
+REGIONS = ['Alibori', 'Atacora', 'Atlantique', 'Borgou', 'Collines', 'Couffo',
+           'Donga', 'Littoral', 'Mono', 'Ouémé', 'Plateau', 'Zou']
+AIRTIME_CHANNELS = ['MoMo', 'EVD', 'DTC', 'DTR', 'Xtratime']
+ACQUISITION_CHANNELS = ['YC (Yellow Centers)', 'DTC (MTN Shops)', 'DTR (Dealers)', 'Digital']
+FLOAT_CHANNELS = ['Agents', 'Dealers', 'Retailers', 'Direct']
+AGENT_TIERS = ['Gold', 'Silver', 'Bronze', 'Inactive']
+
+DIMENSION_MEMBERS = {
+    'region': REGIONS,
+    'tier': AGENT_TIERS
+}
+
+# Daily fact tables: dimension columns (with their channel members) and typed measures.
+# Budget columns live next to the actuals so every slice carries its own budget.
+FACT_SCHEMAS = {
+    'sales': {
+        'channels': AIRTIME_CHANNELS,
+        'dims': ['region', 'channel', 'tier'],
+        'measures': {
+            'airtime_sales': 'float32',
+            'transactions': 'int32',
+            'budget_airtime_sales': 'float32',
+            'budget_transactions': 'float32'
+        }
+    },
+    'float': {
+        'channels': FLOAT_CHANNELS,
+        'dims': ['region', 'channel', 'tier'],
+        'measures': {
+            'float_distributed': 'float32',
+            'budget_float_distributed': 'float32'
+        }
+    },
+    'acquisition': {
+        'channels': ACQUISITION_CHANNELS,
+        'dims': ['region', 'channel'],
+        'measures': {
+            'gross_adds': 'int32',
+            'churners': 'int32',
+            'returners': 'int32',
+            'reconnections': 'int32',
+            'budget_gross_adds': 'float32',
+            'budget_churners': 'float32',
+            'budget_returners': 'float32',
+            'budget_reconnections': 'float32'
+        }
+    },
+    'conversions': {
+        'channels': ACQUISITION_CHANNELS,
+        'dims': ['region', 'channel'],
+        'measures': {
+            'conversion_base': 'int32',
+            'momo_conversions': 'int32',
+            'data_conversions': 'int32',
+            'bundle_conversions': 'int32',
+            'multi_service': 'int32',
+            'xtratime_conversions': 'int32',
+            'vas_conversions': 'int32',
+            'budget_momo_conversions': 'float32',
+            'budget_data_conversions': 'float32',
+            'budget_bundle_conversions': 'float32',
+            'budget_multi_service': 'float32',
+            'budget_xtratime_conversions': 'float32',
+            'budget_vas_conversions': 'float32'
+        }
+    },
+    'market': {
+        'dims': ['region'],
+        'measures': {
+            'market_share': 'float32',
+            'budget_market_share': 'float32'
+        }
+    },
+    'agents': {
+        'dims': ['region', 'tier'],
+        'measures': {
+            'agents': 'int32',
+            'active_agents': 'int32',
+            'mpos_active': 'int32',
+            'new_agents': 'int32',
+            'churned_agents': 'int32'
+        }
+    }
+}
+
+# Geographic detail below region, kept when a fact table carries it; drill-down maps group by it
+GEO_DETAIL_COLUMNS = ['commune', 'arrondissement']
+
+
+def fact_columns(table, available=()):
+    """Column layout of a fact table: date, dimensions (region followed by any geographic
+    detail in `available`), measures"""
+    schema = FACT_SCHEMAS[table]
+    details = [c for c in GEO_DETAIL_COLUMNS if c in available]
+    dims = [col for dim in schema['dims'] for col in ([dim] + details if dim == 'region' else [dim])]
+    return ['date'] + dims + list(schema['measures'])
+
+
+# Relative weights used to spread national totals over the dimensions of the synthetic tables
+REGION_WEIGHTS = np.array([520, 480, 6500, 3200, 900, 680, 750, 8980, 1640, 1200, 590, 2800], dtype=float)
+AIRTIME_CHANNEL_WEIGHTS = np.array([45.2, 38.6, 32.4, 28.1, 12.2])
+ACQUISITION_CHANNEL_WEIGHTS = np.array([48, 35, 13, 4], dtype=float)
+FLOAT_CHANNEL_WEIGHTS = np.array([40, 30, 20, 10], dtype=float)
+TIER_REVENUE_WEIGHTS = np.array([89.2, 80.6, 61.3, 15.0])
+TIER_AGENT_SHARE = np.array([0.10, 0.20, 0.30, 0.40])
+
+HOURLY_PROFILE = np.array([2.1, 1.8, 1.5, 1.2, 1.1, 1.8, 3.5, 5.2, 6.8, 7.5, 8.2, 8.9,
+                           9.2, 8.5, 7.8, 8.1, 8.9, 9.5, 9.8, 8.2, 6.5, 5.1, 3.8, 2.8])
+
+# Seed of the generated sample data: the same seed and end date always give the same tables
+SYNTHETIC_SEED = int(os.environ.get('MTN_SEED', 2025))
+
+
+def _seasonality(dates):
+    """Weekly cycle, a yearly cycle peaking in the December festive season and a month-end restock lift"""
+    weekly = 1 + 0.06 * np.sin(2 * np.pi * dates.dayofweek.values / 7)
+    yearly = 1 + 0.05 * np.cos(2 * np.pi * (dates.dayofyear.values - 355) / 365.25)
+    month_end = 1 + 0.04 * (dates.days_in_month.values - dates.day.values < 3)
+    return weekly * yearly * month_end, yearly
+
+
+def _commune_layout(rng):
+    """The 77 communes, their department codes and their share of the department weights"""
+    communes = [c for c in COMMUNE_DEPARTMENTS if c not in DEPARTMENT_ALIASES]
+    departments = pd.Index(REGIONS).get_indexer([COMMUNE_DEPARTMENTS[c] for c in communes])
+    weights = np.empty(len(communes))
+    for code, weight in enumerate(REGION_WEIGHTS):
+        members = departments == code
+        weights[members] = weight * rng.dirichlet(np.full(members.sum(), 4.0))
+    return communes, departments, weights
+
+
+def _synthesize_table(table, dates, national, weights, rng, noise=0.08, communes=None):
+    """Spread national daily totals over every dimension combination of a fact table
+
+    With `communes` (names and department codes from _commune_layout) the
+    first weights are per commune: rows carry a `commune` column and the
+    `region` of its department, so the table loads at either grain.
+    """
+    schema = FACT_SCHEMAS[table]
+    members = [DIMENSION_MEMBERS.get(dim, schema.get('channels')) for dim in schema['dims']]
+    if communes is not None:
+        members[0] = communes[0]
+    shares = weights[0] / weights[0].sum()
+    for w in weights[1:]:
+        shares = np.multiply.outer(shares, w / w.sum())
+    shares = shares.ravel()
+
+    n_days, n_cells = len(dates), len(shares)
+    frame = {'date': np.repeat(dates.values, n_cells)}
+    for i, dim in enumerate(schema['dims']):
+        codes = np.indices([len(m) for m in members])[i].ravel()
+        frame[dim] = pd.Categorical.from_codes(np.tile(codes, n_days), categories=members[i])
+
+    jitter = rng.normal(1.0, noise, (n_days, n_cells)).clip(0.5, 1.5)
+    for measure, daily_total in national.items():
+        values = np.outer(np.broadcast_to(daily_total, n_days), shares)
+        if not measure.startswith('budget_'):
+            values = values * jitter
+        if schema['measures'][measure].startswith('int'):
+            values = rng.poisson(values)
+        # Already in the stored dtypes, so loading the table does not copy it again
+        frame[measure] = values.ravel().astype(schema['measures'][measure])
+    frame = pd.DataFrame(frame)
+    if communes is not None:
+        frame.insert(2, 'commune', frame['region'])
+        frame['region'] = pd.Categorical.from_codes(communes[1][frame['commune'].cat.codes], categories=REGIONS)
+    return frame
+
+
+def synthesize_fact_tables(days=730, end=None, seed=SYNTHETIC_SEED, communes=False, agents=4500):
+    """Generate seeded daily fact tables covering every region (or commune), channel and tier
+
+    Flows follow a growth trend times weekly, yearly and month-end
+    seasonality; budgets follow the trend and the yearly plan. `agents` is
+    the network headcount on the last day. The same arguments always
+    produce the same tables.
+    """
+    rng = np.random.default_rng(seed)
+    end = pd.Timestamp(end or datetime.now()).normalize()
+    dates = pd.date_range(end=end, periods=days, freq='D')
+    t = np.linspace(0, 1, days)
+    season, yearly = _seasonality(dates)
+    layout = _commune_layout(rng) if communes else None
+    places = layout[2] if communes else REGION_WEIGHTS
+
+    def curve(level, growth, spread):
+        return (level * (1 + growth * t) * season * rng.normal(1, spread, days)).clip(min=0)
+
+    sales = curve(5.5, 0.18, 0.05)
+    transactions = curve(2800, 0.10, 0.05)
+    float_distributed = curve(8.0, 0.19, 0.06)
+    gross_adds = curve(2300, 0.05, 0.06)
+    churners = curve(2500, 0.02, 0.05)
+    base = curve(520, 0.05, 0.04)
+    headcount = agents * (1 + 0.03 * t) / 1.03
+
+    tables = {
+        'sales': _synthesize_table('sales', dates, {
+            'airtime_sales': sales,
+            'transactions': transactions,
+            'budget_airtime_sales': 0.93 * sales.mean() * (1 + 0.18 * t) * yearly,
+            'budget_transactions': 0.95 * transactions.mean() * (1 + 0.10 * t) * yearly
+        }, [places, AIRTIME_CHANNEL_WEIGHTS, TIER_REVENUE_WEIGHTS], rng, communes=layout),
+        'float': _synthesize_table('float', dates, {
+            'float_distributed': float_distributed,
+            'budget_float_distributed': 0.94 * float_distributed.mean() * (1 + 0.19 * t) * yearly
+        }, [places, FLOAT_CHANNEL_WEIGHTS, TIER_REVENUE_WEIGHTS], rng, communes=layout),
+        'acquisition': _synthesize_table('acquisition', dates, {
+            'gross_adds': gross_adds,
+            'churners': churners,
+            'returners': curve(380, 0.0, 0.07),
+            'reconnections': curve(560, 0.03, 0.07),
+            'budget_gross_adds': np.full(days, 2400.0),
+            'budget_churners': np.full(days, 2450.0),
+            'budget_returners': np.full(days, 400.0),
+            'budget_reconnections': np.full(days, 500.0)
+        }, [places, ACQUISITION_CHANNEL_WEIGHTS], rng, communes=layout),
+        'conversions': _synthesize_table('conversions', dates, {
+            'conversion_base': base,
+            'momo_conversions': base * (0.18 + 0.02 * t),
+            'data_conversions': base * (0.23 + 0.025 * t),
+            'bundle_conversions': base * (0.34 + 0.03 * t),
+            'multi_service': base * (0.12 + 0.015 * t),
+            'xtratime_conversions': base * (0.09 + 0.01 * t),
+            'vas_conversions': base * (0.16 + 0.02 * t),
+            'budget_momo_conversions': base.mean() * 0.18,
+            'budget_data_conversions': base.mean() * 0.23,
+            'budget_bundle_conversions': base.mean() * 0.33,
+            'budget_multi_service': base.mean() * 0.125,
+            'budget_xtratime_conversions': base.mean() * 0.09,
+            'budget_vas_conversions': base.mean() * 0.17
+        }, [places, ACQUISITION_CHANNEL_WEIGHTS], rng, communes=layout),
+        'agents': _synthesize_table('agents', dates, {
+            'agents': headcount,
+            'active_agents': 0.856 * headcount * (1 + 0.01 * t),
+            'mpos_active': 0.689 * headcount * (1 + 0.03 * t),
+            'new_agents': curve(agents / 1070, 0.0, 0.3),
+            'churned_agents': curve(agents / 1600, 0.0, 0.3)
+        }, [places, TIER_AGENT_SHARE], rng, noise=0.02, communes=layout)
+    }
+
+    # Market share is a rate, so it is generated per region instead of being spread
+    region_offsets = (REGION_WEIGHTS / REGION_WEIGHTS.mean() - 1) * 1.5
+    share = 45.8 + 0.5 * t + rng.normal(0, 0.15, days)
+    market_share = share[:, None] + region_offsets[None, :]
+    tables['market'] = pd.DataFrame({
+        'date': np.repeat(dates.values, len(REGIONS)),
+        'region': pd.Categorical.from_codes(np.tile(np.arange(len(REGIONS)), days), categories=REGIONS),
+        'market_share': market_share.ravel(),
+        'budget_market_share': np.full(days * len(REGIONS), 45.8) + np.tile(region_offsets, days)
     })
-    
-    return {
-        'kpi_data': kpi_data,
-        'daily_data': daily_data,
-        'trend_data': trend_data,
-        'channel_data': channel_data,
-        'regional_data': regional_data,
-        'agent_tiers': agent_tiers,
-        'hourly_pattern': hourly_pattern
+    return tables
+
+
+def synthesize_agent_days(propensity, days, rng):
+    """Activity flags and revenue (thousand XOF) of each agent on each of `days` days
+
+    A lognormal propensity drives both how often an agent works and how much it sells.
+    """
+    rank = propensity.argsort().argsort() / max(len(propensity) - 1, 1)
+    flags = {
+        'sells_airtime': rng.random((days, len(propensity))) < 0.80 + 0.25 * rank,
+        'registers_sims': rng.random((days, len(propensity))) < 0.60 + 0.37 * rank,
+        'multi_service': rng.random((days, len(propensity))) < 0.40 + 0.50 * rank
     }
+    revenue = rng.gamma(2.0, 0.9 * propensity, (days, len(propensity))).astype('float32') * flags['sells_airtime']
+    return flags, revenue
 
-# ==================== KPI CARD COMPONENT - UPDATED ====================
-def create_mtn_kpi_card(label, value, unit, vs_budget_pct, comparisons):
-    """Create compact MTN-style KPI card with vs Budget instead of vs previous day"""
-    
-    is_positive = vs_budget_pct >= 0
-    delta_class = "delta-positive" if is_positive else "delta-negative"
-    arrow = "↑" if is_positive else "↓"
-    
-    if isinstance(value, (int, float)):
-        if abs(value) >= 1000000:
-            formatted_value = f"{value/1000000:.1f}M"
-        elif abs(value) >= 1000:
-            formatted_value = f"{value/1000:.1f}K"
+
+def write_synthetic_dataset(path, days=1095, end=None, seed=SYNTHETIC_SEED, communes=True, agents=20000,
+                            activity=True, chunk_days=31):
+    """Write seeded sample data at production volume as Parquet under `path`
+
+    Produces `<table>.parquet` for every fact table (row groups of about a
+    month, so scans can skip by date) and, with `activity`, an
+    `agent_activity.parquet` with one row per agent per day, generated and
+    written `chunk_days` at a time so 20k agents over three years never sit
+    in memory at once, plus `agent_directory.parquet` with each agent's
+    region. The directory loads with MTN_DATA_DIR. Returns rows written per
+    file.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    os.makedirs(path, exist_ok=True)
+    tables = synthesize_fact_tables(days, end, seed, communes, agents)
+    written = {}
+    for table, frame in tables.items():
+        row_group = max(1, len(frame) // days * 31)
+        frame.to_parquet(os.path.join(path, f"{table}.parquet"), index=False, row_group_size=row_group)
+        written[table] = len(frame)
+
+    if activity and agents:
+        rng = np.random.default_rng([seed, 1])
+        dates = pd.date_range(end=tables['sales']['date'].iloc[-1], periods=days, freq='D')
+        if communes:
+            names, departments, weights = _commune_layout(np.random.default_rng(seed))
+            home = rng.choice(len(names), agents, p=weights / weights.sum())
+            places = {'region': np.asarray(REGIONS)[departments[home]], 'commune': np.asarray(names)[home]}
         else:
-            formatted_value = f"{value:.1f}" if isinstance(value, float) else f"{value:,}"
-    else:
-        formatted_value = str(value)
-    
-    html = f"""
-    <div class="kpi-card">
-        <div class="kpi-label">{label}</div>
-        <div class="kpi-value">{formatted_value}<span style="font-size: 11px; color: #4A4A4A; margin-left: 2px;">{unit}</span></div>
-        <div class="kpi-delta {delta_class}">vs Budget: {arrow} {abs(vs_budget_pct):.1f}%</div>
-        <div class="kpi-compact-grid">
-            <div class="kpi-compact-item">
-                <span>YTD:</span>
-                <span class="kpi-compact-value">{comparisons.get('ytd', 'N/A')}</span>
-            </div>
-            <div class="kpi-compact-item">
-                <span>WoW:</span>
-                <span class="kpi-compact-value">{comparisons.get('wow', 'N/A')}</span>
-            </div>
-            <div class="kpi-compact-item">
-                <span>MoM:</span>
-                <span class="kpi-compact-value">{comparisons.get('mom', 'N/A')}</span>
-            </div>
-        </div>
-    </div>
+            places = {'region': rng.choice(REGIONS, agents, p=REGION_WEIGHTS / REGION_WEIGHTS.sum())}
+        agent_ids = pd.Categorical([f"AG{i:06d}" for i in range(agents)])
+        propensity = rng.lognormal(0, 0.9, agents)
+        pd.DataFrame({'agent_id': agent_ids, **places}).to_parquet(
+            os.path.join(path, 'agent_directory.parquet'), index=False
+        )
+        written['agent_directory'] = agents
+
+        writer = None
+        for first in range(0, days, chunk_days):
+            chunk = dates[first:first + chunk_days]
+            flags, revenue = synthesize_agent_days(propensity, len(chunk), rng)
+            frame = pd.DataFrame({
+                'agent_id': np.tile(agent_ids, len(chunk)),
+                **{column: pd.Categorical(np.tile(values, len(chunk))) for column, values in places.items()},
+                'date': np.repeat(chunk.values, agents),
+                'revenue': revenue.ravel(),
+                **{flag: values.ravel() for flag, values in flags.items()}
+            })
+            batch = pa.Table.from_pandas(frame, preserve_index=False)
+            if writer is None:
+                writer = pq.ParquetWriter(os.path.join(path, 'agent_activity.parquet'), batch.schema)
+            writer.write_table(batch)
+        writer.close()
+        written['agent_activity'] = days * agents
+    return written
+
+
+def _is_coerced(table, frame, columns):
+    """True when a frame already has the typed layout, so coercing it would only copy it"""
+    schema = FACT_SCHEMAS[table]
+    if list(frame.columns) != list(columns):
+        return False
+    for column in columns:
+        dtype = frame[column].dtype
+        if column == 'date':
+            typed = dtype == 'datetime64[ns]'
+        elif column in schema['dims']:
+            members = list(DIMENSION_MEMBERS.get(column, schema.get('channels')))
+            typed = isinstance(dtype, pd.CategoricalDtype) and list(dtype.categories[:len(members)]) == members
+        elif column in GEO_DETAIL_COLUMNS:
+            typed = isinstance(dtype, pd.CategoricalDtype)
+        else:
+            typed = dtype == schema['measures'][column]
+        if not typed:
+            return False
+    return 'date' not in frame or frame['date'].is_monotonic_increasing
+
+
+def _coerce_fact_table(table, frame, columns=None):
+    """Cast a raw fact table (or the `columns` read from it) to its typed columnar layout"""
+    schema = FACT_SCHEMAS[table]
+    columns = columns or fact_columns(table, frame.columns)
+    # Memory-mapped tables arrive typed; returning them as-is keeps them zero-copy
+    if _is_coerced(table, frame, columns):
+        return frame
+    missing = [c for c in columns if c not in frame.columns]
+    if missing:
+        raise ValueError(f"Fact table '{table}' is missing columns: {', '.join(missing)}")
+
+    typed = {}
+    for column in columns:
+        if column == 'date':
+            typed['date'] = pd.to_datetime(frame['date']).dt.normalize()
+        elif column in schema['dims']:
+            members = DIMENSION_MEMBERS.get(column, schema.get('channels'))
+            values = frame[column].astype(str)
+            extra = sorted(set(values.unique()) - set(members))
+            typed[column] = pd.Categorical(values, categories=list(members) + extra)
+        elif column in GEO_DETAIL_COLUMNS:
+            typed[column] = pd.Categorical(frame[column])
+        else:
+            dtype = schema['measures'][column]
+            values = pd.to_numeric(frame[column], errors='coerce').fillna(0)
+            typed[column] = values.round().astype(dtype) if dtype.startswith('int') else values.astype(dtype)
+
+    typed = pd.DataFrame(typed)
+    if 'date' in typed:
+        typed = typed.sort_values('date', kind='stable')
+    return typed.reset_index(drop=True)
+
+
+def _concat_partitions(table, frames):
+    """Stack date-ordered partitions of a fact table, unioning their dimension members"""
+    dims = [dim for dim in FACT_SCHEMAS[table]['dims'] + GEO_DETAIL_COLUMNS if dim in frames[0]]
+    for dim in dims:
+        members = list(dict.fromkeys(m for frame in frames for m in frame[dim].cat.categories))
+        frames = [frame.assign(**{dim: frame[dim].cat.set_categories(members)}) for frame in frames]
+    return pd.concat(frames, ignore_index=True)
+
+
+# Every measure resolves to the fact table that stores it
+MEASURE_TABLES = {measure: table for table, schema in FACT_SCHEMAS.items() for measure in schema['measures']}
+
+# Rates are averaged over time and regions instead of summed
+MEAN_MEASURES = {'market_share', 'budget_market_share'}
+
+# Stock measures are read on the last day of a window instead of summed
+SNAPSHOT_MEASURES = {'agents', 'active_agents', 'mpos_active'}
+
+# Calendar roll-ups a query can group by, as pandas period frequencies (weeks start on Monday)
+CALENDAR_GRAINS = {'week': 'W-SUN', 'month': 'M', 'quarter': 'Q', 'year': 'Y'}
+
+# Derived KPIs are computed after aggregation so ratios stay ratios of sums
+DERIVED_MEASURES = {
+    'net_adds': (['gross_adds', 'churners'], lambda f: f['gross_adds'] - f['churners']),
+    'budget_net_adds': (['budget_gross_adds', 'budget_churners'],
+                        lambda f: f['budget_gross_adds'] - f['budget_churners']),
+    'net_churn': (['churners', 'reconnections'], lambda f: f['churners'] - f['reconnections']),
+    'budget_net_churn': (['budget_churners', 'budget_reconnections'],
+                         lambda f: f['budget_churners'] - f['budget_reconnections']),
+    'momo_rate': (['momo_conversions', 'conversion_base'],
+                  lambda f: f['momo_conversions'] / f['conversion_base'] * 100),
+    'data_rate': (['data_conversions', 'conversion_base'],
+                  lambda f: f['data_conversions'] / f['conversion_base'] * 100),
+    'bundle_rate': (['bundle_conversions', 'conversion_base'],
+                    lambda f: f['bundle_conversions'] / f['conversion_base'] * 100),
+    'multi_service_rate': (['multi_service', 'conversion_base'],
+                           lambda f: f['multi_service'] / f['conversion_base'] * 100),
+    'xtratime_rate': (['xtratime_conversions', 'conversion_base'],
+                      lambda f: f['xtratime_conversions'] / f['conversion_base'] * 100),
+    'vas_rate': (['vas_conversions', 'conversion_base'],
+                 lambda f: f['vas_conversions'] / f['conversion_base'] * 100),
+    'budget_momo_rate': (['budget_momo_conversions', 'conversion_base'],
+                         lambda f: f['budget_momo_conversions'] / f['conversion_base'] * 100),
+    'budget_data_rate': (['budget_data_conversions', 'conversion_base'],
+                         lambda f: f['budget_data_conversions'] / f['conversion_base'] * 100),
+    'budget_bundle_rate': (['budget_bundle_conversions', 'conversion_base'],
+                           lambda f: f['budget_bundle_conversions'] / f['conversion_base'] * 100),
+    'budget_multi_service_rate': (['budget_multi_service', 'conversion_base'],
+                                  lambda f: f['budget_multi_service'] / f['conversion_base'] * 100)
+}
+
+
+def file_columns(path):
+    """Column names of a Parquet or CSV file, read from its footer or header only"""
+    if path.endswith('.parquet'):
+        import pyarrow.parquet as pq
+        return pq.read_schema(path).names
+    return list(pd.read_csv(path, nrows=0).columns)
+
+
+# Set MTN_DATA_MMAP=0 to read MTN_DATA_DIR tables into each process's heap instead of mapping them
+MMAP_ENABLED = os.environ.get('MTN_DATA_MMAP', '1') != '0'
+
+
+def map_fact_table(table, path, cache_dir):
+    """A fact table as zero-copy columns over a memory-mapped Arrow IPC file
+
+    The Arrow file holds the typed layout and is written from `path` (Parquet
+    or CSV) the first time, or whenever `path` is newer or the layout has
+    changed. Loading it needs no parsing or casting, and its pages live in
+    the OS page cache. Every process serving the dashboard maps the same
+    file and shares those pages instead of holding its own heap copy.
     """
-    return html
+    import pyarrow as pa
+    arrow_path = os.path.join(cache_dir, f"{table}.arrow")
+    columns = fact_columns(table, file_columns(path))
+    stale = not os.path.exists(arrow_path) or os.path.getmtime(arrow_path) < os.path.getmtime(path)
+    if not stale:
+        with pa.memory_map(arrow_path, 'r') as cached:
+            stale = pa.ipc.open_file(cached).schema.names != columns
+    if stale:
+        raw = pd.read_parquet(path, columns=columns) if path.endswith('.parquet') else pd.read_csv(path, usecols=columns)
+        arrow = pa.Table.from_pandas(_coerce_fact_table(table, raw), preserve_index=False)
+        os.makedirs(cache_dir, exist_ok=True)
+        # One record batch per file: columns then map onto single contiguous buffers
+        partial = f"{arrow_path}.{os.getpid()}.tmp"
+        with pa.OSFile(partial, 'wb') as sink, pa.ipc.new_file(sink, arrow.schema) as writer:
+            writer.write_table(arrow, max_chunksize=max(arrow.num_rows, 1))
+        os.replace(partial, arrow_path)
+    mapped = pa.ipc.open_file(pa.memory_map(arrow_path, 'r')).read_all()
+    return mapped.to_pandas(split_blocks=True)
 
-# ==================== PLOTLY THEME ====================
-def get_mtn_plotly_theme():
-    """MTN color scheme for Plotly charts"""
-    return {
-        'layout': {
-            'font': {'family': 'Segoe UI', 'size': 11, 'color': MTN_BLACK},
-            'plot_bgcolor': MTN_WHITE,
-            'paper_bgcolor': MTN_WHITE,
-            'colorway': [MTN_YELLOW, MTN_BLACK, MTN_DARK_GRAY, MTN_GRAY],
-            'hovermode': 'x unified'
+
+def _resolve_measures(measures):
+    """Split requested KPIs into the stored measures they need, grouped by fact table"""
+    stored = []
+    for measure in measures:
+        needed = DERIVED_MEASURES[measure][0] if measure in DERIVED_MEASURES else [measure]
+        stored.extend(m for m in needed if m not in stored)
+    by_table = {}
+    for measure in stored:
+        by_table.setdefault(MEASURE_TABLES[measure], []).append(measure)
+    return by_table
+
+
+def _add_derived(frame, measures):
+    """Append derived KPI columns to an aggregated frame"""
+    for measure in measures:
+        if measure in DERIVED_MEASURES:
+            frame[measure] = DERIVED_MEASURES[measure][1](frame)
+    return frame
+
+
+def _period_start(dates, grain):
+    """First day of the calendar period (CALENDAR_GRAINS) each date falls in"""
+    return dates.dt.to_period(CALENDAR_GRAINS[grain]).dt.start_time.rename(grain)
+
+
+def _join_parts(result, part, by):
+    """Outer-join two aggregated frames on their group keys (side by side when ungrouped)"""
+    if result is None:
+        return part
+    if not by:
+        return pd.concat([result.reset_index(drop=True), part.reset_index(drop=True)], axis=1)
+    return result.merge(part, on=by, how='outer')
+
+
+class DataSource:
+    """Typed daily fact tables behind a single aggregation query API
+
+    Tables are held in memory, except Parquet tables opened with `scan=True`:
+    those stay on disk and every query reads only the row groups its date
+    range and dimension predicates can match.
+    """
+
+    def __init__(self, tables, origin='synthetic', parquet_paths=None):
+        self.tables = {name: _coerce_fact_table(name, frame) for name, frame in tables.items()}
+        self.parquet_paths = dict(parquet_paths or {})
+        self.origin = origin
+        self.cube = None
+        self.agent_store = None
+        self.hourly = None
+        self.version = 0
+        self.versions = {table: 0 for table in FACT_SCHEMAS}
+        self.listeners = []
+        # Day partitions appended since load by name (their delta file), kept apart from the
+        # loaded (possibly memory-mapped) table, and all of a table's merged by date for reads
+        self.partitions = {table: {} for table in FACT_SCHEMAS}
+        self.merged = {}
+        # Ingested delta files -> the modification time they were read at; reread once rewritten
+        self.ingested = {}
+        # Delta files that failed to load -> their modification time; retried once rewritten
+        self.rejected = {}
+        self.lock = threading.RLock()
+        self.date_ranges = {table: (frame['date'].iloc[0], frame['date'].iloc[-1]) for table, frame in self.tables.items()}
+        # Full column layout of each table, including any geographic detail it carries
+        self.layouts = {table: list(frame.columns) for table, frame in self.tables.items()}
+        for table, path in self.parquet_paths.items():
+            dates = _coerce_fact_table(table, pd.read_parquet(path, columns=['date']), ['date'])['date']
+            self.date_ranges[table] = (dates.iloc[0], dates.iloc[-1])
+            self.layouts[table] = fact_columns(table, file_columns(path))
+        # Last day of each loaded table: partitions only add days after it
+        self.loaded_ends = {table: last for table, (_, last) in self.date_ranges.items()}
+        self.first_date = min(first for first, _ in self.date_ranges.values())
+        self.latest_date = max(last for _, last in self.date_ranges.values())
+
+    @classmethod
+    def from_path(cls, path, scan=False, mmap=MMAP_ENABLED):
+        """Load every fact table from `<table>.parquet` or `<table>.csv` under a directory
+
+        With `mmap` the tables are memory-mapped from Arrow copies kept in
+        MTN_ARROW_DIR (default `<path>/.arrow`); when that directory cannot
+        be written they are read into memory instead.
+        """
+        tables, parquet_paths = {}, {}
+        cache_dir = os.environ.get('MTN_ARROW_DIR') or os.path.join(path, '.arrow')
+        for table in FACT_SCHEMAS:
+            parquet_path = os.path.join(path, f"{table}.parquet")
+            csv_path = os.path.join(path, f"{table}.csv")
+            if os.path.exists(parquet_path) and scan:
+                parquet_paths[table] = parquet_path
+                continue
+            if mmap and (os.path.exists(parquet_path) or os.path.exists(csv_path)):
+                try:
+                    tables[table] = map_fact_table(
+                        table, parquet_path if os.path.exists(parquet_path) else csv_path, cache_dir
+                    )
+                    continue
+                except OSError:
+                    pass
+            if os.path.exists(parquet_path):
+                tables[table] = pd.read_parquet(parquet_path, columns=fact_columns(table, file_columns(parquet_path)))
+            elif os.path.exists(csv_path):
+                tables[table] = pd.read_csv(csv_path, usecols=fact_columns(table, file_columns(csv_path)))
+            else:
+                raise FileNotFoundError(f"No parquet or csv file for fact table '{table}' in {path}")
+        return cls(tables, origin=path, parquet_paths=parquet_paths)
+
+    @classmethod
+    def synthetic(cls, days=730, end=None, seed=SYNTHETIC_SEED):
+        """Build a data source from generated sample fact tables, at commune grain for the drill-down maps"""
+        return cls(synthesize_fact_tables(days=days, end=end, seed=seed, communes=True))
+
+    def on_change(self, callback):
+        """Register `callback(source, tables)` to run whenever new data lands"""
+        self.listeners.append(callback)
+
+    def mark_changed(self, tables=None):
+        """Bump the data versions and notify listeners which tables changed (None: all)"""
+        self.version += 1
+        for table in (self.versions if tables is None else tables):
+            self.versions[table] += 1
+        for callback in self.listeners:
+            callback(self, tables)
+
+    def table_versions(self, tables):
+        """Data versions of the given tables, for cache keys that only depend on those"""
+        return tuple(self.versions[table] for table in tables)
+
+    def append(self, partitions):
+        """Add named day partitions to the fact tables and the KPI cube
+
+        `partitions` maps a table to {name: delta rows}. A partition replaces
+        the one appended before under the same name, so a rewritten delta
+        file corrects its days instead of being ignored. Rows on days the
+        loaded table already covers are dropped and logged. Geographic detail
+        the table does not carry is dropped, and detail a delta lacks is left
+        empty. Returns the tables that changed, whose versions are bumped.
+        """
+        changed = []
+        with self.lock:
+            for table, named in partitions.items():
+                layout = self.layouts[table]
+                for name, frame in named.items():
+                    frame = frame.assign(**{c: np.nan for c in GEO_DETAIL_COLUMNS if c in layout and c not in frame})
+                    frame = _coerce_fact_table(table, frame, layout)
+                    loaded = frame['date'] <= self.loaded_ends[table]
+                    if loaded.any():
+                        logger.warning(
+                            "Dropping %d rows of %s dated on or before %s, already loaded in '%s'",
+                            loaded.sum(), name, f"{self.loaded_ends[table]:%Y-%m-%d}", table
+                        )
+                        frame = frame[~loaded].reset_index(drop=True)
+                    previous = self.partitions[table].pop(name, None)
+                    if frame.empty and previous is None:
+                        continue
+                    if not frame.empty:
+                        self.partitions[table][name] = frame
+                    self.merged.pop(table, None)
+                    if self.cube is not None:
+                        # Taking known rows out never rebuilds; adding rows may, from the rows now held
+                        if previous is not None:
+                            self.cube.append(table, previous, sign=-1)
+                        if not frame.empty:
+                            self.cube.append(table, frame)
+                    if table not in changed:
+                        changed.append(table)
+            for table in changed:
+                ends = [part['date'].iloc[-1] for part in self.partitions[table].values()]
+                self.date_ranges[table] = (self.date_ranges[table][0], max([self.loaded_ends[table]] + ends))
+            if changed:
+                self.latest_date = max(last for _, last in self.date_ranges.values())
+        if changed:
+            self.mark_changed(changed)
+        return changed
+
+    def _deltas(self, table):
+        """A table's appended partitions merged into one date-sorted frame, as a list of zero or one
+
+        The loaded table itself is left alone: folding deltas into it would
+        turn a memory-mapped table into a private heap copy and copy the
+        full history again on every ingest. The merge is redone only after
+        an append.
+        """
+        with self.lock:
+            if table not in self.merged:
+                parts = list(self.partitions[table].values())
+                merged = _concat_partitions(table, parts).sort_values('date', kind='stable') if parts else None
+                self.merged[table] = None if merged is None else merged.reset_index(drop=True)
+            return [] if self.merged[table] is None else [self.merged[table]]
+
+    def has_column(self, measures, column):
+        """True when every fact table behind `measures` carries `column` (e.g. commune detail)"""
+        return all(column in self.layouts[table] for table in _resolve_measures(measures))
+
+    def members(self, table, dim):
+        """Return the members of a dimension of a fact table"""
+        if table in self.tables:
+            members = self.tables[table][dim].cat.categories
+        else:
+            members = DIMENSION_MEMBERS.get(dim, FACT_SCHEMAS[table].get('channels'))
+        with self.lock:
+            frames = list(self.partitions[table].values())
+        return list(dict.fromkeys([*members, *(m for frame in frames for m in frame[dim].cat.categories)]))
+
+    def _predicates(self, table, where):
+        """Keep the predicates a fact table can answer: its own dimensions and members
+
+        A filter on a dimension the table lacks (tier on acquisitions) or on
+        members of another channel family (an acquisition channel on airtime
+        sales) does not restrict that table.
+        """
+        predicates = {}
+        for dim, members in (where or {}).items():
+            if dim not in FACT_SCHEMAS[table]['dims']:
+                continue
+            members = [members] if isinstance(members, str) else list(members)
+            known = self.members(table, dim)
+            members = [m for m in members if m in known]
+            if members:
+                predicates[dim] = members
+        return predicates
+
+    def _slice_dates(self, frame, start, end):
+        """Slice a date-sorted fact table with a binary search instead of a boolean scan"""
+        dates = frame['date'].values
+        lo = 0 if start is None else np.searchsorted(dates, np.datetime64(pd.Timestamp(start)), 'left')
+        hi = len(frame) if end is None else np.searchsorted(dates, np.datetime64(pd.Timestamp(end)), 'right')
+        return frame.iloc[lo:hi]
+
+    def _filter(self, frame, predicates):
+        """Apply dimension predicates as one mask over the categorical codes"""
+        mask = None
+        for dim, members in predicates.items():
+            column = frame[dim].cat
+            hit = np.isin(column.codes, column.categories.get_indexer(members))
+            mask = hit if mask is None else mask & hit
+        return frame if mask is None else frame[mask]
+
+    def _scan_parquet(self, table, columns, start, end, predicates):
+        """Read only the row groups of an on-disk table that can match the date range and predicates"""
+        filters = [(dim, 'in', members) for dim, members in predicates.items()]
+        if start is not None:
+            filters.append(('date', '>=', pd.Timestamp(start).normalize()))
+        if end is not None:
+            filters.append(('date', '<', pd.Timestamp(end).normalize() + pd.Timedelta(days=1)))
+        frame = pd.read_parquet(self.parquet_paths[table], columns=columns, filters=filters or None)
+        return _coerce_fact_table(table, frame, columns)
+
+    def query(self, table, measures=None, by=('date',), start=None, end=None, where=None, agg='sum'):
+        """Aggregate the measures of a fact table over the requested dimensions
+
+        `where` maps a dimension to a member or list of members and is applied
+        before aggregation; `agg` is any pandas groupby reduction ('sum' for
+        flows, 'mean' for rates). `by` may also hold a calendar grain (week,
+        month, quarter, year), labelled by the period's first day. Sums and
+        means are answered from the KPI cube when one is attached.
+        """
+        schema = FACT_SCHEMAS[table]
+        measures = list(measures or schema['measures'])
+        by = list(by)
+        with profile('query', f"{table}:cube") as span:
+            if self.cube is not None:
+                result = self.cube.query(table, measures, by, start, end, self._predicates(table, where), agg)
+                if result is not None:
+                    return result
+
+            span['name'] = f"{table}:scan"
+            columns = ['date' if col in CALENDAR_GRAINS else col for col in by] + measures
+            frame = self.read(table, list(dict.fromkeys(columns)), start, end, where)
+            span['rows'] = len(frame)
+            values = frame[measures].astype('float64')
+            if not by:
+                return getattr(values, agg)().to_frame().T
+            keys = [_period_start(frame['date'], col) if col in CALENDAR_GRAINS else frame[col] for col in by]
+            result = getattr(values.groupby(keys, observed=True), agg)()
+            return result.reset_index()
+
+    def read(self, table, columns=None, start=None, end=None, where=None):
+        """Rows of a fact table inside the date range that satisfy `where`, before aggregation"""
+        predicates = self._predicates(table, where)
+        if table in self.parquet_paths:
+            frame = self._scan_parquet(table, list(columns or self.layouts[table]), start, end, predicates)
+        else:
+            frame = self._filter(self._slice_dates(self.tables[table], start, end), predicates)
+            frame = frame if columns is None else frame[list(columns)]
+        # Appended days are stacked on only when the range reaches them
+        deltas = [self._filter(self._slice_dates(part, start, end), predicates) for part in self._deltas(table)]
+        deltas = [part[list(frame.columns)] for part in deltas if len(part)]
+        return _concat_partitions(table, [frame] + deltas) if deltas else frame
+
+    def kpi_series(self, measures, start=None, end=None, by=('date',), where=None):
+        """Join KPIs from several fact tables into one frame keyed by `by`"""
+        by = list(by)
+        result = None
+        for table, stored in _resolve_measures(measures).items():
+            means = [m for m in stored if m in MEAN_MEASURES]
+            sums = [m for m in stored if m not in MEAN_MEASURES]
+            for agg, group in (('sum', sums), ('mean', means)):
+                if not group:
+                    continue
+                part = self.query(table, group, by=by, start=start, end=end, where=where, agg=agg)
+                result = _join_parts(result, part, by)
+        return _add_derived(result, measures)
+
+    def kpi_totals(self, measures, start, end, by=(), where=None):
+        """Window totals of KPIs: flows summed, rates averaged, stocks read on the last day"""
+        by = list(by)
+        stored = [m for group in _resolve_measures(measures).values() for m in group]
+        flows = [m for m in stored if m not in SNAPSHOT_MEASURES]
+        stocks = [m for m in stored if m in SNAPSHOT_MEASURES]
+        result = None
+        if flows:
+            result = self.kpi_series(flows, start, end, by=by, where=where)
+        if stocks:
+            result = _join_parts(result, self.kpi_series(stocks, end, end, by=by, where=where), by)
+        result = _add_derived(result, measures)
+        return result.iloc[0].to_dict() if not by else result
+
+    def daily(self, table, measures=None, days=90, end=None, where=None, agg='sum'):
+        """National (or filtered) daily series for the trailing `days` ending at `end`"""
+        end = pd.Timestamp(end or self.latest_date)
+        start = end - pd.Timedelta(days=days - 1)
+        return self.query(table, measures, by=['date'], start=start, end=end, where=where, agg=agg)
+
+
+class KpiCube:
+    """Materialized day x region x channel x tier sums of every fact table measure
+
+    Each table is held as a dense array over its own dimensions, cumulated
+    along the day axis. Any window total is then one difference of two day
+    slices, and week/month/quarter/year roll-ups are differences at calendar
+    boundaries. Left-panel filters select cells by index instead of scanning
+    rows. Row counts are kept alongside the sums so means stay exact.
+    """
+
+    def __init__(self, source):
+        self.source = source
+        self._set_calendar(pd.date_range(source.first_date, source.latest_date, freq='D'))
+        self.tables = {}
+        for table, schema in FACT_SCHEMAS.items():
+            self.tables[table] = self._build(source.read(table), schema)
+
+    def _set_calendar(self, dates):
+        """Index the day calendar by each calendar grain"""
+        periods, period_starts = {'date': np.arange(len(dates))}, {'date': dates}
+        for grain, freq in CALENDAR_GRAINS.items():
+            grain_periods = dates.to_period(freq)
+            periods[grain] = grain_periods.asi8
+            period_starts[grain] = grain_periods.start_time
+        self.periods, self.period_starts, self.dates = periods, period_starts, dates
+
+    def _build(self, frame, schema):
+        """Bin the rows of one fact table into cumulative sum and count arrays"""
+        dims, measures = schema['dims'], list(schema['measures'])
+        categories = {dim: frame[dim].cat.categories for dim in dims}
+        shape = (len(self.dates),) + tuple(len(categories[dim]) for dim in dims)
+        day = self.dates.get_indexer(frame['date'])
+        cells = np.ravel_multi_index([day] + [frame[dim].cat.codes.values for dim in dims], shape)
+        size = int(np.prod(shape))
+
+        sums = np.stack([
+            np.bincount(cells, weights=frame[m].values.astype('float64'), minlength=size) for m in measures
+        ], axis=-1).reshape(shape + (len(measures),))
+        counts = np.bincount(cells, minlength=size).reshape(shape).astype('float64')
+        return {
+            'dims': dims,
+            'measures': {m: i for i, m in enumerate(measures)},
+            'categories': categories,
+            'days': len(self.dates),
+            'sums': np.concatenate([np.zeros((1,) + sums.shape[1:]), np.cumsum(sums, axis=0)]),
+            'counts': np.concatenate([np.zeros((1,) + counts.shape[1:]), np.cumsum(counts, axis=0)])
         }
-    }
 
-# ==================== PAGE CONTENT FUNCTIONS ====================
-def render_overview_content(data):
-    """Render Overview page content with requested modifications"""
-    
-    # KPI Cards - 6 columns with vs Budget comparison
-    col1, col2, col3, col4, col5, col6 = st.columns(6)
-    
-    with col1:
-        vs_budget = ((data['kpi_data']['market_share'] - data['kpi_data']['budget_market_share']) / 
-                    data['kpi_data']['budget_market_share']) * 100
-        st.markdown(create_mtn_kpi_card(
-            "Market Share",
-            46.10,
-            "%",
-            vs_budget,
-            {'ytd': '+2.3%', 'wow': '-0.2%', 'mom': '+0.5%'}  # Changed to percentages
-        ), unsafe_allow_html=True)
+    def _reserve(self, cube, days):
+        """Carry a table's cumulative arrays forward to `days` days, doubling capacity as needed"""
+        for key in ('sums', 'counts'):
+            array = cube[key]
+            if len(array) < days + 1:
+                grown = np.empty((max(days + 1, 2 * len(array)),) + array.shape[1:])
+                grown[:cube['days'] + 1] = array[:cube['days'] + 1]
+                cube[key] = array = grown
+            array[cube['days'] + 1:days + 1] = array[cube['days']]
+
+    def append(self, table, frame, sign=1):
+        """Fold a partition of new days into a table's cumulative arrays; sign=-1 takes one back out
+
+        Only the rows from the partition's first day onward are touched, so
+        the cost follows the new rows. A partition that brings a dimension
+        member the cube has never seen rebuilds that table instead, from the
+        source's current rows.
+        """
+        cube = self.tables[table]
+        if frame['date'].iloc[-1] > self.dates[-1]:
+            self._set_calendar(pd.date_range(self.dates[0], frame['date'].iloc[-1], freq='D'))
+        if any(len(frame[dim].cat.categories.difference(cube['categories'][dim])) for dim in cube['dims']):
+            self.tables[table] = self._build(self.source.read(table), FACT_SCHEMAS[table])
+            return
+
+        days = len(self.dates)
+        self._reserve(cube, days)
+        day = self.dates.get_indexer(frame['date'])
+        first = int(day.min())
+        shape = (days - first,) + tuple(len(cube['categories'][dim]) for dim in cube['dims'])
+        codes = [
+            cube['categories'][dim].get_indexer(frame[dim].cat.categories)[frame[dim].cat.codes.values]
+            for dim in cube['dims']
+        ]
+        cells = np.ravel_multi_index([day - first] + codes, shape)
+        size = int(np.prod(shape))
+        sums = np.stack([
+            np.bincount(cells, weights=frame[m].values.astype('float64'), minlength=size) for m in cube['measures']
+        ], axis=-1).reshape(shape + (len(cube['measures']),))
+        counts = np.bincount(cells, minlength=size).reshape(shape)
+        cube['sums'][first + 1:days + 1] += sign * np.cumsum(sums, axis=0)
+        cube['counts'][first + 1:days + 1] += sign * np.cumsum(counts, axis=0)
+        cube['days'] = days
+
+    def query(self, table, measures, by, start, end, predicates, agg):
+        """Answer a DataSource query by slicing; None when the cube cannot (other reductions)"""
+        cube = self.tables.get(table)
+        if cube is None or agg not in ('sum', 'mean') or any(m not in cube['measures'] for m in measures):
+            return None
+        time_keys = [col for col in by if col in self.periods]
+        if len(time_keys) > 1 or any(col not in self.periods and col not in cube['dims'] for col in by):
+            return None
+
+        lo = 0 if start is None else self.dates.searchsorted(pd.Timestamp(start), 'left')
+        hi = len(self.dates) if end is None else self.dates.searchsorted(pd.Timestamp(end), 'right')
+        hi = min(hi, cube['days'])
+        if time_keys:
+            # One slot per calendar period overlapping the window, clipped to the window
+            periods = self.periods[time_keys[0]][lo:hi]
+            starts = lo + np.flatnonzero(np.r_[True, periods[1:] != periods[:-1]]) if hi > lo else np.array([], int)
+            ends = np.r_[starts[1:], hi].astype(int) if len(starts) else starts
+        else:
+            starts, ends = np.array([lo]), np.array([max(hi, lo)])
+
+        index = [cube['measures'][m] for m in measures]
+        sums = cube['sums'][ends][..., index] - cube['sums'][starts][..., index]
+        counts = cube['counts'][ends] - cube['counts'][starts]
+        labels = dict(cube['categories'])
+        for axis, dim in enumerate(cube['dims'], start=1):
+            if dim in predicates:
+                codes = np.sort(labels[dim].get_indexer(predicates[dim]))
+                sums, counts = sums.take(codes, axis=axis), counts.take(codes, axis=axis)
+                labels[dim] = labels[dim][codes]
+        if time_keys:
+            labels[time_keys[0]] = self.period_starts[time_keys[0]][starts]
+
+        # Sum away every axis the query does not group by, then order the rest as `by`
+        axes = [time_keys[0] if time_keys else None] + cube['dims']
+        dropped = tuple(i for i, name in enumerate(axes) if name not in by)
+        sums, counts = sums.sum(axis=dropped), counts.sum(axis=dropped)
+        kept = [name for name in axes if name in by]
+        order = [kept.index(col) for col in by]
+        sums = sums.transpose(order + [len(order)])
+        counts = counts.transpose(order)
+
+        values = sums.reshape(-1, len(measures))
+        if agg == 'mean':
+            with np.errstate(divide='ignore', invalid='ignore'):
+                values = values / counts.reshape(-1, 1)
+        if not by:
+            return pd.DataFrame(values, columns=measures)
+
+        observed = counts.reshape(-1) > 0
+        grid = np.indices(counts.shape).reshape(len(by), -1)[:, observed]
+        result = {}
+        for col, positions in zip(by, grid):
+            if col in self.periods:
+                result[col] = labels[col][positions]
+            else:
+                result[col] = pd.Categorical(labels[col][positions], categories=cube['categories'][col])
+        result = pd.DataFrame(result)
+        result[measures] = values[observed]
+        return result
+
+
+# Daily activity flags tracked per agent, and the cumulative share of agents closing each tier by revenue rank
+AGENT_ACTIVITIES = ['sells_airtime', 'registers_sims', 'multi_service']
+TIER_CUTOFFS = np.cumsum(TIER_AGENT_SHARE)
+
+# Agent-day rows held at once while streaming agent activity into the store
+AGENT_ACTIVITY_BATCH_ROWS = 1_000_000
+
+
+def _activity_batches(path, columns):
+    """Stream columns of an agent activity file as Arrow record batches; ids and regions dictionary-encoded"""
+    if path.endswith('.parquet'):
+        import pyarrow.parquet as pq
+        parquet = pq.ParquetFile(path, read_dictionary=[c for c in ('agent_id', 'region') if c in columns])
+        yield from parquet.iter_batches(AGENT_ACTIVITY_BATCH_ROWS, columns=columns)
+    else:
+        import pyarrow.csv as pv
+        yield from pv.open_csv(path, convert_options=pv.ConvertOptions(include_columns=columns))
+
+
+def _dictionary(column):
+    """(distinct values, per-row positions in them) of a string column, without a string per row; -1 for nulls"""
+    import pyarrow as pa
+    if not pa.types.is_dictionary(column.type):
+        column = column.dictionary_encode()
+    positions = column.indices.fill_null(-1).to_numpy(zero_copy_only=False)
+    return column.dictionary.to_numpy(zero_copy_only=False), positions
+
+
+def _day_numbers(column):
+    """Days since the epoch of a date, timestamp or ISO string column"""
+    return np.asarray(column.to_numpy(zero_copy_only=False), dtype='datetime64[D]').astype('int64')
+
+
+class AgentStore:
+    """Agent-level daily activity held as compact arrays instead of a row per agent per day
+
+    Agent IDs are dictionary-encoded to array positions and regions to
+    categorical codes. Each activity flag is a bitset per day (one bit per
+    agent, packed with np.packbits) and revenue is a float32 day x agent
+    matrix in thousand XOF. Tiers are assigned per query window from
+    revenue percentile ranks: Gold the top 10%, Silver the next 20%, Bronze
+    the next 30%, Inactive the rest.
+    """
+
+    def __init__(self, agent_ids, regions, dates, flags, revenue, packed=False):
+        self.agent_ids = pd.Index(agent_ids)
+        known = {region for region in regions if isinstance(region, str)}
+        self.regions = pd.Categorical(regions, categories=REGIONS + sorted(known - set(REGIONS)))
+        self.dates = pd.DatetimeIndex(dates)
+        self.flags = {
+            flag: flags[flag] if packed else np.packbits(np.asarray(flags[flag], dtype=bool), axis=1)
+            for flag in AGENT_ACTIVITIES
+        }
+        self.revenue = np.asarray(revenue, dtype='float32')
+
+    @classmethod
+    def from_batches(cls, read, directory=None):
+        """Build the store from `read(columns)`, a fresh stream of agent-day record batches per call
+
+        A first pass over agent_id and date sizes the arrays; a second adds
+        up revenue and packs each batch's activity flags straight into the
+        bitsets. Memory follows agents x days, never the row count, and ids
+        go through the batches' dictionaries, so no string is built per row.
+        Regions come from `directory` (agent_id -> region) when given, else
+        from the activity rows.
+        """
+        ids, first, last = [], None, None
+        for batch in read(['agent_id', 'date']):
+            if not batch.num_rows:
+                continue
+            ids.append(_dictionary(batch.column('agent_id'))[0])
+            days = _day_numbers(batch.column('date'))
+            first = days.min() if first is None else min(first, days.min())
+            last = days.max() if last is None else max(last, days.max())
+        agent_ids = pd.Index(pd.unique(np.concatenate(ids)))
+        calendar = pd.date_range(pd.Timestamp(first, unit='D'), pd.Timestamp(last, unit='D'), freq='D')
+
+        revenue = np.zeros((len(calendar), len(agent_ids)), dtype='float32')
+        flags = {flag: np.zeros((len(calendar), (len(agent_ids) + 7) // 8), dtype='uint8') for flag in AGENT_ACTIVITIES}
+        if directory is not None:
+            directory = directory[~directory.index.duplicated()]
+            regions = directory.reindex(agent_ids).to_numpy(dtype=object)
+        else:
+            regions = np.full(len(agent_ids), np.nan, dtype=object)
+        columns = ['agent_id', 'date', 'revenue'] + AGENT_ACTIVITIES + (['region'] if directory is None else [])
+        for batch in read(columns):
+            if not batch.num_rows:
+                continue
+            values, indices = _dictionary(batch.column('agent_id'))
+            codes = agent_ids.get_indexer(values)[indices]
+            day = _day_numbers(batch.column('date')) - first
+            amounts = batch.column('revenue').to_numpy(zero_copy_only=False)
+            np.add.at(revenue, (day, codes), np.nan_to_num(np.asarray(amounts, dtype='float32')))
+            # Set this batch's bits on a scratch block spanning only its days, then OR it in packed
+            lo, hi = day.min(), day.max() + 1
+            block = np.zeros((hi - lo, len(agent_ids)), dtype=bool)
+            for flag in AGENT_ACTIVITIES:
+                active = np.asarray(batch.column(flag).to_numpy(zero_copy_only=False), dtype=bool)
+                block[:] = False
+                block[day[active] - lo, codes[active]] = True
+                flags[flag][lo:hi] |= np.packbits(block, axis=1)
+            if directory is None:
+                names, positions = _dictionary(batch.column('region'))
+                known = positions >= 0
+                regions[codes[known]] = names[positions[known]]
+        return cls(agent_ids, regions, calendar, flags, revenue, packed=True)
+
+    @classmethod
+    def from_frame(cls, frame):
+        """Build the store from agent-day rows: agent_id, region, date, revenue and the activity flags"""
+        import pyarrow as pa
+        table = pa.Table.from_pandas(frame, preserve_index=False)
+        return cls.from_batches(lambda columns: table.select(columns).to_batches(AGENT_ACTIVITY_BATCH_ROWS))
+
+    @classmethod
+    def from_path(cls, path):
+        """Stream agent-day rows from `agent_activity.parquet` or `agent_activity.csv`, None when absent
+
+        Each agent's region is read from `agent_directory.parquet|csv`
+        (agent_id, region) when present, instead of from every activity row.
+        """
+        activity = next(
+            (os.path.join(path, name) for name in ('agent_activity.parquet', 'agent_activity.csv')
+             if os.path.exists(os.path.join(path, name))),
+            None
+        )
+        if activity is None:
+            return None
+        directory = None
+        for name in ('agent_directory.parquet', 'agent_directory.csv'):
+            directory_path = os.path.join(path, name)
+            if os.path.exists(directory_path):
+                agents = (
+                    pd.read_parquet(directory_path, columns=['agent_id', 'region']) if name.endswith('.parquet')
+                    else pd.read_csv(directory_path, usecols=['agent_id', 'region'])
+                )
+                directory = agents.astype(str).set_index('agent_id')['region']
+                break
+        return cls.from_batches(lambda columns: _activity_batches(activity, columns), directory)
+
+    @classmethod
+    def synthetic(cls, source, seed=SYNTHETIC_SEED):
+        """Generate agents matching the agent fact table's latest headcount and regional split"""
+        rng = np.random.default_rng([seed, 1])
+        dates = pd.date_range(source.first_date, source.latest_date, freq='D')
+        regional = source.kpi_totals(['agents'], source.latest_date, source.latest_date, by=['region'])
+        counts = regional['agents'].round().astype(int).values
+        regions = np.repeat(regional['region'].astype(str).values, counts)
+        agents = len(regions)
+        flags, revenue = synthesize_agent_days(rng.lognormal(0, 0.9, agents), len(dates), rng)
+        agent_ids = [f"AG{i:06d}" for i in range(agents)]
+        return cls(agent_ids, regions, dates, flags, revenue)
+
+    def _days(self, start, end):
+        """Day positions covering the date range"""
+        lo = 0 if start is None else self.dates.searchsorted(pd.Timestamp(start), 'left')
+        hi = len(self.dates) if end is None else self.dates.searchsorted(pd.Timestamp(end), 'right')
+        return lo, max(hi, lo)
+
+    def _active_days(self, flag, lo, hi):
+        """Per-agent count of days in [lo, hi) with the flag set"""
+        bits = np.unpackbits(self.flags[flag][lo:hi], axis=1, count=len(self.agent_ids))
+        return bits.sum(axis=0, dtype='int32')
+
+    def tiers(self, revenue, mask):
+        """Tier code per agent from its revenue percentile rank among the agents in `mask`"""
+        codes = np.full(len(revenue), len(AGENT_TIERS) - 1)
+        selected = np.flatnonzero(mask)
+        order = selected[np.argsort(-revenue[selected], kind='stable')]
+        percentile = np.arange(1, len(order) + 1) / max(len(order), 1)
+        codes[order] = np.searchsorted(TIER_CUTOFFS, percentile, 'left').clip(max=len(AGENT_TIERS) - 1)
+        return codes
+
+    def _window(self, start, end, where):
+        """(agents matching `where`, tier codes, revenue, active days per flag, window length) over a window"""
+        where = where or {}
+        lo, hi = self._days(start, end)
+        mask = np.ones(len(self.agent_ids), dtype=bool)
+        if 'region' in where:
+            regions = [where['region']] if isinstance(where['region'], str) else list(where['region'])
+            # Unknown regions index as -1, the code of agents with no region: drop them, so an
+            # all-unknown filter matches nobody
+            codes = self.regions.categories.get_indexer(regions)
+            mask &= np.isin(self.regions.codes, codes[codes >= 0])
+
+        revenue = self.revenue[lo:hi].sum(axis=0, dtype='float64')
+        tiers = self.tiers(revenue, mask)
+        if 'tier' in where:
+            selected = [where['tier']] if isinstance(where['tier'], str) else list(where['tier'])
+            mask &= np.isin(tiers, [AGENT_TIERS.index(t) for t in selected if t in AGENT_TIERS])
+
+        days = {flag: self._active_days(flag, lo, hi) for flag in AGENT_ACTIVITIES}
+        return mask, tiers, revenue, days, hi - lo
+
+    def summary(self, start, end, where=None):
+        """Activity rates, revenue and productivity of the agents matching `where` over a window"""
+        mask, tiers, revenue, days, length = self._window(start, end, where)
+        # Rates are the average daily share of agents doing an activity; productivity averages all three
+        productivity = sum(days.values()) / (len(AGENT_ACTIVITIES) * max(length, 1)) * 100
+
+        agents = int(mask.sum())
+        result = {'agents': agents}
+        for flag in AGENT_ACTIVITIES:
+            result[flag] = days[flag][mask].sum() / (agents * length) * 100 if agents and length else np.nan
+        result['avg_revenue'] = revenue[mask].mean() if agents else np.nan
+        result['productivity'] = productivity[mask].mean() if agents else np.nan
+
+        by_tier = pd.DataFrame({'tier': tiers[mask], 'revenue': revenue[mask], 'productivity': productivity[mask]})
+        by_tier = by_tier.groupby('tier').agg(
+            agents=('revenue', 'size'), avg_revenue=('revenue', 'mean'), productivity_score=('productivity', 'mean')
+        ).reset_index()
+        by_tier['tier'] = [AGENT_TIERS[code] for code in by_tier['tier']]
+        result['tiers'] = by_tier
+        return result
+
+    def agents(self, start, end, where=None):
+        """One row per agent matching `where`: region, tier, revenue and days active per activity over a window"""
+        mask, tiers, revenue, days, length = self._window(start, end, where)
+        frame = pd.DataFrame({
+            'agent_id': self.agent_ids[mask],
+            'region': self.regions[mask],
+            'tier': pd.Categorical.from_codes(tiers[mask], AGENT_TIERS),
+            'revenue': revenue[mask]
+        })
+        for flag in AGENT_ACTIVITIES:
+            frame[f"{flag}_days"] = days[flag][mask]
+        frame['productivity'] = sum(days.values())[mask] / (len(AGENT_ACTIVITIES) * max(length, 1)) * 100
+        return frame
+
+
+# Raw airtime transaction logs: one row per transaction, amount in XOF, streamed in chunks of this many rows
+TRANSACTION_COLUMNS = ['timestamp', 'region', 'channel', 'amount']
+TRANSACTION_CHUNK_ROWS = 1_000_000
+WEEKDAYS = ['Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun']
+HOUR_NANOS = 3600 * 10**9
+DAY_NANOS = 24 * HOUR_NANOS
+
+
+class HourlyProfile:
+    """Airtime sales and transaction counts per day x region x channel x hour of day
+
+    Transaction logs are streamed chunk by chunk into these fixed-size
+    arrays, so memory follows the calendar, not the number of rows. Hour of
+    day and hour of week (weekday x hour) histograms for any window and
+    filter are sums over the day axis. Sales are kept in M XOF like the
+    fact tables.
+    """
+
+    def __init__(self, first_date, days=0):
+        self.first_date = pd.Timestamp(first_date).normalize()
+        self.channels = FACT_SCHEMAS['sales']['channels']
+        self.shape = (len(REGIONS), len(self.channels), 24)
+        # Day-axis buffers; only the first `days` days are in use
+        self.days = days
+        self._amounts = np.zeros((days,) + self.shape)
+        self._counts = np.zeros((days,) + self.shape)
+
+    @property
+    def amounts(self):
+        return self._amounts[:self.days]
+
+    @property
+    def counts(self):
+        return self._counts[:self.days]
+
+    @property
+    def dates(self):
+        return pd.date_range(self.first_date, periods=self.days, freq='D')
+
+    def _grow(self, days):
+        """Extend the day axis to at least `days` days, doubling capacity as needed"""
+        if days > len(self._amounts):
+            capacity = max(days, 2 * len(self._amounts))
+            for key in ('_amounts', '_counts'):
+                grown = np.zeros((capacity,) + self.shape)
+                grown[:self.days] = getattr(self, key)[:self.days]
+                setattr(self, key, grown)
+        self.days = max(self.days, days)
+
+    def add(self, chunk):
+        """Fold one chunk of transactions into the histograms; rows with unknown members or earlier days are skipped"""
+        # Day and hour straight from the nanosecond timestamps, without datetime accessors
+        nanos = pd.to_datetime(chunk['timestamp']).to_numpy().astype('int64')
+        day = (nanos - self.first_date.value) // DAY_NANOS
+        region = pd.Index(REGIONS).get_indexer(chunk['region'].astype(str))
+        channel = pd.Index(self.channels).get_indexer(chunk['channel'].astype(str))
+        keep = (day >= 0) & (region >= 0) & (channel >= 0)
+        if not keep.any():
+            return
+        day, region, channel = day[keep], region[keep], channel[keep]
+        hour = (nanos[keep] // HOUR_NANOS) % 24
+        amount = pd.to_numeric(chunk['amount'], errors='coerce').fillna(0).to_numpy()[keep] / 1e6
+
+        # Bin only the days this chunk touches, then add that block into place
+        first, last = int(day.min()), int(day.max())
+        self._grow(last + 1)
+        block = (last - first + 1,) + self.shape
+        cells = np.ravel_multi_index((day - first, region, channel, hour), block)
+        size = int(np.prod(block))
+        self.amounts[first:last + 1] += np.bincount(cells, weights=amount, minlength=size).reshape(block)
+        self.counts[first:last + 1] += np.bincount(cells, minlength=size).reshape(block)
+
+    @classmethod
+    def from_files(cls, paths, first_date, chunk_rows=TRANSACTION_CHUNK_ROWS):
+        """Stream transaction logs (Parquet or CSV) into a profile, one chunk of rows at a time"""
+        profile = cls(first_date)
+        for path in paths:
+            if path.endswith('.parquet'):
+                import pyarrow.parquet as pq
+                batches = pq.ParquetFile(path).iter_batches(batch_size=chunk_rows, columns=TRANSACTION_COLUMNS)
+                chunks = (batch.to_pandas() for batch in batches)
+            else:
+                chunks = pd.read_csv(path, usecols=TRANSACTION_COLUMNS, chunksize=chunk_rows)
+            for chunk in chunks:
+                profile.add(chunk)
+        return profile
+
+    @classmethod
+    def from_path(cls, path, first_date):
+        """Profile of every log under `<path>/transactions/`, None when there are none"""
+        folder = os.path.join(path, 'transactions')
+        if not os.path.isdir(folder):
+            return None
+        paths = [os.path.join(folder, name) for name in sorted(os.listdir(folder)) if name.endswith(('.parquet', '.csv'))]
+        return cls.from_files(paths, first_date) if paths else None
+
+    @classmethod
+    def synthetic(cls, source):
+        """Spread the daily airtime sales fact table over the hours of the day with HOURLY_PROFILE"""
+        rng = np.random.default_rng([SYNTHETIC_SEED, 2])
+        profile = cls(source.first_date, len(pd.date_range(source.first_date, source.latest_date, freq='D')))
+        sales = source.query('sales', ['airtime_sales', 'transactions'], by=['date', 'region', 'channel'])
+        day = ((sales['date'] - profile.first_date) // pd.Timedelta(days=1)).to_numpy()
+        region = pd.Index(REGIONS).get_indexer(sales['region'].astype(str))
+        channel = pd.Index(profile.channels).get_indexer(sales['channel'].astype(str))
+
+        # Weekends peak later in the day than weekdays
+        weekend = pd.DatetimeIndex(sales['date']).dayofweek.to_numpy() >= 5
+        shares = np.where(weekend[:, None], np.roll(HOURLY_PROFILE, 1), HOURLY_PROFILE)
+        shares = shares * rng.normal(1, 0.05, shares.shape)
+        shares /= shares.sum(axis=1, keepdims=True)
+        profile.amounts[day, region, channel] = sales['airtime_sales'].to_numpy()[:, None] * shares
+        profile.counts[day, region, channel] = sales['transactions'].to_numpy()[:, None] * shares
+        return profile
+
+    def _select(self, start, end, where):
+        """Days, regions and channels of the window and filters, as index arrays"""
+        dates = self.dates
+        lo = 0 if start is None else dates.searchsorted(pd.Timestamp(start), 'left')
+        hi = len(dates) if end is None else dates.searchsorted(pd.Timestamp(end), 'right')
+        axes = []
+        for dim, members in (('region', REGIONS), ('channel', self.channels)):
+            selected = (where or {}).get(dim)
+            selected = [selected] if isinstance(selected, str) else selected
+            index = pd.Index(members).get_indexer(selected) if selected else np.arange(len(members))
+            index = index[index >= 0]
+            axes.append(index if len(index) else np.arange(len(members)))
+        return np.arange(lo, max(hi, lo)), axes[0], axes[1]
+
+    def hour_of_week(self, start=None, end=None, where=None, measure='amounts'):
+        """Average sales (or transactions) per weekday x hour over the window, as a 7 x 24 frame"""
+        days, regions, channels = self._select(start, end, where)
+        values = getattr(self, measure)[np.ix_(days, regions, channels)].sum(axis=(1, 2))
+        weekday = self.dates[days].dayofweek.to_numpy()
+        totals = np.zeros((7, 24))
+        np.add.at(totals, weekday, values)
+        occurrences = np.bincount(weekday, minlength=7)[:, None]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            averages = np.where(occurrences > 0, totals / occurrences, np.nan)
+        return pd.DataFrame(averages, index=WEEKDAYS, columns=range(24))
+
+    def hour_of_day(self, start=None, end=None, where=None, measure='amounts'):
+        """Average sales (or transactions) per hour of day over the window"""
+        days, regions, channels = self._select(start, end, where)
+        values = getattr(self, measure)[np.ix_(days, regions, channels)].sum(axis=(1, 2))
+        return pd.Series(values.mean(axis=0) if len(days) else np.full(24, np.nan), index=range(24))
+
+
+# Set MTN_CUBE=0 to answer every query from the fact tables instead of the cube
+CUBE_ENABLED = os.environ.get('MTN_CUBE', '1') != '0'
+
+
+@st.cache_resource(show_spinner=False)
+def get_data_source():
+    """Process-wide data source: fact tables from MTN_DATA_DIR, otherwise sample data
+
+    Tables are memory-mapped from Arrow copies so processes share one copy
+    (MTN_DATA_MMAP=0 reads them into memory); set MTN_DATA_SCAN=1 to leave
+    Parquet tables on disk and scan them per query.
+    """
+    data_dir = os.environ.get('MTN_DATA_DIR')
+    if data_dir:
+        source = DataSource.from_path(data_dir, scan=os.environ.get('MTN_DATA_SCAN') == '1')
+    else:
+        source = DataSource.synthetic()
+    if CUBE_ENABLED:
+        source.cube = KpiCube(source)
+    # Agent-level activity comes from agent_activity.* when provided, otherwise it is generated
+    source.agent_store = (AgentStore.from_path(data_dir) if data_dir else None) or AgentStore.synthetic(source)
+    # Hourly patterns stream from transactions/*.parquet|csv when provided, otherwise they are generated
+    hourly = HourlyProfile.from_path(data_dir, source.first_date) if data_dir else None
+    source.hourly = hourly or HourlyProfile.synthetic(source)
+    return source
+
+
+def rank_regions(regional, column):
+    """Top, bottom, average and total of a per-region column in one pass over its values"""
+    values = regional[column].to_numpy(dtype='float64')
+    regions = regional['region'].to_numpy()
+    top, bottom = int(np.argmax(values)), int(np.argmin(values))
+    return {
+        'top_region': regions[top], 'top_value': values[top],
+        'bottom_region': regions[bottom], 'bottom_value': values[bottom],
+        'average': values.mean(), 'total': values.sum(), 'count': len(values)
+    }
+
+
+def drill_values(source, filters, measure, department, commune=None):
+    """Window total of one KPI per commune of a department, or per arrondissement of a commune
+
+    Returns columns area and kpi_value. The KPI cube stops at region, so these
+    are answered by scanning the department's rows at the finer grain.
+    """
+    by = ['commune', 'arrondissement'] if commune else ['commune']
+    where = {**filters.where, 'region': department}
+    totals = source.kpi_totals([measure], filters.start, filters.end, by=by, where=where)
+    if commune:
+        totals = totals[totals['commune'] == commune]
+    totals = totals.rename(columns={by[-1]: 'area', measure: 'kpi_value'})[['area', 'kpi_value']]
+    return totals.astype({'area': str}).reset_index(drop=True)
+
+
+def drill_available(source, measure, level):
+    """True when the data behind `measure` carries `level` and that level's boundary file exists"""
+    return source.has_column([measure], level) and os.path.exists(DRILL_LEVELS[level]['path'])
+
+
+# ==================== INCREMENTAL INGESTION ====================
+# New days land as `<MTN_DATA_DIR>/deltas/<table>/*.parquet|csv`; they are picked up this often.
+# Writers create each file under a temporary name (another suffix, or a leading '.' or '_')
+# and rename it into place once complete, so a file is never read half-written. Rewriting a
+# file (e.g. to correct a day) replaces the rows it brought before.
+INGEST_INTERVAL = int(os.environ.get('MTN_INGEST_INTERVAL', 900))
+
+
+def discover_partitions(data_dir, ingested, rejected=None):
+    """Complete delta partition files not yet ingested or rewritten since, by table, in file name order
+
+    `ingested` and `rejected` map a path to the modification time it was
+    read at; files that failed to load are skipped until they are rewritten.
+    """
+    rejected = rejected or {}
+    found = {}
+    for table in FACT_SCHEMAS:
+        folder = os.path.join(data_dir, 'deltas', table)
+        if not os.path.isdir(folder):
+            continue
+        paths = [
+            os.path.join(folder, name) for name in sorted(os.listdir(folder))
+            if name.endswith(('.parquet', '.csv')) and not name.startswith(('.', '_'))
+        ]
+        paths = [
+            path for path in paths
+            if os.path.getmtime(path) not in (ingested.get(path), rejected.get(path))
+        ]
+        if paths:
+            found[table] = paths
+    return found
+
+
+def read_partition(source, table, path):
+    """One delta partition file typed to its table's layout; raises when the file is malformed"""
+    frame = pd.read_parquet(path) if path.endswith('.parquet') else pd.read_csv(path)
+    layout = source.layouts[table]
+    frame = frame.assign(**{c: np.nan for c in GEO_DETAIL_COLUMNS if c in layout and c not in frame})
+    return _coerce_fact_table(table, frame, layout)
+
+
+def ingest_partitions(source, data_dir):
+    """Append every new or rewritten delta partition under `data_dir` to the data source; returns the changed tables
+
+    Each file is a partition named by its path. A file that cannot be read
+    or typed is logged and set aside, so one bad partition never holds back
+    the others or reaches a user's page; a rewritten file that fails keeps
+    the rows of its previous version.
+    """
+    found = discover_partitions(data_dir, source.ingested, source.rejected)
+    partitions, loaded = {}, {}
+    for table, paths in found.items():
+        for path in paths:
+            # Taken before reading, so a rewrite during the read is picked up next time
+            modified = os.path.getmtime(path)
+            try:
+                partitions.setdefault(table, {})[path] = read_partition(source, table, path)
+            except Exception as error:
+                source.rejected[path] = modified
+                logger.warning("Skipping delta partition %s: %s", path, error)
+                continue
+            loaded[path] = modified
+    changed = source.append(partitions)
+    source.ingested.update(loaded)
+    return changed
+
+
+@st.cache_resource(show_spinner=False)
+def get_ingestion_state():
+    """Process-wide ingestion clock, so one session checks for deltas on behalf of all"""
+    return {'checked': 0.0, 'lock': threading.Lock()}
+
+
+def ingest_new_partitions(source):
+    """Check MTN_DATA_DIR for new day partitions at most once per INGEST_INTERVAL"""
+    data_dir = os.environ.get('MTN_DATA_DIR')
+    state = get_ingestion_state()
+    if not data_dir or time.monotonic() - state['checked'] < INGEST_INTERVAL:
+        return []
+    if not state['lock'].acquire(blocking=False):
+        return []
+    try:
+        state['checked'] = time.monotonic()
+        return ingest_partitions(source, data_dir)
+    except Exception as error:
+        # Runs inside every session's rerun: a failed check leaves the data as it was until the next one
+        logger.warning("Delta ingestion failed: %s", error)
+        return []
+    finally:
+        state['lock'].release()
+
+
+# ==================== FILTER CONTEXT ====================
+DATE_RANGE_OPTIONS = ["MTD", "QTD", "YTD", "Last 7 Days", "Last 30 Days", "Last 90 Days", "Custom"]
+
+
+@dataclass(frozen=True)
+class FilterContext:
+    """Filter panel selections handed to every page loader and pushed into every query"""
+    start: pd.Timestamp
+    end: pd.Timestamp
+    region: str = None
+    channel: str = None
+    tier: str = None
+
+    @property
+    def where(self):
+        """Dimension predicates for DataSource queries; unset filters are left out"""
+        selections = (('region', self.region), ('channel', self.channel), ('tier', self.tier))
+        return {dim: member for dim, member in selections if member}
+
+
+def date_range_window(option, report_date, custom_start=None, custom_end=None):
+    """Start and end of a Date Range option anchored on the report date"""
+    end = pd.Timestamp(report_date).normalize()
+    if option == "Custom" and custom_start and custom_end:
+        return pd.Timestamp(custom_start).normalize(), pd.Timestamp(custom_end).normalize()
+    if option == "MTD":
+        return end.replace(day=1), end
+    if option == "QTD":
+        return end.to_period('Q').start_time, end
+    if option == "YTD":
+        return end.replace(month=1, day=1), end
+    days = {"Last 7 Days": 7, "Last 90 Days": 90}.get(option, 30)
+    return end - pd.Timedelta(days=days - 1), end
+
+
+def build_filter_context(source, date_option="Last 30 Days", report_date=None, custom_start=None,
+                         custom_end=None, region=None, channel=None, tier=None):
+    """Resolve the filter panel into a FilterContext clamped to the loaded date range"""
+    start, end = date_range_window(date_option, report_date or source.latest_date, custom_start, custom_end)
+    end = min(max(end, source.first_date), source.latest_date)
+    start = min(max(start, source.first_date), end)
+
+    def member(value):
+        return None if value is None or value.startswith("All ") else value
+
+    return FilterContext(start, end, member(region), member(channel), member(tier))
+
+
+# ==================== PERIOD COMPARISONS ====================
+PERIOD_COMPARISONS = ['dod', 'wow', 'mom', 'qtd', 'ytd', 'yoy']
+COMPARISON_STATS = ['value', 'budget', 'vs_budget'] + PERIOD_COMPARISONS
+
+
+def budget_measure(measure):
+    """Budget counterpart of a KPI, or None when the KPI has no budget"""
+    budget = f"budget_{measure}"
+    return budget if budget in MEASURE_TABLES or budget in DERIVED_MEASURES else None
+
+
+def comparison_windows(starts, ends):
+    """Current and reference (start, end) windows of every period comparison
+
+    DoD and WoW shift the trailing day or week back by its own length; MoM,
+    QTD and YTD compare the period to date with the same span of the previous
+    month, quarter or year; YoY shifts the reporting window back one year.
+    """
+    day, week = pd.Timedelta(days=1), pd.Timedelta(days=7)
+    month, quarter, year = pd.DateOffset(months=1), pd.DateOffset(months=3), pd.DateOffset(years=1)
+    month_start = ends.to_period('M').start_time
+    quarter_start = ends.to_period('Q').start_time
+    year_start = ends.to_period('Y').start_time
+    return {
+        'dod': ((ends, ends), (ends - day, ends - day)),
+        'wow': ((ends - week + day, ends), (ends - 2 * week + day, ends - week)),
+        'mom': ((month_start, ends), (month_start - month, ends - month)),
+        'qtd': ((quarter_start, ends), (quarter_start - quarter, ends - quarter)),
+        'ytd': ((year_start, ends), (year_start - year, ends - year)),
+        'yoy': ((starts, ends), (starts - year, ends - year))
+    }
+
+
+def _window_aggregates(daily, stored, starts, ends):
+    """Aggregate stored measures over many date windows at once from cumulative sums
+
+    Flows are summed, rates averaged over days and stocks read on the last
+    day. A window the daily frame does not fully cover aggregates to NaN.
+    """
+    calendar = pd.date_range(daily.index.min(), daily.index.max(), freq='D')
+    values = daily.reindex(calendar)[stored].to_numpy(dtype='float64')
+    present = ~np.isnan(values)
+    totals = np.vstack([np.zeros((1, len(stored))), np.cumsum(np.nan_to_num(values), axis=0)])
+    counts = np.vstack([np.zeros((1, len(stored))), np.cumsum(present, axis=0)])
+
+    lo = calendar.searchsorted(starts, 'left')
+    hi = calendar.searchsorted(ends, 'right')
+    length = ((ends - starts).days + 1).to_numpy()[:, None]
+    sums, days = totals[hi] - totals[lo], counts[hi] - counts[lo]
+    last = values[np.clip(hi - 1, 0, len(calendar) - 1)]
+
+    result = np.empty_like(sums)
+    for i, measure in enumerate(stored):
+        if measure in SNAPSHOT_MEASURES:
+            result[:, i] = last[:, i]
+        elif measure in MEAN_MEASURES:
+            with np.errstate(divide='ignore', invalid='ignore'):
+                result[:, i] = sums[:, i] / days[:, i]
+        else:
+            result[:, i] = sums[:, i]
+    result[days != length] = np.nan
+    return pd.DataFrame(result, columns=stored)
+
+
+def _percent_change(current, reference):
+    """Element-wise percentage change; NaN where the reference is zero or missing"""
+    with np.errstate(divide='ignore', invalid='ignore'):
+        change = (current - reference) / np.abs(reference) * 100
+    return np.where(np.isfinite(change), change, np.nan)
+
+
+def compare_periods(daily, measures, starts, ends):
+    """Value, budget variance and DoD/WoW/MoM/QTD/YTD/YoY change of KPIs for reporting windows
+
+    `daily` is a date-indexed frame of the stored measures behind `measures`
+    and their budgets. Every window of every comparison is aggregated in one
+    gather, then derived KPIs are computed from the window aggregates so
+    ratios stay ratios of sums. Returns one row per (start, end) window with
+    (measure, statistic) columns.
+    """
+    starts, ends = pd.DatetimeIndex(starts), pd.DatetimeIndex(ends)
+    windows = comparison_windows(starts, ends)
+    blocks = [(starts, ends)] + [w[0] for w in windows.values()] + [w[1] for w in windows.values()]
+    all_starts = pd.DatetimeIndex(np.concatenate([block[0].values for block in blocks]))
+    all_ends = pd.DatetimeIndex(np.concatenate([block[1].values for block in blocks]))
+
+    budgets = [b for b in map(budget_measure, measures) if b]
+    stored = [m for group in _resolve_measures(list(measures) + budgets).values() for m in group]
+    aggregates = _add_derived(_window_aggregates(daily, stored, all_starts, all_ends), list(measures) + budgets)
+
+    n, k = len(ends), len(PERIOD_COMPARISONS)
+    columns = {}
+    for measure in measures:
+        values = aggregates[measure].to_numpy(dtype='float64').reshape(1 + 2 * k, n)
+        budget = budget_measure(measure)
+        budget_values = aggregates[budget].to_numpy(dtype='float64')[:n] if budget else np.full(n, np.nan)
+        columns[(measure, 'value')] = values[0]
+        columns[(measure, 'budget')] = budget_values
+        columns[(measure, 'vs_budget')] = _percent_change(values[0], budget_values)
+        changes = _percent_change(values[1:1 + k], values[1 + k:])
+        for i, comparison in enumerate(PERIOD_COMPARISONS):
+            columns[(measure, comparison)] = changes[i]
+    index = pd.MultiIndex.from_arrays([starts, ends], names=['start', 'end'])
+    return pd.DataFrame(columns, index=index)
+
+
+def kpi_comparisons(source, measures, filters, days=7, where=None):
+    """Comparison engine output for the filter window and each of the last `days` days
+
+    Fetches the daily history every reference window needs in one query and
+    returns {'window': stats per measure for the filter window,
+    'daily': one row per day (indexed by date) for the daily tables}.
+    """
+    where = filters.where if where is None else where
+    day_ends = pd.date_range(end=filters.end, periods=days, freq='D')
+    starts = day_ends.append(pd.DatetimeIndex([filters.start]))
+    ends = day_ends.append(pd.DatetimeIndex([filters.end]))
+
+    budgets = [b for b in map(budget_measure, measures) if b]
+    stored = [m for group in _resolve_measures(list(measures) + budgets).values() for m in group]
+    history_start = min(starts.min(), ends.min().replace(month=1, day=1)) - pd.DateOffset(years=1)
+    daily = source.kpi_series(stored, max(history_start, source.first_date), filters.end, where=where)
+
+    result = compare_periods(daily.set_index('date'), measures, starts, ends)
+    return {'window': result.iloc[-1], 'daily': result.iloc[:-1].droplevel('start')}
+
+
+def format_change(value):
+    """Signed percentage for cards and tables, N/A when the comparison is unavailable"""
+    return "N/A" if pd.isna(value) else f"{value:+.1f}%"
+
+
+# ==================== DAILY TABLES ====================
+# Variance colour scales: a cell takes the class of the first threshold it clears, else the last class
+VARIANCE_BANDS = {
+    'overview': {'thresholds': [5, 0], 'inclusive': False, 'classes': ['band-strong', 'band-positive', 'band-negative']},
+    # CBU dashboard scale
+    'cbu': {'thresholds': [5, 2, -2], 'inclusive': True, 'classes': ['band-up', 'band-ahead', 'band-flat', 'band-down']}
+}
+
+
+def format_cells(values, template, missing):
+    """Display strings of a numeric column, `missing` where the value is NaN"""
+    values = np.asarray(values, dtype='float64')
+    text = np.frompyfunc(template.format, 1, 1)(values)
+    return np.where(np.isnan(values), missing, text).astype(object)
+
+
+def variance_classes(values, band):
+    """Colour class of every variance cell in one np.select over the band thresholds"""
+    values = np.asarray(values, dtype='float64')
+    scale = VARIANCE_BANDS[band]
+    compare = np.greater_equal if scale['inclusive'] else np.greater
+    classes = np.select([compare(values, t) for t in scale['thresholds']], scale['classes'][:-1], scale['classes'][-1])
+    return np.where(np.isnan(values), '', classes).astype(object)
+
+
+def daily_table_html(columns, band, missing='-'):
+    """HTML of a daily KPI table, built column-wise from arrays instead of a per-cell Styler
+
+    `columns` lists (header, values, template, banded): text columns pass a
+    None template; numeric columns are formatted with `template` (e.g.
+    '{:,.0f}') and, when banded, coloured by the `band` variance scale.
+    """
+    cells = []
+    for header, values, template, banded in columns:
+        if template is None:
+            text = np.asarray(values).astype(str).astype(object)
+        else:
+            text = format_cells(values, template, missing)
+        classes = variance_classes(values, band) if banded else np.full(len(text), '', dtype=object)
+        cells.append('<td class="' + classes + '">' + text + '</td>')
+    rows = '<tr>' + np.sum(cells, axis=0) + '</tr>' if cells and len(cells[0]) else []
+    head = ''.join(f'<th>{header}</th>' for header, *_ in columns)
+    return f'<table><thead><tr>{head}</tr></thead><tbody>{"".join(rows)}</tbody></table>'
+
+
+def render_daily_table(source, filters, loader, kpi, build):
+    """Render a page's daily table from the result cache, built once per KPI, filter and data version"""
+    with profile('table', f"{loader.__name__}:daily"):
+        html = page_artifact(source, filters, loader, ('daily_table', kpi), build)
+        st.markdown(f'<div class="daily-table">{html}</div>', unsafe_allow_html=True)
+
+
+# ==================== DOWNSAMPLING ====================
+# Most points a trend trace sends to the browser: about one per horizontal pixel of a trend column
+TREND_POINTS = int(os.environ.get('MTN_TREND_POINTS', 600))
+
+
+def lttb_indices(x, y, threshold=TREND_POINTS):
+    """Positions kept by Largest-Triangle-Three-Buckets downsampling
+
+    The first and last points are always kept; the points between are split
+    into `threshold - 2` buckets and each keeps the point forming the largest
+    triangle with the previously kept point and the next bucket's average.
+    Peaks and troughs survive, unlike with plain striding or averaging.
+    """
+    n = len(y)
+    if n <= threshold or threshold < 3:
+        return np.arange(n)
+    x = np.asarray(x, dtype='float64')
+    y = np.asarray(y, dtype='float64')
+
+    # Bucket bounds and every bucket's average, computed up front from cumulative sums
+    edges = np.linspace(1, n - 1, threshold - 1).astype(int)
+    cum_x, cum_y = np.r_[0, np.cumsum(x)], np.r_[0, np.cumsum(np.nan_to_num(y))]
+    counts = np.diff(edges)
+    avg_x = np.r_[(cum_x[edges[1:]] - cum_x[edges[:-1]]) / counts, x[-1]]
+    avg_y = np.r_[(cum_y[edges[1:]] - cum_y[edges[:-1]]) / counts, y[-1]]
+
+    keep = np.empty(threshold, dtype=int)
+    keep[0], keep[-1] = 0, n - 1
+    previous = 0
+    for bucket in range(threshold - 2):
+        lo, hi = edges[bucket], edges[bucket + 1]
+        next_x, next_y = avg_x[bucket + 1], avg_y[bucket + 1]
+        area = np.abs(
+            (x[previous] - next_x) * (y[lo:hi] - y[previous]) - (x[previous] - x[lo:hi]) * (next_y - y[previous])
+        )
+        previous = lo + int(np.argmax(np.nan_to_num(area, nan=-1.0)))
+        keep[bucket + 1] = previous
+    return keep
+
+
+def downsample_series(x, y, threshold=TREND_POINTS):
+    """(x, y) of a trend trace reduced to at most `threshold` points with LTTB"""
+    x, y = pd.Index(x), np.asarray(y)
+    positions = x.asi8 if isinstance(x, pd.DatetimeIndex) else x.values
+    keep = lttb_indices(positions, y, threshold)
+    return x[keep], y[keep]
+
+
+def zoom_window(dates, key, threshold=TREND_POINTS):
+    """Date range a trend chart plots: all of it, or the range picked on a zoom slider for long series
+
+    The slider only appears when the series has more points than a trace
+    sends; narrowing it re-downsamples the smaller range, so detail returns
+    as the user zooms in.
+    """
+    dates = pd.DatetimeIndex(dates)
+    if len(dates) <= threshold:
+        return dates[0], dates[-1]
+    step = (dates[1:] - dates[:-1]).min()
+    start, end = st.slider(
+        "Zoom", min_value=dates[0].to_pydatetime(), max_value=dates[-1].to_pydatetime(),
+        value=(dates[0].to_pydatetime(), dates[-1].to_pydatetime()), step=step.to_pytimedelta(), key=key
+    )
+    return pd.Timestamp(start), pd.Timestamp(end)
+
+
+def zoomed(x, y, window, threshold=TREND_POINTS):
+    """Downsampled (x, y) of the part of a trend inside the zoom window"""
+    x = pd.DatetimeIndex(x)
+    inside = (x >= window[0]) & (x <= window[1])
+    return downsample_series(x[inside], np.asarray(y)[inside], threshold)
+
+
+# ==================== TOPOJSON DECODER ====================
+def decode_topojson_arcs(topology):
+    """Decode every TopoJSON arc in one vectorized pass
+
+    Quantized topologies store each arc as integer deltas; a single cumulative
+    sum over the concatenated arcs, rebased at each arc start, recovers the
+    absolute positions, then the transform maps them to lon/lat. Returns
+    (coords, keys, offsets): float lon/lat points, integer vertex keys that are
+    exact across shared arc endpoints, and the start offset of every arc.
+    """
+    arcs = topology['arcs']
+    lengths = np.fromiter((len(arc) for arc in arcs), dtype=np.int64, count=len(arcs))
+    offsets = np.concatenate([[0], np.cumsum(lengths)])
+    points = np.array([point[:2] for arc in arcs for point in arc], dtype=np.float64).reshape(-1, 2)
+
+    transform = topology.get('transform')
+    if not transform:
+        return points, points, offsets
+
+    running = np.cumsum(points, axis=0)
+    arc_base = running[offsets[:-1]] - points[offsets[:-1]]
+    quantized = running - np.repeat(arc_base, lengths, axis=0)
+    coords = quantized * np.asarray(transform['scale']) + np.asarray(transform['translate'])
+    return coords, quantized, offsets
+
+
+def _douglas_peucker_mask(points, tolerance):
+    """Boolean mask of the vertices Douglas-Peucker keeps for one arc"""
+    n = len(points)
+    keep = np.zeros(n, dtype=bool)
+    keep[0] = keep[-1] = True
+    if n < 3:
+        return keep
+
+    stack = [(0, n - 1)]
+    if np.array_equal(points[0], points[-1]):
+        # A closed arc has no chord; split it at the vertex farthest from its start
+        far = int(np.argmax(np.hypot(*(points - points[0]).T)))
+        keep[far] = True
+        stack = [(0, far), (far, n - 1)]
+
+    while stack:
+        first, last = stack.pop()
+        if last - first < 2:
+            continue
+        segment = points[first + 1:last]
+        start, end = points[first], points[last]
+        dx, dy = end - start
+        norm = np.hypot(dx, dy)
+        if norm == 0:
+            distances = np.hypot(*(segment - start).T)
+        else:
+            distances = np.abs(dx * (segment[:, 1] - start[1]) - dy * (segment[:, 0] - start[0])) / norm
+        index = int(np.argmax(distances))
+        if distances[index] > tolerance:
+            split = first + 1 + index
+            keep[split] = True
+            stack.append((first, split))
+            stack.append((split, last))
+    return keep
+
+
+def simplify_arcs(coords, keys, offsets, tolerance):
+    """Simplify every arc once, so borders shared by two areas stay identical"""
+    if not tolerance:
+        return coords, keys, offsets
+    keep = np.concatenate([
+        _douglas_peucker_mask(coords[offsets[i]:offsets[i + 1]], tolerance)
+        for i in range(len(offsets) - 1)
+    ])
+    counts = np.add.reduceat(keep, offsets[:-1])
+    return coords[keep], keys[keep], np.concatenate([[0], np.cumsum(counts)])
+
+
+def _ring_indices(refs, offsets):
+    """Point indices of a ring built from signed arc references (~i walks arc i backwards)"""
+    parts = []
+    for position, ref in enumerate(refs):
+        arc = ref if ref >= 0 else ~ref
+        indices = np.arange(offsets[arc], offsets[arc + 1])
+        if ref < 0:
+            indices = indices[::-1]
+        parts.append(indices if position == 0 else indices[1:])
+    return np.concatenate(parts)
+
+
+def _signed_area(ring):
+    """Shoelace area; positive for counter-clockwise rings"""
+    x, y = ring[:, 0], ring[:, 1]
+    return 0.5 * np.sum(x[:-1] * y[1:] - x[1:] * y[:-1])
+
+
+def _point_in_ring(point, ring):
+    """Even-odd ray casting test of one point against one ring"""
+    x, y = point
+    x0, y0, x1, y1 = ring[:-1, 0], ring[:-1, 1], ring[1:, 0], ring[1:, 1]
+    crosses = (y0 > y) != (y1 > y)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        x_cross = x0 + (y - y0) * (x1 - x0) / (y1 - y0)
+    return bool(np.count_nonzero(crosses & (x < x_cross)) % 2)
+
+
+def _stitch_rings(refs, keys, offsets):
+    """Chain boundary arcs end to start into closed rings of signed arc references"""
+    def endpoints(ref):
+        arc = ref if ref >= 0 else ~ref
+        first, last = tuple(keys[offsets[arc]]), tuple(keys[offsets[arc + 1] - 1])
+        return (first, last) if ref >= 0 else (last, first)
+
+    by_start = {}
+    for ref in refs:
+        by_start.setdefault(endpoints(ref)[0], []).append(ref)
+
+    rings = []
+    for ref in refs:
+        start = endpoints(ref)[0]
+        if ref not in by_start.get(start, []):
+            continue
+        ring = []
+        while True:
+            by_start[start].remove(ref)
+            ring.append(ref)
+            start = endpoints(ref)[1]
+            if not by_start.get(start):
+                break
+            ref = by_start[start][0]
+        rings.append(ring)
+    return rings
+
+
+def _merge_polygons(geometries, keys, offsets):
+    """Dissolve polygons by dropping the arcs they share (each used once per side)"""
+    refs = []
+    for geometry in geometries:
+        polygons = [geometry['arcs']] if geometry['type'] == 'Polygon' else geometry['arcs']
+        refs.extend(ref for polygon in polygons for ring in polygon for ref in ring)
+    counts = {}
+    for ref in refs:
+        arc = ref if ref >= 0 else ~ref
+        counts[arc] = counts.get(arc, 0) + 1
+    boundary = [ref for ref in refs if counts[ref if ref >= 0 else ~ref] == 1]
+    return _stitch_rings(boundary, keys, offsets)
+
+
+def _assemble_polygons(rings):
+    """Group rings into GeoJSON polygons: exterior clockwise, holes inside their exterior"""
+    rings = [ring for ring in rings if len(ring) >= 4 and _signed_area(ring) != 0]
+    if not rings:
+        return None
+    areas = np.array([_signed_area(ring) for ring in rings])
+    exterior_sign = np.sign(areas[np.argmax(np.abs(areas))])
+    exteriors = [i for i, area in enumerate(areas) if np.sign(area) == exterior_sign]
+    polygons = {i: [rings[i] if areas[i] < 0 else rings[i][::-1]] for i in exteriors}
+    for i, area in enumerate(areas):
+        if i in polygons:
+            continue
+        owner = next((j for j in exteriors if _point_in_ring(rings[i][0], rings[j])), None)
+        if owner is not None:
+            polygons[owner].append(rings[i] if area > 0 else rings[i][::-1])
+    coordinates = [[ring.tolist() for ring in polygon] for polygon in polygons.values()]
+    if len(coordinates) == 1:
+        return {'type': 'Polygon', 'coordinates': coordinates[0]}
+    return {'type': 'MultiPolygon', 'coordinates': coordinates}
+
+
+def topojson_to_geojson(topology, decoded=None, group_by=None, id_property=None, tolerance=0.0):
+    """Convert the polygons of a TopoJSON topology into a GeoJSON FeatureCollection
+
+    `group_by(properties)` dissolves features sharing a key into one feature
+    (stored under `id_property`); otherwise each geometry becomes a feature
+    whose id is its `id_property`. `tolerance` simplifies arcs (in degrees).
+    """
+    coords, keys, offsets = decoded or decode_topojson_arcs(topology)
+    coords, keys, offsets = simplify_arcs(coords, keys, offsets, tolerance)
+    geometries = [
+        geometry
+        for layer in topology['objects'].values()
+        for geometry in (layer['geometries'] if layer['type'] == 'GeometryCollection' else [layer])
+        if geometry.get('type') in ('Polygon', 'MultiPolygon')
+    ]
+
+    if group_by is None:
+        groups = {i: [geometry] for i, geometry in enumerate(geometries)}
+    else:
+        groups = {}
+        for geometry in geometries:
+            groups.setdefault(group_by(geometry.get('properties', {})), []).append(geometry)
+
+    features = []
+    for group, members in groups.items():
+        if group_by is None:
+            polygons = [members[0]['arcs']] if members[0]['type'] == 'Polygon' else members[0]['arcs']
+            ring_refs = [ring for polygon in polygons for ring in polygon]
+            properties = dict(members[0].get('properties', {}))
+        else:
+            ring_refs = _merge_polygons(members, keys, offsets)
+            properties = {id_property: group}
+        geometry = _assemble_polygons([coords[_ring_indices(refs, offsets)] for refs in ring_refs])
+        if geometry is None:
+            continue
+        feature = {'type': 'Feature', 'properties': properties, 'geometry': geometry}
+        if id_property and id_property in properties:
+            feature['id'] = properties[id_property]
+        features.append(feature)
+    return {'type': 'FeatureCollection', 'features': features}
+
+
+# ==================== GEOMETRY SERVICE ====================
+GEOJSON_PATH = 'gadm41_BEN_1.json'
+
+# Candidate columns holding the area name, across GADM and geoBoundaries releases
+NAME_COLUMNS = ['NAME_1', 'ADM1_NAME', 'name', 'Name', 'ADM1_EN']
+
+# Department-level files spell Ouémé without accents
+DEPARTMENT_ALIASES = {'Oueme': 'Ouémé'}
+
+# The boundary file ships the 77 communes; they are dissolved into the 12 departments
+COMMUNE_DEPARTMENTS = {
+    **dict.fromkeys(['Banikoara', 'Gogounou', 'Kandi', 'Karimama', 'Malanville', 'Segbana'], 'Alibori'),
+    **dict.fromkeys(['Boukombe', 'Kobli', 'Kerou', 'Kouande', 'Materi', 'Natitingou', 'Pehunco',
+                     'Tanguieta', 'Toucountouna'], 'Atacora'),
+    **dict.fromkeys(['Abomey-Calavi', 'Allada', 'Kpomasse', 'Ouidah', 'So-Ava', 'Toffo', 'Tori-Bossito',
+                     'Ze'], 'Atlantique'),
+    **dict.fromkeys(['Bembereke', 'Kalale', "N'dali", 'Nikki', 'Parakou', 'Perere', 'Sinende',
+                     'Tchaourou'], 'Borgou'),
+    **dict.fromkeys(['Bante', 'Dassa-Zoume', 'Glazoue', 'Ouesse', 'Savalou', 'Save'], 'Collines'),
+    **dict.fromkeys(['Aplahoue', 'Djakotomey', 'Dogbo', 'Klouekanme', 'Lalo', 'Toviklin'], 'Couffo'),
+    **dict.fromkeys(['Bassila', 'Copargo', 'Djougou', 'Ouake'], 'Donga'),
+    **dict.fromkeys(['Cotonou'], 'Littoral'),
+    **dict.fromkeys(['Athieme', 'Bopa', 'Come', 'Grand-Popo', 'Houeyogbe', 'Lokossa'], 'Mono'),
+    **dict.fromkeys(['Adjarra', 'Adjohoun', 'Aguegues', 'Akpo-Misserete', 'Avrankou', 'Bonou', 'Dangbo',
+                     'Porto-Novo', 'Seme-Kpodji'], 'Ouémé'),
+    **dict.fromkeys(['Adja-Ouere', 'Ifangni', 'Ketou', 'Pobe', 'Sakete'], 'Plateau'),
+    **dict.fromkeys(['Abomey', 'Agbangnizoun', 'Bohicon', 'Cove', 'Djidja', 'Ouinhi', 'Zagnanado',
+                     'Za-Kpota', 'Zogbodomey'], 'Zou'),
+    **DEPARTMENT_ALIASES
+}
+
+# Simplification tolerance (degrees) per map size; larger maps keep more detail
+SIMPLIFY_TOLERANCES = {
+    'detail': 0.002,
+    'medium': 0.005,
+    'coarse': 0.01
+}
+
+# Levels a department map drills into: boundary file, candidate name and parent-name columns,
+# and a finer simplification tolerance since a drilled map spans a single department or commune.
+# Areas without a parent column (the geoBoundaries communes) are placed with COMMUNE_DEPARTMENTS.
+DRILL_LEVELS = {
+    'commune': {
+        'path': GEOJSON_PATH,
+        'names': ['NAME_2', 'ADM2_NAME', 'ADM2_EN', 'shapeName', 'Name', 'name'],
+        'parents': ['NAME_1', 'ADM1_NAME', 'ADM1_EN'],
+        'tolerance': 0.001
+    },
+    'arrondissement': {
+        'path': os.environ.get('MTN_ADM3_PATH', 'gadm41_BEN_3.json'),
+        'names': ['NAME_3', 'ADM3_NAME', 'ADM3_EN', 'shapeName'],
+        'parents': ['NAME_2', 'ADM2_NAME', 'ADM2_EN'],
+        'tolerance': 0.0005
+    }
+}
+
+
+def find_name_column(columns, candidates=NAME_COLUMNS):
+    """Return the first known area-name column present in a boundary table"""
+    for col in candidates:
+        if col in columns:
+            return col
+    raise KeyError(f"No area name column found among {list(columns)}")
+
+
+def _orient_clockwise(geometry):
+    """Wind exterior rings clockwise, the orientation d3-geo (and so Plotly) expects"""
+    from shapely.geometry import MultiPolygon
+    from shapely.geometry.polygon import orient
+    if geometry.geom_type == 'MultiPolygon':
+        return MultiPolygon([orient(part, sign=-1.0) for part in geometry.geoms])
+    return orient(geometry, sign=-1.0)
+
+
+def _department_of(name):
+    """Department of a commune name, or the (normalised) name itself for department files"""
+    return COMMUNE_DEPARTMENTS.get(name, name)
+
+
+def _read_boundaries_geopandas(path):
+    """Department GeoJSON per zoom level for boundary formats other than TopoJSON"""
+    import geopandas as gpd
+    areas = gpd.read_file(path)
+    areas['department'] = areas[find_name_column(areas.columns)].map(_department_of)
+    # Some source rings self-touch; repair them so the dissolve does not raise
+    areas['geometry'] = areas.geometry.make_valid()
+    departments = areas[['department', 'geometry']].dissolve(by='department').reset_index()
+
+    levels = {}
+    for level, tolerance in SIMPLIFY_TOLERANCES.items():
+        simplified = departments.copy()
+        if tolerance:
+            simplified['geometry'] = simplified.geometry.simplify(tolerance, preserve_topology=True)
+        simplified['geometry'] = simplified.geometry.map(_orient_clockwise)
+        geojson = json.loads(simplified.to_json(drop_id=True))
+        for feature in geojson['features']:
+            feature['id'] = feature['properties']['department']
+        levels[level] = geojson
+    return levels
+
+
+@st.cache_resource(show_spinner=False)
+def load_boundaries(path):
+    """Parse a boundary file once per process; TopoJSON also gets its arcs decoded
+
+    Returns (topology, decoded arcs) for TopoJSON and (None, None) for other
+    formats, which are read through geopandas instead.
+    """
+    with open(path) as f:
+        boundaries = json.load(f)
+    if boundaries.get('type') != 'Topology':
+        return None, None
+    return boundaries, decode_topojson_arcs(boundaries)
+
+
+@st.cache_resource(show_spinner=False)
+def get_benin_geometry():
+    """Decode the Benin boundaries once per process into Plotly-ready department GeoJSON
+
+    Returns a dict of zoom level -> GeoJSON FeatureCollection whose feature ids are
+    department names, pre-simplified with the tolerance of that level. TopoJSON is
+    decoded natively; geopandas is only needed for other boundary formats.
+    """
+    if not os.path.exists(GEOJSON_PATH):
+        raise FileNotFoundError(f"{GEOJSON_PATH} not found")
+
+    boundaries, decoded = load_boundaries(GEOJSON_PATH)
+    if boundaries is None:
+        return _read_boundaries_geopandas(GEOJSON_PATH)
+
+    layer = next(iter(boundaries['objects'].values()))
+    name_column = find_name_column(layer['geometries'][0].get('properties', {}))
+    return {
+        level: topojson_to_geojson(
+            boundaries, decoded,
+            group_by=lambda properties: _department_of(properties[name_column]),
+            id_property='department',
+            tolerance=tolerance
+        )
+        for level, tolerance in SIMPLIFY_TOLERANCES.items()
+    }
+
+
+def _drill_parent(level, spec, properties, name_column):
+    """Parent area of a drill-level feature: its parent column, else the commune's department"""
+    parent_column = next((col for col in spec['parents'] if col in properties), None)
+    if parent_column is not None:
+        parent = properties[parent_column]
+        return DEPARTMENT_ALIASES.get(parent, parent) if level == 'commune' else parent
+    return COMMUNE_DEPARTMENTS.get(properties[name_column]) if level == 'commune' else None
+
+
+def _read_drill_geopandas(level, spec):
+    """Drill-level GeoJSON split by parent area, for boundary formats other than TopoJSON"""
+    import geopandas as gpd
+    areas = gpd.read_file(spec['path'])
+    name_column = find_name_column(areas.columns, spec['names'])
+    records = areas.drop(columns='geometry').to_dict('records')
+    areas['parent'] = [_drill_parent(level, spec, properties, name_column) for properties in records]
+    areas['area'] = areas[name_column]
+    areas['geometry'] = areas.geometry.make_valid()
+    areas = areas.dropna(subset=['parent'])[['parent', 'area', 'geometry']].dissolve(by=['parent', 'area']).reset_index()
+    if spec['tolerance']:
+        areas['geometry'] = areas.geometry.simplify(spec['tolerance'], preserve_topology=True)
+    areas['geometry'] = areas.geometry.map(_orient_clockwise)
+
+    parents = {}
+    for parent, group in areas.groupby('parent'):
+        geojson = json.loads(group[['area', 'geometry']].to_json(drop_id=True))
+        for feature in geojson['features']:
+            feature['id'] = feature['properties']['area']
+        parents[parent] = geojson
+    return parents
+
+
+@st.cache_resource(show_spinner=False)
+def get_drill_geometry(level):
+    """Decode one drill-down level into Plotly-ready GeoJSON per parent area, on first use
+
+    Returns parent name -> FeatureCollection whose feature ids are area names
+    (the communes of each department, or the arrondissements of each commune),
+    simplified with the level's own tolerance, or None when the level's
+    boundary file is missing or has no usable name column. Nothing is decoded
+    until a map is first drilled into that level.
+    """
+    spec = DRILL_LEVELS[level]
+    if not os.path.exists(spec['path']):
+        return None
+    boundaries, decoded = load_boundaries(spec['path'])
+    try:
+        if boundaries is None:
+            return _read_drill_geopandas(level, spec)
+        layer = next(iter(boundaries['objects'].values()))
+        properties = layer['geometries'][0].get('properties', {})
+        name_column = find_name_column(properties, spec['names'])
+    except KeyError:
+        return None
+
+    # Areas are keyed by (parent, name) so same-named areas of different parents stay apart
+    geojson = topojson_to_geojson(
+        boundaries, decoded,
+        group_by=lambda properties: (_drill_parent(level, spec, properties, name_column), properties[name_column]),
+        id_property='area',
+        tolerance=spec['tolerance']
+    )
+    parents = {}
+    for feature in geojson['features']:
+        parent, area = feature['properties']['area']
+        if parent is None:
+            continue
+        feature['id'], feature['properties'] = area, {'area': area}
+        parents.setdefault(parent, {'type': 'FeatureCollection', 'features': []})['features'].append(feature)
+    return parents
+
+
+def build_area_choropleth(map_df, geojson, location, label, hover_format):
+    """Choropleth of `map_df` (columns `location`, kpi_value) on GeoJSON whose feature ids are area names"""
+    import plotly.express as px
+    return px.choropleth(
+        map_df,
+        geojson=geojson,
+        locations=location,
+        color='kpi_value',
+        hover_name=location,
+        hover_data={'kpi_value': hover_format, location: False},
+        color_continuous_scale='YlOrRd',
+        labels={'kpi_value': label}
+    )
+
+
+def build_region_choropleth(map_df, label, hover_format, zoom='detail'):
+    """Department choropleth of `map_df` (columns region, kpi_value) on the cached geometry"""
+    return build_area_choropleth(
+        map_df.rename(columns={'region': 'department'}), get_benin_geometry()[zoom], 'department', label, hover_format
+    )
+
+
+# ==================== AGENT LOCATIONS ====================
+# Kilometres per degree of latitude (and of longitude at the equator)
+KM_PER_DEGREE = 111.32
+
+# Grid cell sizes (degrees) of the polygon and agent point indexes
+POLYGON_GRID_CELL = 0.02
+POINT_GRID_CELL = 0.05
+
+# Square rings of cells searched around a query before falling back to the occupied cells
+NEAREST_RINGS = 3
+
+# Coverage-gap maps sample the land every COVERAGE_SPACING degrees (about 5.5 km); farther than
+# COVERAGE_GAP_KM from the nearest agent counts as a gap
+COVERAGE_SPACING = 0.05
+COVERAGE_GAP_KM = 10
+
+
+def _ring_area_km2(ring):
+    """Area of a lon/lat ring in km², projected equirectangularly at its mean latitude"""
+    x = ring[:, 0] * KM_PER_DEGREE * np.cos(np.radians(ring[:, 1].mean()))
+    y = ring[:, 1] * KM_PER_DEGREE
+    return abs(np.dot(x[:-1], y[1:]) - np.dot(x[1:], y[:-1])) / 2
+
+
+def _haversine_km(lon1, lat1, lon2, lat2):
+    """Great-circle distance in km between lon/lat arrays"""
+    lon1, lat1, lon2, lat2 = map(np.radians, (lon1, lat1, lon2, lat2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * 6371.0 * np.arcsin(np.sqrt(a))
+
+
+def _gather(starts, counts):
+    """Concatenated ranges [start, start + count) as one index array, with the range each came from"""
+    owner = np.repeat(np.arange(len(counts)), counts)
+    offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    return np.repeat(starts, counts) + offsets, owner
+
+
+def _grid_shape(bounds, cell):
+    """Rows and columns of a grid of `cell`-degree cells covering (lon0, lat0, lon1, lat1) bounds"""
+    return int((bounds[3] - bounds[1]) // cell) + 1, int((bounds[2] - bounds[0]) // cell) + 1
+
+
+def _grid_cells(lon, lat, bounds, cell, shape):
+    """Row and column of the grid cell holding each point, clipped to the grid"""
+    row = ((lat - bounds[1]) // cell).astype(int).clip(0, shape[0] - 1)
+    col = ((lon - bounds[0]) // cell).astype(int).clip(0, shape[1] - 1)
+    return row, col
+
+
+class PolygonGrid:
+    """Uniform grid over polygon features for vectorized point-in-polygon lookups
+
+    Each cell records the feature that wholly contains it, that it lies
+    outside every feature, or (when a boundary crosses it) the features
+    whose bounding box overlaps it. Points in whole cells resolve with one
+    array lookup; only points in boundary cells are ray-cast, and only
+    against those candidate polygons.
+    """
+
+    def __init__(self, features, cell=POLYGON_GRID_CELL):
+        edges, areas = [], np.zeros(len(features))
+        for i, feature in enumerate(features):
+            geometry = feature['geometry']
+            polygons = [geometry['coordinates']] if geometry['type'] == 'Polygon' else geometry['coordinates']
+            for polygon in polygons:
+                for j, ring in enumerate(polygon):
+                    ring = np.asarray(ring, dtype='float64')
+                    edges.append(np.column_stack([ring[:-1], ring[1:], np.full(len(ring) - 1, i)]))
+                    # Holes are the later rings of a polygon
+                    areas[i] += _ring_area_km2(ring) * (1 if j == 0 else -1)
+        edges = np.concatenate(edges)
+        self.edges = edges[:, :4]
+        self.edge_offsets = np.searchsorted(edges[:, 4], np.arange(len(features) + 1))
+        self.areas = areas
+        lons, lats = self.edges[:, [0, 2]], self.edges[:, [1, 3]]
+        self.bboxes = np.array([
+            [lons[lo:hi].min(), lats[lo:hi].min(), lons[lo:hi].max(), lats[lo:hi].max()]
+            for lo, hi in zip(self.edge_offsets[:-1], self.edge_offsets[1:])
+        ])
+        self.cell = cell
+        self.bounds = (self.bboxes[:, 0].min(), self.bboxes[:, 1].min(), self.bboxes[:, 2].max(), self.bboxes[:, 3].max())
+        self.shape = _grid_shape(self.bounds, cell)
+
+        # Cells under the bounding box of any edge are boundary cells; the rest lie wholly in one feature or none
+        boundary = np.zeros(self.shape[0] * self.shape[1], dtype=bool)
+        cells, _ = self._box_cells(lons.min(axis=1), lats.min(axis=1), lons.max(axis=1), lats.max(axis=1))
+        boundary[cells] = True
+        self.owner = np.where(boundary, -2, -1)
+        interior = np.flatnonzero(~boundary)
+        centres_lon = self.bounds[0] + (interior % self.shape[1] + 0.5) * cell
+        centres_lat = self.bounds[1] + (interior // self.shape[1] + 0.5) * cell
+        points, candidates = self._bbox_candidates(centres_lon, centres_lat)
+        self.owner[interior] = self._ray_cast(centres_lon, centres_lat, points, candidates)
+
+        # Boundary cells keep the features whose bounding box overlaps them, as CSR arrays
+        cells, features = self._box_cells(*self.bboxes.T)
+        keep = boundary[cells]
+        cells, features = cells[keep], features[keep]
+        order = np.argsort(cells, kind='stable')
+        self.candidate_features = features[order]
+        self.candidate_offsets = np.searchsorted(cells[order], np.arange(boundary.size + 1))
+
+    def _box_cells(self, x0, y0, x1, y1):
+        """Flat indexes of the cells under each bounding box, with the box each came from"""
+        r0, c0 = _grid_cells(x0, y0, self.bounds, self.cell, self.shape)
+        r1, c1 = _grid_cells(x1, y1, self.bounds, self.cell, self.shape)
+        widths = c1 - c0 + 1
+        offsets, box = _gather(np.zeros(len(widths), dtype=int), (r1 - r0 + 1) * widths)
+        return (r0[box] + offsets // widths[box]) * self.shape[1] + c0[box] + offsets % widths[box], box
+
+    def _bbox_candidates(self, lon, lat):
+        """(point, feature) pairs where the point lies inside the feature's bounding box"""
+        x0, y0, x1, y1 = self.bboxes.T
+        inside = (lon[:, None] >= x0) & (lon[:, None] <= x1) & (lat[:, None] >= y0) & (lat[:, None] <= y1)
+        return np.nonzero(inside)
+
+    def _ray_cast(self, lon, lat, points, features):
+        """Feature containing each point among its candidate (point, feature) pairs, -1 for none"""
+        result = np.full(len(lon), -1)
+        for feature in np.unique(features):
+            selected = points[features == feature]
+            x0, y0, x1, y1 = self.edges[self.edge_offsets[feature]:self.edge_offsets[feature + 1]].T
+            # Even-odd rule over every ring of the feature, so holes fall outside; chunked to bound memory
+            step = max(1, 2_000_000 // len(x0))
+            for start in range(0, len(selected), step):
+                chunk = selected[start:start + step]
+                x, y = lon[chunk, None], lat[chunk, None]
+                straddles = (y0 > y) != (y1 > y)
+                with np.errstate(divide='ignore', invalid='ignore'):
+                    crossing = x < x0 + (y - y0) * (x1 - x0) / (y1 - y0)
+                inside = np.count_nonzero(straddles & crossing, axis=1) % 2 == 1
+                result[chunk[inside]] = feature
+        return result
+
+    def locate(self, lon, lat):
+        """Index of the feature containing each point, -1 outside every feature (or for NaN points)"""
+        lon, lat = np.asarray(lon, dtype='float64'), np.asarray(lat, dtype='float64')
+        x0, y0, x1, y1 = self.bounds
+        valid = np.isfinite(lon) & np.isfinite(lat) & (lon >= x0) & (lon <= x1) & (lat >= y0) & (lat <= y1)
+        result = np.full(len(lon), -1)
+        row, col = _grid_cells(lon[valid], lat[valid], self.bounds, self.cell, self.shape)
+        result[valid] = self.owner[row * self.shape[1] + col]
+
+        pending = np.flatnonzero(result == -2)
+        row, col = _grid_cells(lon[pending], lat[pending], self.bounds, self.cell, self.shape)
+        cells = row * self.shape[1] + col
+        starts = self.candidate_offsets[cells]
+        candidates, owner = _gather(starts, self.candidate_offsets[cells + 1] - starts)
+        result[pending] = self._ray_cast(lon[pending], lat[pending], owner, self.candidate_features[candidates])
+        return result
+
+
+class PointGrid:
+    """Points bucketed by grid cell for nearest-neighbour distance queries
+
+    Cells are first searched in square rings around each query, which
+    settles queries with points close by. Queries still open after
+    NEAREST_RINGS rings are compared with the occupied cells' centres and
+    searched only in the cells that can still hold a closer point.
+    """
+
+    def __init__(self, lon, lat, bounds, cell=POINT_GRID_CELL):
+        self.lon, self.lat = np.asarray(lon, dtype='float64'), np.asarray(lat, dtype='float64')
+        self.bounds, self.cell = bounds, cell
+        self.shape = _grid_shape(bounds, cell)
+        row, col = _grid_cells(self.lon, self.lat, bounds, cell, self.shape)
+        cells = row * self.shape[1] + col
+        self.order = np.argsort(cells, kind='stable')
+        self.offsets = np.searchsorted(cells[self.order], np.arange(self.shape[0] * self.shape[1] + 1))
+        self.occupied = np.flatnonzero(np.diff(self.offsets))
+        # Shortest side of a cell in km, so `ring` cells away is at least this many km times `ring`
+        self.cell_km = cell * KM_PER_DEGREE * np.cos(np.radians(max(abs(bounds[1]), abs(bounds[3]))))
+
+    def _search(self, best, queries, cells, lon, lat):
+        """Lower `best` of each query with the points of the paired cell"""
+        starts = self.offsets[cells]
+        positions, owner = _gather(starts, self.offsets[cells + 1] - starts)
+        points, queries = self.order[positions], queries[owner]
+        distance = _haversine_km(lon[queries], lat[queries], self.lon[points], self.lat[points])
+        np.minimum.at(best, queries, distance)
+
+    def nearest(self, lon, lat):
+        """Distance in km from each query point to the nearest indexed point (inf when there are none)"""
+        lon, lat = np.asarray(lon, dtype='float64'), np.asarray(lat, dtype='float64')
+        best = np.full(len(lon), np.inf)
+        if not len(self.occupied):
+            return best
+        rows, cols = _grid_cells(lon, lat, self.bounds, self.cell, self.shape)
+        pending = np.arange(len(lon))
+        for ring in range(NEAREST_RINGS):
+            # Only the cells on the ring's perimeter are new; all of them are searched in one pass
+            side = np.arange(-ring, ring + 1)
+            edge = np.full(max(len(side) - 2, 0), ring)
+            if ring:
+                dy = np.concatenate([np.full(len(side), -ring), np.full(len(side), ring), side[1:-1], side[1:-1]])
+                dx = np.concatenate([side, side, -edge, edge])
+            else:
+                dy = dx = side
+            r, c = rows[pending, None] + dy, cols[pending, None] + dx
+            inside = (r >= 0) & (r < self.shape[0]) & (c >= 0) & (c < self.shape[1])
+            queries = np.broadcast_to(pending[:, None], r.shape)[inside]
+            self._search(best, queries, r[inside] * self.shape[1] + c[inside], lon, lat)
+            pending = pending[best[pending] > ring * self.cell_km]
+            if not len(pending):
+                return best
+
+        # A point lies within half a cell diagonal of its cell's centre, so no cell whose centre is
+        # farther than the nearest occupied centre plus a full diagonal can hold a closer point
+        centre_lon = self.bounds[0] + (self.occupied % self.shape[1] + 0.5) * self.cell
+        centre_lat = self.bounds[1] + (self.occupied // self.shape[1] + 0.5) * self.cell
+        diagonal = self.cell * KM_PER_DEGREE * 1.5
+        step = max(1, 2_000_000 // len(self.occupied))
+        for start in range(0, len(pending), step):
+            chunk = pending[start:start + step]
+            centres = _haversine_km(lon[chunk, None], lat[chunk, None], centre_lon, centre_lat)
+            reach = np.minimum(centres.min(axis=1), best[chunk]) + diagonal
+            queries, cells = np.nonzero(centres <= reach[:, None])
+            self._search(best, chunk[queries], self.occupied[cells], lon, lat)
+        return best
+
+
+class AgentLocations:
+    """Agent GPS points, assigned once to their commune and department and indexed for distance queries
+
+    Point-in-polygon assignment runs when the index is built, so density
+    and coverage queries on each render are array lookups.
+    """
+
+    def __init__(self, agent_ids, lon, lat, features, departments):
+        self.agent_ids = pd.Index(agent_ids)
+        self.lon, self.lat = np.asarray(lon, dtype='float64'), np.asarray(lat, dtype='float64')
+        self.communes = np.array([feature['id'] for feature in features])
+        self.departments = np.asarray(departments)
+        self.polygons = PolygonGrid(features)
+        self.located = self.polygons.locate(self.lon, self.lat)
+        located = self.located >= 0
+        self.points = PointGrid(self.lon[located], self.lat[located], self.polygons.bounds)
+
+    @classmethod
+    def synthetic(cls, agent_ids, regions, features, departments, weights=None, seed=SYNTHETIC_SEED):
+        """Place each agent in a commune of its department, clustered around a town in that commune
+
+        Communes are drawn in proportion to `weights` (default: land area);
+        points are rejection sampled so each lands inside its commune.
+        """
+        rng = np.random.default_rng([seed, 3])
+        departments = np.asarray(departments)
+        polygons = PolygonGrid(features)
+        weights = polygons.areas if weights is None else np.asarray(weights, dtype='float64')
+        target = np.full(len(regions), -1)
+        for department in np.unique(regions):
+            agents = np.flatnonzero(regions == department)
+            communes = np.flatnonzero(departments == department)
+            if len(communes):
+                target[agents] = rng.choice(communes, len(agents), p=weights[communes] / weights[communes].sum())
+
+        def sample(communes, towns=None):
+            x0, y0, x1, y1 = polygons.bboxes[communes].T
+            lon, lat = rng.uniform(x0, x1), rng.uniform(y0, y1)
+            if towns is not None:
+                # Most agents work near the town centre, the rest anywhere in the commune
+                near = rng.random(len(communes)) < 0.6
+                lon[near] = rng.normal(towns[communes[near], 0], 0.04)
+                lat[near] = rng.normal(towns[communes[near], 1], 0.04)
+            return lon, lat
+
+        def place(communes, towns=None):
+            points = np.full((len(communes), 2), np.nan)
+            pending = np.arange(len(communes))
+            for _ in range(50):
+                lon, lat = sample(communes[pending], towns)
+                hit = polygons.locate(lon, lat) == communes[pending]
+                points[pending[hit]] = np.column_stack([lon[hit], lat[hit]])
+                pending = pending[~hit]
+                if not len(pending):
+                    break
+            return points
+
+        towns = place(np.arange(len(features)))
+        points = np.full((len(regions), 2), np.nan)
+        placed = target >= 0
+        points[placed] = place(target[placed], towns)
+        return cls(agent_ids, points[:, 0], points[:, 1], features, departments)
+
+    def density(self, department=None):
+        """Agents, land area and agents per 100 km² of each commune, optionally of one department"""
+        counts = np.bincount(self.located[self.located >= 0], minlength=len(self.communes))
+        frame = pd.DataFrame({
+            'commune': self.communes, 'department': self.departments,
+            'agents': counts, 'area_km2': self.polygons.areas
+        })
+        if department:
+            frame = frame[frame['department'] == department].reset_index(drop=True)
+        frame['per_100km2'] = frame['agents'] / frame['area_km2'] * 100
+        return frame
+
+    def coverage(self, department=None, spacing=COVERAGE_SPACING):
+        """Land sampled on a regular grid, with each sample's distance (km) to the nearest agent"""
+        x0, y0, x1, y1 = self.polygons.bounds
+        lon, lat = np.meshgrid(np.arange(x0, x1, spacing) + spacing / 2, np.arange(y0, y1, spacing) + spacing / 2)
+        lon, lat = lon.ravel(), lat.ravel()
+        commune = self.polygons.locate(lon, lat)
+        keep = commune >= 0
+        if department:
+            keep &= self.departments[commune.clip(min=0)] == department
+        lon, lat, commune = lon[keep], lat[keep], commune[keep]
+        return pd.DataFrame({
+            'lon': lon, 'lat': lat,
+            'commune': self.communes[commune], 'department': self.departments[commune],
+            'distance_km': self.points.nearest(lon, lat)
+        })
+
+
+def read_agent_locations(path):
+    """Agent GPS points from `agent_locations.parquet` or `agent_locations.csv` (agent_id, lon, lat), None when absent"""
+    columns = ['agent_id', 'lon', 'lat']
+    for name in ('agent_locations.parquet', 'agent_locations.csv'):
+        file = os.path.join(path, name)
+        if os.path.exists(file):
+            if name.endswith('.parquet'):
+                return pd.read_parquet(file, columns=columns)
+            return pd.read_csv(file, usecols=columns)
+    return None
+
+
+@st.cache_resource(show_spinner=False)
+def get_agent_locations(_source):
+    """Process-wide agent spatial index, built the first time a page needs it
+
+    Points come from `agent_locations.*` under MTN_DATA_DIR when present,
+    otherwise each agent of the agent store is placed in its department,
+    weighted by commune headcount when the data has communes. None when
+    the commune boundaries are unavailable.
+    """
+    geometry = get_drill_geometry('commune')
+    if not geometry:
+        return None
+    features = [feature for collection in geometry.values() for feature in collection['features']]
+    departments = [department for department, collection in geometry.items() for _ in collection['features']]
+
+    points = read_agent_locations(_source.origin) if os.path.isdir(str(_source.origin)) else None
+    if points is not None:
+        return AgentLocations(points['agent_id'], points['lon'], points['lat'], features, departments)
+
+    store, weights = _source.agent_store, None
+    if _source.has_column(['agents'], 'commune'):
+        headcount = _source.kpi_totals(['agents'], _source.latest_date, _source.latest_date, by=['commune'])
+        headcount = headcount.set_index(headcount['commune'].astype(str))['agents']
+        # A commune without agents in the data still gets the odd one, so no department is left empty
+        weights = headcount.reindex([feature['id'] for feature in features]).fillna(0).to_numpy(dtype='float64') + 0.01
+    return AgentLocations.synthetic(store.agent_ids, np.asarray(store.regions.astype(str)), features, departments, weights)
+
+
+# ==================== KPI CARD COMPONENT - UPDATED ====================
+def create_mtn_kpi_card(label, value, unit, vs_budget_pct, comparisons):
+    """Create compact MTN-style KPI card with vs Budget instead of vs previous day"""
+    
+    is_positive = pd.isna(vs_budget_pct) or vs_budget_pct >= 0
+    delta_class = "delta-positive" if is_positive else "delta-negative"
+    arrow = "↑" if is_positive else "↓"
+    budget_text = "N/A" if pd.isna(vs_budget_pct) else f"{arrow} {abs(vs_budget_pct):.1f}%"
+    
+    if isinstance(value, (int, float)):
+        if abs(value) >= 1000000:
+            formatted_value = f"{value/1000000:.1f}M"
+        elif abs(value) >= 1000:
+            formatted_value = f"{value/1000:.1f}K"
+        else:
+            formatted_value = f"{value:.1f}" if isinstance(value, float) else f"{value:,}"
+    else:
+        formatted_value = str(value)
+    
+    html = f"""
+    <div class="kpi-card">
+        <div class="kpi-label">{label}</div>
+        <div class="kpi-value">{formatted_value}<span style="font-size: 11px; color: #4A4A4A; margin-left: 2px;">{unit}</span></div>
+        <div class="kpi-delta {delta_class}">vs Budget: {budget_text}</div>
+        <div class="kpi-compact-grid">
+            <div class="kpi-compact-item">
+                <span>YTD:</span>
+                <span class="kpi-compact-value">{comparisons.get('ytd', 'N/A')}</span>
+            </div>
+            <div class="kpi-compact-item">
+                <span>WoW:</span>
+                <span class="kpi-compact-value">{comparisons.get('wow', 'N/A')}</span>
+            </div>
+            <div class="kpi-compact-item">
+                <span>MoM:</span>
+                <span class="kpi-compact-value">{comparisons.get('mom', 'N/A')}</span>
+            </div>
+        </div>
+    </div>
+    """
+    return html
+
+
+def create_comparison_card(label, stats, unit):
+    """KPI card filled from one measure's comparison engine statistics"""
+    return create_mtn_kpi_card(label, stats['value'], unit, stats['vs_budget'], {
+        'ytd': format_change(stats['ytd']),
+        'wow': format_change(stats['wow']),
+        'mom': format_change(stats['mom'])
+    })
+
+# ==================== PLOTLY THEME ====================
+def get_mtn_plotly_theme():
+    """MTN color scheme for Plotly charts"""
+    return {
+        'layout': {
+            'font': {'family': 'Segoe UI', 'size': 11, 'color': MTN_BLACK},
+            'plot_bgcolor': MTN_WHITE,
+            'paper_bgcolor': MTN_WHITE,
+            'colorway': [MTN_YELLOW, MTN_BLACK, MTN_DARK_GRAY, MTN_GRAY],
+            'hovermode': 'x unified'
+        }
+    }
+
+
+# Shared layouts figures start from; each chart layers its own height and titles on top
+FIGURE_SKELETONS = {
+    'trend': {
+        'legend': dict(orientation="h", yanchor="bottom", y=1.02, xanchor="left", x=0),
+        'margin': dict(l=40, r=40, t=40, b=40),
+        'xaxis': dict(showgrid=True, gridcolor='#F0F0F0'),
+        'yaxis': dict(showgrid=True, gridcolor='#F0F0F0')
+    },
+    'bar': {
+        'margin': dict(l=40, r=40, t=20, b=40)
+    },
+    'pie': {
+        'showlegend': False,
+        'margin': dict(l=20, r=20, t=20, b=20)
+    }
+}
+
+
+@st.cache_resource(show_spinner=False)
+def register_mtn_template():
+    """Register the MTN theme on top of Plotly's default template and make it the default, once per process
+
+    Figures then pick the theme up by reference instead of each one
+    validating the same layout settings again.
+    """
+    import plotly.io as pio
+    theme = go.layout.Template(layout=get_mtn_plotly_theme()['layout'])
+    pio.templates['mtn'] = pio.templates.merge_templates('plotly', theme)
+    pio.templates.default = 'mtn'
+    return 'mtn'
+
+
+def mtn_figure(skeleton=None, data=None):
+    """New figure on the MTN template, laid out from a shared skeleton"""
+    register_mtn_template()
+    return go.Figure(data=data, layout=FIGURE_SKELETONS.get(skeleton))
+
+
+# Trend traces with more points than this are drawn with WebGL instead of SVG
+WEBGL_POINTS = int(os.environ.get('MTN_WEBGL_POINTS', 1000))
+
+
+def scatter_trace(x, y, **style):
+    """Line trace that switches to WebGL (Scattergl) past WEBGL_POINTS with the same styling
+
+    Scattergl supports the fills used here but draws straight segments only,
+    so a spline line shape falls back to linear on long series.
+    """
+    if len(x) <= WEBGL_POINTS:
+        return go.Scatter(x=x, y=y, **style)
+    if style.get('line', {}).get('shape') == 'spline':
+        style = {**style, 'line': {**style['line'], 'shape': 'linear'}}
+    return go.Scattergl(x=x, y=y, **style)
+
+
+def show_figure(source, filters, loader, chart, build):
+    """Render a chart, reusing the figure built for the same page data and chart settings
+
+    `chart` names the chart and the selections it depends on. Figures live
+    in the shared result cache next to their page data, so a rerun with
+    unchanged inputs skips building the figure. It does not skip encoding:
+    st.plotly_chart takes only figure objects and serializes them to JSON
+    on every render.
+    """
+    register_mtn_template()
+    with profile('chart', f"{loader.__name__}:{chart[0]}"):
+        figure = page_artifact(source, filters, loader, ('figure',) + chart, build)
+        st.plotly_chart(figure, use_container_width=True, config={'displayModeBar': False})
+
+# ==================== PAGE CONTENT FUNCTIONS ====================
+def load_overview_data(source, filters):
+    """Query the Overview page: window KPIs, 90-day trends, regional and channel splits"""
+    start, end, where = filters.start, filters.end, filters.where
+    panels = run_panels(load_overview_data, {
+        'comparisons': lambda: kpi_comparisons(source, [
+            'market_share', 'gross_adds', 'net_adds', 'returners', 'airtime_sales', 'float_distributed', 'churners'
+        ], filters),
+        'trend': lambda: source.kpi_series(
+            ['airtime_sales', 'float_distributed', 'gross_adds', 'returners', 'net_adds', 'churners', 'market_share'],
+            end - pd.Timedelta(days=89), end, where=where
+        ),
+        'regional': lambda: source.kpi_totals(
+            ['gross_adds', 'airtime_sales', 'agents', 'float_distributed'], start, end, by=['region'], where=where
+        ),
+        'channel': lambda: source.query('acquisition', ['gross_adds'], by=['channel'], start=start, end=end, where=where)
+    })
+    channel = panels['channel']
+    channel['share_pct'] = channel['gross_adds'] / channel['gross_adds'].sum() * 100
+    return {
+        'kpis': panels['comparisons']['window'],
+        'daily': panels['comparisons']['daily'],
+        'trend': panels['trend'],
+        'regional': panels['regional'],
+        'channel': channel
+    }
+
+
+def render_overview_content(source, filters):
+    """Render Overview page content with requested modifications"""
+    data = get_page_data(load_overview_data, source, filters)
+    kpis = data['kpis']
+    
+    # KPI Cards - 6 columns with vs Budget comparison
+    col1, col2, col3, col4, col5, col6 = st.columns(6)
+    
+    with col1:
+        st.markdown(create_comparison_card("Market Share", kpis['market_share'], "%"), unsafe_allow_html=True)
     
     with col2:
-        vs_budget = ((data['kpi_data']['total_gross_adds'] - data['kpi_data']['budget_gross_adds']) / 
-                    data['kpi_data']['budget_gross_adds']) * 100
-        st.markdown(create_mtn_kpi_card(
-            "Gross Adds",
-            data['kpi_data']['total_gross_adds'],
-            "",
-            vs_budget,
-            {'ytd': '-3.8%', 'wow': '-0.4%', 'mom': '-2.8%'}  # Changed to percentages
-        ), unsafe_allow_html=True)
+        st.markdown(create_comparison_card("Gross Adds", kpis['gross_adds'], ""), unsafe_allow_html=True)
     
     with col3:
-        vs_budget = ((data['kpi_data']['net_adds'] - data['kpi_data']['budget_net_adds']) / 
-                    abs(data['kpi_data']['budget_net_adds'])) * 100
-        st.markdown(create_mtn_kpi_card(
-            "Net Adds",
-            data['kpi_data']['net_adds'],
-            "",
-            vs_budget,
-            {'ytd': '-12.5%', 'wow': '-8.4%', 'mom': '-22.5%'}  # Changed to percentages
-        ), unsafe_allow_html=True)
+        st.markdown(create_comparison_card("Net Adds", kpis['net_adds'], ""), unsafe_allow_html=True)
     
     with col4:
-        vs_budget = ((data['kpi_data']['returners'] - data['kpi_data']['budget_returners']) / 
-                    data['kpi_data']['budget_returners']) * 100
-        st.markdown(create_mtn_kpi_card(
-            "Returners",
-            data['kpi_data']['returners'],
-            "",
-            vs_budget,
-            {'ytd': '-5.2%', 'wow': '-9.6%', 'mom': '-22.8%'}  # Changed to percentages
-        ), unsafe_allow_html=True)
+        st.markdown(create_comparison_card("Returners", kpis['returners'], ""), unsafe_allow_html=True)
     
     with col5:
-        vs_budget = ((data['kpi_data']['airtime_sales'] - data['kpi_data']['budget_airtime_sales']) / 
-                    data['kpi_data']['budget_airtime_sales']) * 100
-        st.markdown(create_mtn_kpi_card(
-            "Airtime Sales",
-            data['kpi_data']['airtime_sales'],
-            "M XOF",
-            vs_budget,
-            {'ytd': '+8.2%', 'wow': '+7.9%', 'mom': '+7.8%'}  # Changed to percentages
-        ), unsafe_allow_html=True)
+        st.markdown(create_comparison_card("Airtime Sales", kpis['airtime_sales'], "M XOF"), unsafe_allow_html=True)
     
     with col6:
-        vs_budget = ((data['kpi_data']['float_distributed'] - data['kpi_data']['budget_float_distributed']) / 
-                    data['kpi_data']['budget_float_distributed']) * 100
-        st.markdown(create_mtn_kpi_card(
-            "Float Distributed",
-            data['kpi_data']['float_distributed'],
-            "M XOF",
-            vs_budget,
-            {'ytd': '+6.9%', 'wow': '+7.5%', 'mom': '+6.2%'}  # Changed to percentages
-        ), unsafe_allow_html=True)
+        st.markdown(create_comparison_card("Float Distributed", kpis['float_distributed'], "M XOF"), unsafe_allow_html=True)
     
     st.markdown("<br>", unsafe_allow_html=True)
     
@@ -603,176 +3441,132 @@ def render_overview_content(data):
     with col_left:
         st.markdown('<div class="chart-title">💰 Airtime Sales & Float Distribution Trends</div>', unsafe_allow_html=True)
         
-        fig_sales_float = go.Figure()
-        
-        # Add YoY and MoM annotations
-        current_sales = data['trend_data']['airtime_sales'].iloc[-1]
-        prev_year_sales = data['trend_data']['airtime_sales'].iloc[0]
-        prev_month_sales = data['trend_data']['airtime_sales'].iloc[-30]
-        
-        yoy_change = ((current_sales - prev_year_sales) / prev_year_sales) * 100
-        mom_change = ((current_sales - prev_month_sales) / prev_month_sales) * 100
-        
-        fig_sales_float.add_trace(go.Scatter(
-            x=data['trend_data']['date'],
-            y=data['trend_data']['airtime_sales'],
-            name='Airtime Sales (M XOF)',
-            mode='lines',
-            line=dict(color=MTN_YELLOW, width=3),
-            fill='tozeroy',
-            fillcolor='rgba(255, 203, 5, 0.2)'
-        ))
-        
-        fig_sales_float.add_trace(go.Scatter(
-            x=data['trend_data']['date'],
-            y=data['trend_data']['float'],
-            name='Float Distributed (M XOF)',
-            mode='lines',
-            line=dict(color=MTN_BLACK, width=3),
-            fill='tozeroy',
-            fillcolor='rgba(0, 0, 0, 0.1)'
-        ))
-        
-        # Add YoY and MoM annotations
-        fig_sales_float.add_annotation(
-            text=f"YoY: {yoy_change:+.1f}%<br>MoM: {mom_change:+.1f}%",
-            xref="paper", yref="paper",
-            x=0.02, y=0.98,
-            showarrow=False,
-            bgcolor="rgba(255, 255, 255, 0.8)",
-            bordercolor="#FFCB05",
-            borderwidth=2,
-            font=dict(size=10, color="#000000")
-        )
-        
-        fig_sales_float.update_layout(
-            height=380,
-            **get_mtn_plotly_theme()['layout'],
-            legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="left", x=0),
-            margin=dict(l=40, r=40, t=40, b=40),
-            xaxis=dict(showgrid=True, gridcolor='#F0F0F0'),
-            yaxis=dict(showgrid=True, gridcolor='#F0F0F0', title='Value (M XOF)')
-        )
-        
-        st.plotly_chart(fig_sales_float, use_container_width=True, config={'displayModeBar': False})
-    
-    with col_right:
-        st.markdown('<div class="chart-title">📈 Acquisition KPIs</div>', unsafe_allow_html=True)
-        
-        # KPI Selector for dual view
-        kpi_pair = st.selectbox(
-            "Select KPI Pair to View",
-            ["GA & Returners", "Net Adds & Churners"],
-            key="kpi_pair_selector"
-        )
-        
-        fig_acquisition = go.Figure()
-        
-        if kpi_pair == "GA & Returners":
-            # Calculate YoY and MoM for GA
-            current_ga = data['trend_data']['gross_adds'].iloc[-1]
-            prev_year_ga = data['trend_data']['gross_adds'].iloc[0]
-            prev_month_ga = data['trend_data']['gross_adds'].iloc[-30]
-            ga_yoy = ((current_ga - prev_year_ga) / prev_year_ga) * 100
-            ga_mom = ((current_ga - prev_month_ga) / prev_month_ga) * 100
-            
-            # Calculate YoY and MoM for Returners
-            current_ret = data['trend_data']['returners'].iloc[-1]
-            prev_year_ret = data['trend_data']['returners'].iloc[0]
-            prev_month_ret = data['trend_data']['returners'].iloc[-30]
-            ret_yoy = ((current_ret - prev_year_ret) / prev_year_ret) * 100
-            ret_mom = ((current_ret - prev_month_ret) / prev_month_ret) * 100
+        def build_sales_float():
+            fig_sales_float = mtn_figure('trend')
             
-            fig_acquisition.add_trace(go.Scatter(
-                x=data['trend_data']['date'],
-                y=data['trend_data']['gross_adds'],
-                name='Gross Adds',
-                mode='lines+markers',
+            fig_sales_float.add_trace(go.Scatter(
+                x=data['trend']['date'],
+                y=data['trend']['airtime_sales'],
+                name='Airtime Sales (M XOF)',
+                mode='lines',
                 line=dict(color=MTN_YELLOW, width=3),
-                marker=dict(size=4)
+                fill='tozeroy',
+                fillcolor='rgba(255, 203, 5, 0.2)'
             ))
             
-            fig_acquisition.add_trace(go.Scatter(
-                x=data['trend_data']['date'],
-                y=data['trend_data']['returners'],
-                name='Returners',
-                mode='lines+markers',
+            fig_sales_float.add_trace(go.Scatter(
+                x=data['trend']['date'],
+                y=data['trend']['float_distributed'],
+                name='Float Distributed (M XOF)',
+                mode='lines',
                 line=dict(color=MTN_BLACK, width=3),
-                marker=dict(size=4)
+                fill='tozeroy',
+                fillcolor='rgba(0, 0, 0, 0.1)'
             ))
             
-            # Add variations annotation
-            fig_acquisition.add_annotation(
-                text=f"<b>GA</b><br>YoY: {ga_yoy:+.1f}%<br>MoM: {ga_mom:+.1f}%<br><br><b>Returners</b><br>YoY: {ret_yoy:+.1f}%<br>MoM: {ret_mom:+.1f}%",
+            # Add YoY and MoM annotations
+            fig_sales_float.add_annotation(
+                text=f"YoY: {format_change(kpis['airtime_sales']['yoy'])}<br>MoM: {format_change(kpis['airtime_sales']['mom'])}",
                 xref="paper", yref="paper",
                 x=0.02, y=0.98,
                 showarrow=False,
-                bgcolor="rgba(255, 255, 255, 0.9)",
+                bgcolor="rgba(255, 255, 255, 0.8)",
                 bordercolor="#FFCB05",
                 borderwidth=2,
-                font=dict(size=9, color="#000000"),
-                align="left"
+                font=dict(size=10, color="#000000")
             )
             
-            y_title = 'Count'
-        else:  # Net Adds & Churners
-            # Calculate YoY and MoM for Net Adds
-            current_na = data['trend_data']['net_adds'].iloc[-1]
-            prev_year_na = data['trend_data']['net_adds'].iloc[0]
-            prev_month_na = data['trend_data']['net_adds'].iloc[-30]
-            na_yoy = ((current_na - prev_year_na) / abs(prev_year_na)) * 100
-            na_mom = ((current_na - prev_month_na) / abs(prev_month_na)) * 100
-            
-            # Calculate YoY and MoM for Churners
-            current_ch = data['trend_data']['churners'].iloc[-1]
-            prev_year_ch = data['trend_data']['churners'].iloc[0]
-            prev_month_ch = data['trend_data']['churners'].iloc[-30]
-            ch_yoy = ((current_ch - prev_year_ch) / prev_year_ch) * 100
-            ch_mom = ((current_ch - prev_month_ch) / prev_month_ch) * 100
-            
-            fig_acquisition.add_trace(go.Scatter(
-                x=data['trend_data']['date'],
-                y=data['trend_data']['net_adds'],
-                name='Net Adds',
-                mode='lines+markers',
-                line=dict(color='#D32F2F', width=3),
-                marker=dict(size=4)
-            ))
-            
-            fig_acquisition.add_trace(go.Scatter(
-                x=data['trend_data']['date'],
-                y=data['trend_data']['churners'],
-                name='Churners',
-                mode='lines+markers',
-                line=dict(color=MTN_GRAY, width=3),
-                marker=dict(size=4)
-            ))
+            fig_sales_float.update_layout(height=380, yaxis_title='Value (M XOF)')
+            return fig_sales_float
+        
+        show_figure(source, filters, load_overview_data, ('sales_float',), build_sales_float)
+    
+    with col_right:
+        st.markdown('<div class="chart-title">📈 Acquisition KPIs</div>', unsafe_allow_html=True)
+        
+        # KPI Selector for dual view
+        kpi_pair = st.selectbox(
+            "Select KPI Pair to View",
+            ["GA & Returners", "Net Adds & Churners"],
+            key="kpi_pair_selector"
+        )
+        
+        def build_acquisition():
+            fig_acquisition = mtn_figure('trend')
             
-            # Add variations annotation
-            fig_acquisition.add_annotation(
-                text=f"<b>Net Adds</b><br>YoY: {na_yoy:+.1f}%<br>MoM: {na_mom:+.1f}%<br><br><b>Churners</b><br>YoY: {ch_yoy:+.1f}%<br>MoM: {ch_mom:+.1f}%",
-                xref="paper", yref="paper",
-                x=0.02, y=0.98,
-                showarrow=False,
-                bgcolor="rgba(255, 255, 255, 0.9)",
-                bordercolor="#FFCB05",
-                borderwidth=2,
-                font=dict(size=9, color="#000000"),
-                align="left"
-            )
+            if kpi_pair == "GA & Returners":
+                fig_acquisition.add_trace(go.Scatter(
+                    x=data['trend']['date'],
+                    y=data['trend']['gross_adds'],
+                    name='Gross Adds',
+                    mode='lines+markers',
+                    line=dict(color=MTN_YELLOW, width=3),
+                    marker=dict(size=4)
+                ))
+                
+                fig_acquisition.add_trace(go.Scatter(
+                    x=data['trend']['date'],
+                    y=data['trend']['returners'],
+                    name='Returners',
+                    mode='lines+markers',
+                    line=dict(color=MTN_BLACK, width=3),
+                    marker=dict(size=4)
+                ))
+                
+                # Add variations annotation
+                fig_acquisition.add_annotation(
+                    text=(f"<b>GA</b><br>YoY: {format_change(kpis['gross_adds']['yoy'])}<br>MoM: {format_change(kpis['gross_adds']['mom'])}"
+                          f"<br><br><b>Returners</b><br>YoY: {format_change(kpis['returners']['yoy'])}<br>MoM: {format_change(kpis['returners']['mom'])}"),
+                    xref="paper", yref="paper",
+                    x=0.02, y=0.98,
+                    showarrow=False,
+                    bgcolor="rgba(255, 255, 255, 0.9)",
+                    bordercolor="#FFCB05",
+                    borderwidth=2,
+                    font=dict(size=9, color="#000000"),
+                    align="left"
+                )
+                
+                y_title = 'Count'
+            else:  # Net Adds & Churners
+                fig_acquisition.add_trace(go.Scatter(
+                    x=data['trend']['date'],
+                    y=data['trend']['net_adds'],
+                    name='Net Adds',
+                    mode='lines+markers',
+                    line=dict(color='#D32F2F', width=3),
+                    marker=dict(size=4)
+                ))
+                
+                fig_acquisition.add_trace(go.Scatter(
+                    x=data['trend']['date'],
+                    y=data['trend']['churners'],
+                    name='Churners',
+                    mode='lines+markers',
+                    line=dict(color=MTN_GRAY, width=3),
+                    marker=dict(size=4)
+                ))
+                
+                # Add variations annotation
+                fig_acquisition.add_annotation(
+                    text=(f"<b>Net Adds</b><br>YoY: {format_change(kpis['net_adds']['yoy'])}<br>MoM: {format_change(kpis['net_adds']['mom'])}"
+                          f"<br><br><b>Churners</b><br>YoY: {format_change(kpis['churners']['yoy'])}<br>MoM: {format_change(kpis['churners']['mom'])}"),
+                    xref="paper", yref="paper",
+                    x=0.02, y=0.98,
+                    showarrow=False,
+                    bgcolor="rgba(255, 255, 255, 0.9)",
+                    bordercolor="#FFCB05",
+                    borderwidth=2,
+                    font=dict(size=9, color="#000000"),
+                    align="left"
+                )
+                
+                y_title = 'Count'
             
-            y_title = 'Count'
-        
-        fig_acquisition.update_layout(
-            height=380,
-            **get_mtn_plotly_theme()['layout'],
-            legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="left", x=0),
-            margin=dict(l=40, r=40, t=40, b=40),
-            xaxis=dict(showgrid=True, gridcolor='#F0F0F0'),
-            yaxis=dict(showgrid=True, gridcolor='#F0F0F0', title=y_title)
-        )
+            fig_acquisition.update_layout(height=380, yaxis_title=y_title)
+            return fig_acquisition
         
-        st.plotly_chart(fig_acquisition, use_container_width=True, config={'displayModeBar': False})
+        show_figure(source, filters, load_overview_data, ('acquisition', kpi_pair), build_acquisition)
     
     # Daily Performance Table - Modified to show one KPI at a time with selector
     st.markdown('<div class="chart-title">📋 Daily Performance - Select KPI (Last 7 Days)</div>', unsafe_allow_html=True)
@@ -789,72 +3583,30 @@ def render_overview_content(data):
     
     # Map KPI selection to column names and formatting
     kpi_column_map = {
-        "Market Share (%)": ('market_share', '{:.2f}', '%'),
-        "Gross Adds": ('gross_adds', '{:,.0f}', ''),
-        "Net Adds": ('net_adds', '{:,.0f}', ''),
-        "Returners": ('returners', '{:,.0f}', ''),
-        "Airtime Sales (M XOF)": ('airtime_sales', '{:.2f}', 'M'),
-        "Float Distributed (M XOF)": ('float', '{:.2f}', 'M')
+        "Market Share (%)": ('market_share', '{:.2f}'),
+        "Gross Adds": ('gross_adds', '{:,.0f}'),
+        "Net Adds": ('net_adds', '{:,.0f}'),
+        "Returners": ('returners', '{:,.0f}'),
+        "Airtime Sales (M XOF)": ('airtime_sales', '{:.2f}M'),
+        "Float Distributed (M XOF)": ('float_distributed', '{:.2f}M')
     }
     
-    selected_col, value_format, suffix = kpi_column_map[selected_kpi]
-    
-    # Prepare daily data for the selected KPI
-    daily_display = data['daily_data'][['date', selected_col, 'dod', 'mom']].copy()
-    daily_display['date'] = daily_display['date'].dt.strftime('%d %b')
-    
-    # Format the selected KPI column
-    if suffix:
-        if suffix == '%':
-            daily_display[selected_col] = daily_display[selected_col].apply(lambda x: f"{x:.2f}")
-        else:
-            daily_display[selected_col] = daily_display[selected_col].apply(lambda x: f"{x:.2f}{suffix}")
-    else:
-        daily_display[selected_col] = daily_display[selected_col].apply(lambda x: f"{x:,.0f}")
-    
-    # Rename columns for display
-    daily_display.columns = ['Date', selected_kpi, 'DoD %', 'MoM %']
-    
-    # Function to color percentage cells based on value
-    def color_percentages(val):
-        if isinstance(val, (int, float)):
-            if val > 5:
-                return 'background-color: #90EE90; color: white; font-weight: bold'  # Light green
-            elif val > 0:
-                return 'background-color: #FFEB3B; color: black; font-weight: bold'  # Yellow
-            else:
-                return 'background-color: #FFCDD2; color: white; font-weight: bold'  # Light red
-        return ''
-    
-    # Style the dataframe
-    styled_df = daily_display.style.format({
-        'DoD %': '{:+.1f}',
-        'MoM %': '{:+.1f}'
-    }).applymap(color_percentages, subset=['DoD %', 'MoM %']).set_properties(**{
-        'text-align': 'center',
-        'font-size': '11px',
-        'border': '1px solid #E0E0E0'
-    }).set_table_styles([
-        {'selector': 'th', 'props': [
-            ('background-color', '#000000'),
-            ('color', '#FFCB05'),
-            ('font-weight', 'bold'),
-            ('text-align', 'center'),
-            ('font-size', '11px'),
-            ('padding', '8px')
-        ]},
-        {'selector': 'td', 'props': [
-            ('padding', '6px')
-        ]}
-    ])
+    selected_col, value_format = kpi_column_map[selected_kpi]
     
-    st.dataframe(styled_df, use_container_width=True, height=350)
+    # Daily value, day-over-day and month-to-date change of the selected KPI from the comparison engine
+    daily_stats = data['daily'][selected_col]
+    render_daily_table(source, filters, load_overview_data, selected_kpi, lambda: daily_table_html([
+        ('Date', daily_stats.index.strftime('%d %b'), None, False),
+        (selected_kpi, daily_stats['value'].values, value_format, False),
+        ('DoD %', daily_stats['dod'].values, '{:+.1f}', True),
+        ('MoM %', daily_stats['mom'].values, '{:+.1f}', True)
+    ], 'overview'))
     
     # Bottom row - Benin Map with KPIs
     st.markdown('<br><div class="chart-title">🌍 Performance by Region - Interactive Benin Map</div>', unsafe_allow_html=True)
     
-    # KPI selector for the map
-    col_selector, col_empty = st.columns([2, 3])
+    # KPI selector for the map, and the department (then commune) to drill into when the data has that detail
+    col_selector, col_drill, col_drill_commune = st.columns([2, 2, 2])
     with col_selector:
         kpi_map = st.selectbox(
             "Select KPI to Display on Map",
@@ -867,75 +3619,57 @@ def render_overview_content(data):
         "Gross Adds": 'gross_adds',
         "Airtime Sales (M XOF)": 'airtime_sales',
         "Number of Agents": 'agents',
-        "Float Distribution (M XOF)": 'float'
+        "Float Distribution (M XOF)": 'float_distributed'
     }
     kpi_col = kpi_col_map[kpi_map]
     
-    # Try to load and display map, fallback to bar chart if not available
-    geojson_path = 'gadm41_BEN_1.json'
+    department, commune = "All Departments", "All Communes"
+    if drill_available(source, kpi_col, 'commune'):
+        with col_drill:
+            department = st.selectbox(
+                "Drill into Department",
+                ["All Departments"] + list(data['regional']['region']),
+                key="map_drill_selector"
+            )
     
+    # Department polygons come decoded and pre-simplified from the process-wide geometry cache;
+    # commune and arrondissement polygons are decoded the first time a map drills into them
     try:
-        # Check if we can use geopandas for better map handling
-        use_geopandas = False
-        try:
-            import geopandas as gpd
-            use_geopandas = True
-        except ImportError:
-            pass
-        
-        if os.path.exists(geojson_path):
-            if use_geopandas:
-                # Use geopandas for better handling
-                benin_gdf = gpd.read_file(geojson_path)
-                
-                # Find the department name column
-                name_column = None
-                for col in ['NAME_1', 'ADM1_NAME', 'name', 'Name', 'ADM1_EN']:
-                    if col in benin_gdf.columns:
-                        name_column = col
-                        break
-                
-                if name_column:
-                    # Map KPIs to departments
-                    kpi_dict = {}
-                    for _, row in data['regional_data'].iterrows():
-                        kpi_dict[row['region']] = row[kpi_col]
-                    
-                    benin_gdf['kpi_value'] = benin_gdf[name_column].map(kpi_dict)
-                    benin_gdf['department'] = benin_gdf[name_column]
-                    
-                    # Create choropleth using the geometry
-                    fig_map = px.choropleth(
-                        benin_gdf,
-                        geojson=benin_gdf.geometry,
-                        locations=benin_gdf.index,
-                        color='kpi_value',
-                        hover_name='department',
-                        hover_data={'kpi_value': ':,.0f'},
-                        color_continuous_scale='YlOrRd',
-                        labels={'kpi_value': kpi_map}
+        map_df = data['regional'][['region', kpi_col]].rename(columns={kpi_col: 'kpi_value'})
+        area_df, drilled = None, ()
+        if department != "All Departments":
+            drilled = (department,)
+            area_df = page_artifact(
+                source, filters, load_overview_data, ('drill', kpi_col) + drilled,
+                lambda: drill_values(source, filters, kpi_col, department)
+            )
+            area_geojson = (get_drill_geometry('commune') or {}).get(department)
+            area_label = ("Commune", "communes", f"{department} total")
+            if drill_available(source, kpi_col, 'arrondissement'):
+                with col_drill_commune:
+                    commune = st.selectbox(
+                        "Drill into Commune", ["All Communes"] + list(area_df['area']), key="map_drill_commune_selector"
                     )
-            else:
-                # Use regular JSON loading
-                with open(geojson_path) as f:
-                    benin_geo = json.load(f)
-                
-                # Prepare DataFrame
-                map_df = data['regional_data'][['region', kpi_col]].copy()
-                map_df = map_df.rename(columns={'region': 'department', kpi_col: 'kpi_value'})
-                
-                # Create choropleth
-                fig_map = px.choropleth(
-                    map_df,
-                    geojson=benin_geo,
-                    locations='department',
-                    featureidkey='properties.NAME_1',
-                    color='kpi_value',
-                    hover_name='department',
-                    hover_data={'kpi_value': ':,.0f'},
-                    color_continuous_scale='YlOrRd',
-                    labels={'kpi_value': kpi_map}
+            if commune != "All Communes":
+                arrondissements = page_artifact(
+                    source, filters, load_overview_data, ('drill', kpi_col, department, commune),
+                    lambda: drill_values(source, filters, kpi_col, department, commune)
                 )
+                geojson = (get_drill_geometry('arrondissement') or {}).get(commune)
+                if arrondissements.empty or geojson is None:
+                    st.info(f"📍 No arrondissement boundaries or data for {commune}; showing the communes of {department}.")
+                else:
+                    area_df, area_geojson, drilled = arrondissements, geojson, (department, commune)
+                    area_label = ("Arrondissement", "arrondissements", f"{commune} total")
+            if area_df.empty or area_geojson is None:
+                st.info(f"📍 No commune boundaries or data for {department}; showing departments.")
+                area_df, drilled = None, ()
+        
+        def build_map():
+            if area_df is None:
+                fig_map = build_region_choropleth(map_df, kpi_map, ':,.0f', zoom='detail')
+            else:
+                fig_map = build_area_choropleth(area_df, area_geojson, 'area', kpi_map, ':,.0f')
             
             # Update layout for better visualization
             fig_map.update_geos(
@@ -961,33 +3695,33 @@ def render_overview_content(data):
                 plot_bgcolor='white',
                 font=dict(family='Segoe UI', size=11)
             )
-            
-            st.plotly_chart(fig_map, use_container_width=True, config={'displayModeBar': False})
-            
-            # Add KPI statistics below map
-            st.markdown("<br>", unsafe_allow_html=True)
-            col_stat1, col_stat2, col_stat3, col_stat4 = st.columns(4)
-            
-            with col_stat1:
-                top_region = data['regional_data'].nlargest(1, kpi_col)['region'].values[0]
-                top_value = data['regional_data'].nlargest(1, kpi_col)[kpi_col].values[0]
-                st.metric("🏆 Top Region", top_region, f"{top_value:,.0f} {kpi_map.split('(')[0]}")
-            
-            with col_stat2:
-                avg_value = data['regional_data'][kpi_col].mean()
-                st.metric("📊 Average", f"{avg_value:,.0f}", f"Across 12 regions")
-            
-            with col_stat3:
-                total_value = data['regional_data'][kpi_col].sum()
-                st.metric("📈 Total", f"{total_value:,.0f}", "National total")
-            
-            with col_stat4:
-                bottom_region = data['regional_data'].nsmallest(1, kpi_col)['region'].values[0]
-                bottom_value = data['regional_data'].nsmallest(1, kpi_col)[kpi_col].values[0]
-                st.metric("📉 Lowest Region", bottom_region, f"{bottom_value:,.0f}")
+            return fig_map
+        
+        show_figure(source, filters, load_overview_data, ('map', kpi_map) + drilled, build_map)
         
+        # Add KPI statistics below map
+        st.markdown("<br>", unsafe_allow_html=True)
+        col_stat1, col_stat2, col_stat3, col_stat4 = st.columns(4)
+        
+        if area_df is None:
+            stats = rank_regions(data['regional'], kpi_col)
+            area, areas, total = "Region", "regions", "National total"
         else:
-            raise FileNotFoundError("GeoJSON file not found")
+            stats = rank_regions(area_df.rename(columns={'area': 'region'}), 'kpi_value')
+            area, areas, total = area_label
+        
+        with col_stat1:
+            st.metric(f"🏆 Top {area}", stats['top_region'], f"{stats['top_value']:,.0f} {kpi_map.split('(')[0]}")
+        
+        with col_stat2:
+            st.metric("📊 Average", f"{stats['average']:,.0f}", f"Across {stats['count']} {areas}")
+        
+        with col_stat3:
+            st.metric("📈 Total", f"{stats['total']:,.0f}", total)
+        
+        with col_stat4:
+            st.metric(f"📉 Lowest {area}", stats['bottom_region'], f"{stats['bottom_value']:,.0f}")
+        
             
     except Exception as e:
         # Fallback: Display horizontal bar chart
@@ -997,125 +3731,123 @@ def render_overview_content(data):
         
         with col1:
             # Bar chart as fallback
-            fig_regional = px.bar(
-                data['regional_data'].sort_values(kpi_col, ascending=True),
-                y='region',
-                x=kpi_col,
-                orientation='h',
-                color=kpi_col,
-                color_continuous_scale='YlOrRd',
-                text=kpi_col,
-                title=f'{kpi_map} by Region'
-            )
-            
-            fig_regional.update_traces(
-                texttemplate='%{text:,.0f}',
-                textposition='outside'
-            )
-            
-            fig_regional.update_layout(
-                height=400,
-                **get_mtn_plotly_theme()['layout'],
-                showlegend=False,
-                coloraxis_showscale=False,
-                margin=dict(l=100, r=40, t=40, b=40),
-                xaxis=dict(showgrid=True, gridcolor='#F0F0F0', title=kpi_map),
-                yaxis=dict(showgrid=False, title='')
-            )
+            def build_regional():
+                import plotly.express as px
+                fig_regional = px.bar(
+                    data['regional'].sort_values(kpi_col, ascending=True),
+                    y='region',
+                    x=kpi_col,
+                    orientation='h',
+                    color=kpi_col,
+                    color_continuous_scale='YlOrRd',
+                    text=kpi_col,
+                    title=f'{kpi_map} by Region'
+                )
+                
+                fig_regional.update_traces(
+                    texttemplate='%{text:,.0f}',
+                    textposition='outside'
+                )
+                
+                fig_regional.update_layout(
+                    height=400,
+                    showlegend=False,
+                    coloraxis_showscale=False,
+                    margin=dict(l=100, r=40, t=40, b=40),
+                    xaxis=dict(showgrid=True, gridcolor='#F0F0F0', title=kpi_map),
+                    yaxis=dict(showgrid=False, title='')
+                )
+                return fig_regional
             
-            st.plotly_chart(fig_regional, use_container_width=True, config={'displayModeBar': False})
+            show_figure(source, filters, load_overview_data, ('regional', kpi_map), build_regional)
         
         with col2:
             # Channel Mix pie chart
             st.markdown('<div class="chart-title">📊 Channel Mix (GA Share)</div>', unsafe_allow_html=True)
             
-            fig_channel = go.Figure(data=[go.Pie(
-                labels=data['channel_data']['channel'],
-                values=data['channel_data']['share_pct'],
-                hole=0.5,
-                marker=dict(colors=[MTN_YELLOW, MTN_BLACK, MTN_DARK_GRAY, MTN_GRAY]),
-                textfont=dict(size=10, color=MTN_WHITE),
-                textinfo='label+percent'
-            )])
-            
-            fig_channel.update_layout(
-                height=320,
-                **get_mtn_plotly_theme()['layout'],
-                showlegend=False,
-                margin=dict(l=20, r=20, t=20, b=20)
-            )
+            def build_channel():
+                fig_channel = mtn_figure('pie', data=[go.Pie(
+                    labels=data['channel']['channel'],
+                    values=data['channel']['share_pct'],
+                    hole=0.5,
+                    marker=dict(colors=[MTN_YELLOW, MTN_BLACK, MTN_DARK_GRAY, MTN_GRAY]),
+                    textfont=dict(size=10, color=MTN_WHITE),
+                    textinfo='label+percent'
+                )])
+                
+                fig_channel.update_layout(height=320)
+                return fig_channel
             
-            st.plotly_chart(fig_channel, use_container_width=True, config={'displayModeBar': False})
+            show_figure(source, filters, load_overview_data, ('channel_mix',), build_channel)
+
+def load_airtime_sales_data(source, filters):
+    """Query the Airtime Sales page: channel totals, channel trends and regional split"""
+    start, end, where = filters.start, filters.end, filters.where
+    panels = {
+        'comparisons': lambda: kpi_comparisons(source, ['airtime_sales', 'transactions'], filters),
+        # 90-day trend per channel
+        'trend': lambda: source.query(
+            'sales', ['airtime_sales', 'transactions'], by=['date', 'channel'],
+            start=end - pd.Timedelta(days=89), end=end, where=where
+        ),
+        'regional': lambda: source.query(
+            'sales', ['airtime_sales'], by=['region', 'channel'], start=start, end=end, where=where
+        ),
+        # Hour-of-week and hour-of-day patterns from the transaction log histograms
+        'hourly': lambda: {
+            measure: {
+                'week': source.hourly.hour_of_week(start, end, where, measure),
+                'day': source.hourly.hour_of_day(start, end, where, measure)
+            }
+            for measure in ('amounts', 'counts')
+        }
+    }
+    for channel in AIRTIME_CHANNELS:
+        panels[f"channel:{channel}"] = (
+            lambda channel=channel: kpi_comparisons(source, ['airtime_sales'], filters, where={**where, 'channel': channel})
+        )
+    panels = run_panels(load_airtime_sales_data, panels)
+
+    # Channel trends plus the all-channel total
+    trend = panels['trend']
+    trend_sales = trend.pivot(index='date', columns='channel', values='airtime_sales')
+    trend_transactions = trend.pivot(index='date', columns='channel', values='transactions')
+    trend_sales['Total (All Channels)'] = trend_sales.sum(axis=1)
+    trend_transactions['Total (All Channels)'] = trend_transactions.sum(axis=1)
 
-def render_airtime_sales_content(data):
+    regional = panels['regional'].pivot(index='region', columns='channel', values='airtime_sales')
+    regional.columns = [f"{channel} Sales" for channel in regional.columns]
+    regional.insert(0, 'Total Sales', regional.sum(axis=1))
+
+    return {
+        'comparisons': panels['comparisons'],
+        'channel_comparisons': {channel: panels[f"channel:{channel}"] for channel in AIRTIME_CHANNELS},
+        'trend_sales': trend_sales,
+        'trend_transactions': trend_transactions,
+        'regional': regional.reset_index(),
+        'hourly': panels['hourly']
+    }
+
+
+def render_airtime_sales_content(source, filters):
     """Render Airtime Sales page content - Enhanced with channel breakdown"""
+    data = get_page_data(load_airtime_sales_data, source, filters)
+    comparisons = data['comparisons']['window']
     
     # Top KPI Cards Row - All Channels
     st.markdown('<div style="margin-bottom: 20px;">', unsafe_allow_html=True)
     col1, col2, col3, col4, col5, col6, col7 = st.columns(7)
     
     with col1:
-        st.markdown(create_mtn_kpi_card(
-            "Total Sales",
-            156.5,
-            "M XOF",
-            8.5,
-            {'ytd': '5.12B', 'wow': '+12.3M', 'mom': '+7.8%'}
-        ), unsafe_allow_html=True)
+        st.markdown(create_comparison_card("Total Sales", comparisons['airtime_sales'], "M XOF"), unsafe_allow_html=True)
     
     with col2:
-        st.markdown(create_mtn_kpi_card(
-            "Total Volume",
-            78540,
-            "",
-            5.2,
-            {'ytd': '2.45M', 'wow': '+2.45K', 'mom': '+4.8%'}
-        ), unsafe_allow_html=True)
-    
-    with col3:
-        st.markdown(create_mtn_kpi_card(
-            "MoMo",
-            45.2,
-            "M XOF",
-            9.1,
-            {'ytd': '1.48B', 'wow': '+4.1M', 'mom': '+8.5%'}
-        ), unsafe_allow_html=True)
-    
-    with col4:
-        st.markdown(create_mtn_kpi_card(
-            "EVD",
-            38.6,
-            "M XOF",
-            7.8,
-            {'ytd': '1.26B', 'wow': '+3.0M', 'mom': '+7.2%'}
-        ), unsafe_allow_html=True)
-    
-    with col5:
-        st.markdown(create_mtn_kpi_card(
-            "DTC",
-            32.4,
-            "M XOF",
-            6.5,
-            {'ytd': '1.06B', 'wow': '+2.1M', 'mom': '+6.0%'}
-        ), unsafe_allow_html=True)
+        st.markdown(create_comparison_card("Total Volume", comparisons['transactions'], ""), unsafe_allow_html=True)
     
-    with col6:
-        st.markdown(create_mtn_kpi_card(
-            "DTR",
-            28.1,
-            "M XOF",
-            10.2,
-            {'ytd': '918M', 'wow': '+2.6M', 'mom': '+9.5%'}
-        ), unsafe_allow_html=True)
-    
-    with col7:
-        st.markdown(create_mtn_kpi_card(
-            "Xtratime",
-            12.2,
-            "M XOF",
-            12.5,
-            {'ytd': '398M', 'wow': '+1.4M', 'mom': '+11.8%'}
-        ), unsafe_allow_html=True)
+    for column, channel in zip([col3, col4, col5, col6, col7], AIRTIME_CHANNELS):
+        with column:
+            channel_stats = data['channel_comparisons'][channel]['window']['airtime_sales']
+            st.markdown(create_comparison_card(channel, channel_stats, "M XOF"), unsafe_allow_html=True)
     
     st.markdown('</div>', unsafe_allow_html=True)
     
@@ -1132,90 +3864,68 @@ def render_airtime_sales_content(data):
             key="airtime_channel_selector"
         )
         
-        # Generate trend data for all channels
-        dates = pd.date_range(end=datetime.now(), periods=90, freq='D')
-        
-        channel_data_map = {
-            "Total (All Channels)": {
-                'sales': np.random.uniform(5.0, 6.5, 90) + np.linspace(0, 1, 90),
-                'transactions': np.random.randint(2500, 3200, 90),
-                'color': MTN_YELLOW
-            },
-            "MoMo": {
-                'sales': np.random.uniform(1.3, 1.8, 90) + np.linspace(0, 0.3, 90),
-                'transactions': np.random.randint(800, 1100, 90),
-                'color': '#9C27B0'
-            },
-            "EVD": {
-                'sales': np.random.uniform(1.1, 1.5, 90) + np.linspace(0, 0.25, 90),
-                'transactions': np.random.randint(700, 950, 90),
-                'color': '#2196F3'
-            },
-            "DTC": {
-                'sales': np.random.uniform(0.9, 1.3, 90) + np.linspace(0, 0.2, 90),
-                'transactions': np.random.randint(600, 850, 90),
-                'color': '#4CAF50'
-            },
-            "DTR": {
-                'sales': np.random.uniform(0.8, 1.1, 90) + np.linspace(0, 0.15, 90),
-                'transactions': np.random.randint(500, 750, 90),
-                'color': '#FF9800'
-            },
-            "Xtratime": {
-                'sales': np.random.uniform(0.3, 0.5, 90) + np.linspace(0, 0.1, 90),
-                'transactions': np.random.randint(200, 400, 90),
-                'color': '#E91E63'
-            }
+        channel_colors = {
+            "Total (All Channels)": MTN_YELLOW,
+            "MoMo": '#9C27B0',
+            "EVD": '#2196F3',
+            "DTC": '#4CAF50',
+            "DTR": '#FF9800',
+            "Xtratime": '#E91E63'
         }
         
-        channel_config = channel_data_map[selected_channel]
+        dates = data['trend_sales'].index
+        channel_config = {
+            'sales': data['trend_sales'][selected_channel],
+            'transactions': data['trend_transactions'][selected_channel],
+            'color': channel_colors[selected_channel]
+        }
         
         # Create dual-axis chart
-        fig_airtime = make_subplots(specs=[[{"secondary_y": True}]])
-        
-        # Sales line with area fill
-        fig_airtime.add_trace(
-            go.Scatter(
-                x=dates,
-                y=channel_config['sales'],
-                name="Sales (M XOF)",
-                mode='lines+markers',
-                line=dict(color=channel_config['color'], width=3),
-                marker=dict(size=4),
-                fill='tozeroy',
-                fillcolor=f'rgba({int(channel_config["color"][1:3], 16)}, {int(channel_config["color"][3:5], 16)}, {int(channel_config["color"][5:7], 16)}, 0.2)'
-            ),
-            secondary_y=False
-        )
+        # Long series are downsampled per trace; the zoom slider brings detail back for a narrower range
+        window = zoom_window(dates, "airtime_trend_zoom")
         
-        # Transactions line
-        fig_airtime.add_trace(
-            go.Scatter(
-                x=dates,
-                y=channel_config['transactions'],
-                name="Transactions",
-                mode='lines+markers',
-                line=dict(color=MTN_BLACK, width=2, dash='dot'),
-                marker=dict(size=3)
-            ),
-            secondary_y=True
-        )
-        
-        fig_airtime.update_layout(
-            height=450,
-            plot_bgcolor=MTN_WHITE,
-            paper_bgcolor=MTN_WHITE,
-            font=dict(family='Segoe UI', size=11, color=MTN_BLACK),
-            legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="left", x=0),
-            margin=dict(l=40, r=40, t=40, b=40),
-            hovermode='x unified'
-        )
-        
-        fig_airtime.update_xaxes(showgrid=True, gridcolor='#F0F0F0', title='Date')
-        fig_airtime.update_yaxes(showgrid=True, gridcolor='#F0F0F0', title='Sales (M XOF)', secondary_y=False)
-        fig_airtime.update_yaxes(showgrid=False, title='Transactions', secondary_y=True)
+        def build_airtime():
+            from plotly.subplots import make_subplots
+            fig_airtime = make_subplots(specs=[[{"secondary_y": True}]])
+            sales_x, sales_y = zoomed(dates, channel_config['sales'], window)
+            transactions_x, transactions_y = zoomed(dates, channel_config['transactions'], window)
+            
+            # Sales line with area fill
+            fig_airtime.add_trace(
+                scatter_trace(
+                    x=sales_x,
+                    y=sales_y,
+                    name="Sales (M XOF)",
+                    mode='lines+markers',
+                    line=dict(color=channel_config['color'], width=3),
+                    marker=dict(size=4),
+                    fill='tozeroy',
+                    fillcolor=f'rgba({int(channel_config["color"][1:3], 16)}, {int(channel_config["color"][3:5], 16)}, {int(channel_config["color"][5:7], 16)}, 0.2)'
+                ),
+                secondary_y=False
+            )
+            
+            # Transactions line
+            fig_airtime.add_trace(
+                scatter_trace(
+                    x=transactions_x,
+                    y=transactions_y,
+                    name="Transactions",
+                    mode='lines+markers',
+                    line=dict(color=MTN_BLACK, width=2, dash='dot'),
+                    marker=dict(size=3)
+                ),
+                secondary_y=True
+            )
+            
+            fig_airtime.update_layout(height=450, **FIGURE_SKELETONS['trend'])
+            
+            fig_airtime.update_xaxes(showgrid=True, gridcolor='#F0F0F0', title='Date')
+            fig_airtime.update_yaxes(showgrid=True, gridcolor='#F0F0F0', title='Sales (M XOF)', secondary_y=False)
+            fig_airtime.update_yaxes(showgrid=False, title='Transactions', secondary_y=True)
+            return fig_airtime
         
-        st.plotly_chart(fig_airtime, use_container_width=True, config={'displayModeBar': False})
+        show_figure(source, filters, load_airtime_sales_data, ('trend', selected_channel, window), build_airtime)
     
     with col_chart_right:
         st.markdown('<div class="chart-title">🗺️ Airtime Sales by Region</div>', unsafe_allow_html=True)
@@ -1229,90 +3939,14 @@ def render_airtime_sales_content(data):
             label_visibility="visible"
         )
         
-        # Generate regional airtime data
-        regions = ['Alibori', 'Atacora', 'Atlantique', 'Borgou', 'Collines', 'Couffo', 
-                   'Donga', 'Littoral', 'Mono', 'Oueme', 'Plateau', 'Zou']
-        
-        regional_airtime = pd.DataFrame({
-            'region': regions,
-            'Total Sales': np.random.uniform(3.5, 8.5, 12),
-            'MoMo Sales': np.random.uniform(1.2, 3.0, 12),
-            'EVD Sales': np.random.uniform(1.0, 2.5, 12),
-            'DTC Sales': np.random.uniform(0.8, 2.0, 12),
-            'DTR Sales': np.random.uniform(0.6, 1.5, 12),
-            'Xtratime Sales': np.random.uniform(0.2, 0.8, 12)
-        })
-        
-        # Map selection to data column
-        kpi_column_map = {
-            "Total Sales": 'Total Sales',
-            "MoMo Sales": 'MoMo Sales',
-            "EVD Sales": 'EVD Sales',
-            "DTC Sales": 'DTC Sales',
-            "DTR Sales": 'DTR Sales',
-            "Xtratime Sales": 'Xtratime Sales'
-        }
-        
-        selected_col = kpi_column_map[airtime_map_kpi]
-        
-        # Try to load and display map
-        geojson_path = 'gadm41_BEN_1.json'
+        regional_airtime = data['regional']
+        selected_col = airtime_map_kpi
         
+        # Department polygons come decoded and pre-simplified from the process-wide geometry cache
         try:
-            use_geopandas = False
-            try:
-                import geopandas as gpd
-                use_geopandas = True
-            except ImportError:
-                pass
-            
-            if os.path.exists(geojson_path):
-                if use_geopandas:
-                    benin_gdf = gpd.read_file(geojson_path)
-                    
-                    # Find the department name column
-                    name_column = None
-                    for col in ['NAME_1', 'ADM1_NAME', 'name', 'Name', 'ADM1_EN']:
-                        if col in benin_gdf.columns:
-                            name_column = col
-                            break
-                    
-                    if name_column:
-                        # Map airtime data to departments
-                        airtime_dict = dict(zip(regional_airtime['region'], regional_airtime[selected_col]))
-                        benin_gdf['kpi_value'] = benin_gdf[name_column].map(airtime_dict)
-                        benin_gdf['department'] = benin_gdf[name_column]
-                        
-                        # Create choropleth
-                        fig_map = px.choropleth(
-                            benin_gdf,
-                            geojson=benin_gdf.geometry,
-                            locations=benin_gdf.index,
-                            color='kpi_value',
-                            hover_name='department',
-                            hover_data={'kpi_value': ':.2f'},
-                            color_continuous_scale='YlOrRd',
-                            labels={'kpi_value': airtime_map_kpi}
-                        )
-                else:
-                    # Use regular JSON loading
-                    with open(geojson_path) as f:
-                        benin_geo = json.load(f)
-                    
-                    map_df = regional_airtime[['region', selected_col]].copy()
-                    map_df = map_df.rename(columns={'region': 'department', selected_col: 'kpi_value'})
-                    
-                    fig_map = px.choropleth(
-                        map_df,
-                        geojson=benin_geo,
-                        locations='department',
-                        featureidkey='properties.NAME_1',
-                        color='kpi_value',
-                        hover_name='department',
-                        hover_data={'kpi_value': ':.2f'},
-                        color_continuous_scale='YlOrRd',
-                        labels={'kpi_value': airtime_map_kpi}
-                    )
+            map_df = regional_airtime[['region', selected_col]].rename(columns={selected_col: 'kpi_value'})
+            def build_map():
+                fig_map = build_region_choropleth(map_df, airtime_map_kpi, ':.2f', zoom='medium')
                 
                 # Update layout
                 fig_map.update_geos(
@@ -1338,39 +3972,37 @@ def render_airtime_sales_content(data):
                     plot_bgcolor='white',
                     font=dict(family='Segoe UI', size=10)
                 )
-                
-                st.plotly_chart(fig_map, use_container_width=True, config={'displayModeBar': False})
-                
-                # Add quick stats below map - display sequentially to avoid nested columns
-                st.markdown("<br>", unsafe_allow_html=True)
-                
-                top_region = regional_airtime.nlargest(1, selected_col)['region'].values[0]
-                top_value = regional_airtime.nlargest(1, selected_col)[selected_col].values[0]
-                avg_value = regional_airtime[selected_col].mean()
-                total_value = regional_airtime[selected_col].sum()
-                
-                st.markdown(f"""
-                <div style="display: flex; gap: 10px; margin-top: 10px;">
-                    <div style="flex: 1; background: #F8F8F8; padding: 10px; border-radius: 4px; text-align: center;">
-                        <div style="font-size: 10px; color: #666; margin-bottom: 4px;">🏆 Top Region</div>
-                        <div style="font-size: 14px; font-weight: 600; color: #000;">{top_region}</div>
-                        <div style="font-size: 12px; color: #4CAF50; font-weight: 600;">{top_value:.2f}M</div>
-                    </div>
-                    <div style="flex: 1; background: #F8F8F8; padding: 10px; border-radius: 4px; text-align: center;">
-                        <div style="font-size: 10px; color: #666; margin-bottom: 4px;">📊 Average</div>
-                        <div style="font-size: 14px; font-weight: 600; color: #000;">{avg_value:.2f}M</div>
-                        <div style="font-size: 11px; color: #666;">Across regions</div>
-                    </div>
-                    <div style="flex: 1; background: #F8F8F8; padding: 10px; border-radius: 4px; text-align: center;">
-                        <div style="font-size: 10px; color: #666; margin-bottom: 4px;">📈 Total</div>
-                        <div style="font-size: 14px; font-weight: 600; color: #000;">{total_value:.2f}M</div>
-                        <div style="font-size: 11px; color: #666;">National</div>
-                    </div>
+                return fig_map
+            
+            show_figure(source, filters, load_airtime_sales_data, ('map', airtime_map_kpi), build_map)
+            
+            # Add quick stats below map - display sequentially to avoid nested columns
+            st.markdown("<br>", unsafe_allow_html=True)
+            
+            stats = rank_regions(regional_airtime, selected_col)
+            top_region, top_value = stats['top_region'], stats['top_value']
+            avg_value, total_value = stats['average'], stats['total']
+            
+            st.markdown(f"""
+            <div style="display: flex; gap: 10px; margin-top: 10px;">
+                <div style="flex: 1; background: #F8F8F8; padding: 10px; border-radius: 4px; text-align: center;">
+                    <div style="font-size: 10px; color: #666; margin-bottom: 4px;">🏆 Top Region</div>
+                    <div style="font-size: 14px; font-weight: 600; color: #000;">{top_region}</div>
+                    <div style="font-size: 12px; color: #4CAF50; font-weight: 600;">{top_value:.2f}M</div>
                 </div>
-                """, unsafe_allow_html=True)
+                <div style="flex: 1; background: #F8F8F8; padding: 10px; border-radius: 4px; text-align: center;">
+                    <div style="font-size: 10px; color: #666; margin-bottom: 4px;">📊 Average</div>
+                    <div style="font-size: 14px; font-weight: 600; color: #000;">{avg_value:.2f}M</div>
+                    <div style="font-size: 11px; color: #666;">Across regions</div>
+                </div>
+                <div style="flex: 1; background: #F8F8F8; padding: 10px; border-radius: 4px; text-align: center;">
+                    <div style="font-size: 10px; color: #666; margin-bottom: 4px;">📈 Total</div>
+                    <div style="font-size: 14px; font-weight: 600; color: #000;">{total_value:.2f}M</div>
+                    <div style="font-size: 11px; color: #666;">National</div>
+                </div>
+            </div>
+            """, unsafe_allow_html=True)
             
-            else:
-                raise FileNotFoundError("GeoJSON file not found")
                 
         except Exception as e:
             # Fallback: Display simple message without chart
@@ -1379,10 +4011,9 @@ def render_airtime_sales_content(data):
             # Show only the quick stats using HTML to avoid nested columns
             st.markdown("<br>", unsafe_allow_html=True)
             
-            top_region = regional_airtime.nlargest(1, selected_col)['region'].values[0]
-            top_value = regional_airtime.nlargest(1, selected_col)[selected_col].values[0]
-            avg_value = regional_airtime[selected_col].mean()
-            total_value = regional_airtime[selected_col].sum()
+            stats = rank_regions(regional_airtime, selected_col)
+            top_region, top_value = stats['top_region'], stats['top_value']
+            avg_value, total_value = stats['average'], stats['total']
             
             st.markdown(f"""
             <div style="display: flex; gap: 10px; margin-top: 10px;">
@@ -1404,6 +4035,57 @@ def render_airtime_sales_content(data):
             </div>
             """, unsafe_allow_html=True)
     
+    # Hourly Sales Pattern - when sales peak, for pre-positioning float ahead of the rush
+    st.markdown('<br><div class="chart-title">⏰ Hourly Sales Pattern</div>', unsafe_allow_html=True)
+    
+    col_hourly_selector, col_empty = st.columns([2, 3])
+    with col_hourly_selector:
+        hourly_measure = st.selectbox(
+            "Select Measure",
+            ["Sales (M XOF)", "Transactions"],
+            key="airtime_hourly_measure_selector"
+        )
+    hourly = data['hourly']['amounts' if hourly_measure == "Sales (M XOF)" else 'counts']
+    
+    col_heatmap, col_hours = st.columns([3, 2])
+    
+    with col_heatmap:
+        def build_heatmap():
+            fig_heatmap = mtn_figure(data=[go.Heatmap(
+                z=hourly['week'].values,
+                x=[f"{hour:02d}h" for hour in hourly['week'].columns],
+                y=hourly['week'].index,
+                colorscale='YlOrRd',
+                colorbar=dict(title=hourly_measure, thickness=12),
+                hovertemplate='%{y} %{x}<br>%{z:,.2f}<extra></extra>'
+            )])
+            fig_heatmap.update_layout(
+                height=320,
+                margin=dict(l=40, r=20, t=20, b=40),
+                yaxis=dict(autorange='reversed'),
+                hovermode='closest'
+            )
+            return fig_heatmap
+        
+        show_figure(source, filters, load_airtime_sales_data, ('hourly_heatmap', hourly_measure), build_heatmap)
+    
+    with col_hours:
+        # The three busiest hours of an average day stand out in yellow
+        by_hour = hourly['day']
+        peaks = by_hour.nlargest(3).index
+        
+        def build_hours():
+            fig_hours = mtn_figure('bar', data=[go.Bar(
+                x=[f"{hour:02d}h" for hour in by_hour.index],
+                y=by_hour.values,
+                marker=dict(color=[MTN_YELLOW if hour in peaks else MTN_GRAY for hour in by_hour.index])
+            )])
+            fig_hours.update_layout(height=320, yaxis_title=f"Avg {hourly_measure} per day")
+            return fig_hours
+        
+        show_figure(source, filters, load_airtime_sales_data, ('hourly_profile', hourly_measure), build_hours)
+        st.caption(f"Peak hours: {', '.join(f'{hour:02d}h' for hour in sorted(peaks))}")
+    
     # Daily Performance Table - Last 7 Days with All Channels
     st.markdown('<br><div class="chart-title">📋 Daily Performance - Select KPI (Last 7 Days)</div>', unsafe_allow_html=True)
     
@@ -1417,127 +4099,64 @@ def render_airtime_sales_content(data):
             key="airtime_daily_kpi_selector"
         )
     
-    # Generate daily performance data
-    last_7_days = pd.date_range(end=datetime.now(), periods=7, freq='D')
-    
-    # Map KPI selection to data generation and formatting
-    kpi_data_map = {
-        "Total Sales": {
-            'values': np.random.uniform(5.0, 6.5, 7),
-            'format': lambda x: f"{x:.2f}M",
-            'suffix': 'M XOF'
-        },
-        "Total Volume": {
-            'values': np.random.randint(2500, 3200, 7),
-            'format': lambda x: f"{x:,.0f}",
-            'suffix': ''
-        },
-        "MoMo": {
-            'values': np.random.uniform(1.3, 1.8, 7),
-            'format': lambda x: f"{x:.2f}M",
-            'suffix': 'M XOF'
-        },
-        "EVD": {
-            'values': np.random.uniform(1.1, 1.5, 7),
-            'format': lambda x: f"{x:.2f}M",
-            'suffix': 'M XOF'
-        },
-        "DTC": {
-            'values': np.random.uniform(0.9, 1.3, 7),
-            'format': lambda x: f"{x:.2f}M",
-            'suffix': 'M XOF'
-        },
-        "DTR": {
-            'values': np.random.uniform(0.8, 1.1, 7),
-            'format': lambda x: f"{x:.2f}M",
-            'suffix': 'M XOF'
-        },
-        "Xtratime": {
-            'values': np.random.uniform(0.3, 0.5, 7),
-            'format': lambda x: f"{x:.2f}M",
-            'suffix': 'M XOF'
-        }
-    }
-    
-    kpi_config = kpi_data_map[selected_airtime_kpi]
-    kpi_values = kpi_config['values']
-    
-    # Create daily performance DataFrame for selected KPI
-    daily_performance = pd.DataFrame({
-        'Date': last_7_days.strftime('%d %b'),
-        selected_airtime_kpi: kpi_values,
-        'DoD %': np.random.uniform(-5, 10, 7),
-        'MoM %': np.random.uniform(-8, 12, 7),
+    # Daily statistics of the selected KPI from the comparison engine
+    if selected_airtime_kpi == "Total Volume":
+        daily_stats = data['comparisons']['daily']['transactions']
+        kpi_format = '{:,.0f}'
+    elif selected_airtime_kpi == "Total Sales":
+        daily_stats = data['comparisons']['daily']['airtime_sales']
+        kpi_format = '{:.2f}M'
+    else:
+        daily_stats = data['channel_comparisons'][selected_airtime_kpi]['daily']['airtime_sales']
+        kpi_format = '{:.2f}M'
+    
+    # Variance columns coloured on the CBU dashboard scale
+    render_daily_table(source, filters, load_airtime_sales_data, selected_airtime_kpi, lambda: daily_table_html([
+        ('Date', daily_stats.index.strftime('%d %b'), None, False),
+        (selected_airtime_kpi, daily_stats['value'].values, kpi_format, False),
+        ('DoD %', daily_stats['dod'].values, '{:+.1f}%', True),
+        ('MoM %', daily_stats['mom'].values, '{:+.1f}%', True)
+    ], 'cbu', missing='N/A'))
+
+
+def load_float_management_data(source, filters):
+    """Query the Float Management page: window totals and the 30-day float split by channel"""
+    start, end, where = filters.start, filters.end, filters.where
+    panels = run_panels(load_float_management_data, {
+        'by_channel': lambda: source.query(
+            'float', ['float_distributed'], by=['channel'], start=start, end=end, where=where
+        ),
+        'trend': lambda: source.query(
+            'float', ['float_distributed'], by=['date', 'channel'], start=end - pd.Timedelta(days=29), end=end,
+            where=where
+        ),
+        'comparisons': lambda: kpi_comparisons(source, ['float_distributed'], filters, days=0),
+        'agent_comparisons': lambda: kpi_comparisons(
+            source, ['float_distributed'], filters, days=0, where={**where, 'channel': 'Agents'}
+        )
     })
-    
-    # Format display DataFrame
-    display_df = daily_performance.copy()
-    
-    # Format the KPI values
-    display_df[selected_airtime_kpi] = display_df[selected_airtime_kpi].apply(kpi_config['format'])
-    
-    # Format the variance columns with +/- signs
-    for col in ['DoD %', 'MoM %']:
-        display_df[col] = display_df[col].apply(lambda x: f"{x:+.1f}%")
-    
-    # Color function for variance columns (matching CBU dashboard)
-    def get_color_for_percentage(value):
-        """Return color based on percentage value"""
-        if value >= 5:
-            return '#107C10'  # Green
-        elif value >= 2:
-            return '#FFA500'  # Orange
-        elif value >= -2:
-            return '#FFD700'  # Yellow
-        else:
-            return '#D13438'  # Red
-    
-    def color_variance(val):
-        """Apply color to variance cells"""
-        if pd.isna(val) or val == '-':
-            return ''
-        try:
-            # Extract numeric value from formatted string
-            num_val = float(val.replace('%', '').replace('+', ''))
-            color = get_color_for_percentage(num_val)
-            return f'background-color: {color}; color: white; font-weight: bold; padding: 4px;'
-        except:
-            return ''
-    
-    # Apply styling only to variance columns
-    styled_df = display_df.style.applymap(
-        color_variance,
-        subset=['DoD %', 'MoM %']
-    ).set_properties(**{
-        'text-align': 'center',
-        'font-size': '11px',
-        'border': '1px solid #E0E0E0'
-    }).set_table_styles([
-        {'selector': 'th', 'props': [
-            ('background-color', '#000000'),
-            ('color', '#FFCB05'),
-            ('font-weight', 'bold'),
-            ('text-align', 'center'),
-            ('font-size', '10px'),
-            ('padding', '8px')
-        ]},
-        {'selector': 'td', 'props': [
-            ('padding', '6px')
-        ]}
-    ])
-    
-    st.dataframe(styled_df, use_container_width=True, height=350)
+    by_channel = panels['by_channel']
+    return {
+        'total': by_channel['float_distributed'].sum(),
+        'by_channel': by_channel.set_index('channel')['float_distributed'],
+        'comparisons': panels['comparisons']['window'],
+        'agent_comparisons': panels['agent_comparisons']['window'],
+        'trend': panels['trend'].pivot(index='date', columns='channel', values='float_distributed')
+    }
 
 
-def render_float_management_content(data):
+def render_float_management_content(source, filters):
     """Render Float Management page content"""
+    data = get_page_data(load_float_management_data, source, filters)
     
     col1, col2, col3, col4 = st.columns(4)
     
     with col1:
-        st.metric("Total Float", f"{data['kpi_data']['float_distributed']:.1f}M XOF", "+7.5%")
+        st.metric("Total Float", f"{data['total']:.1f}M XOF",
+                  f"{format_change(data['comparisons']['float_distributed']['mom'])} MoM")
     with col2:
-        st.metric("Float - Agents", "145.8M XOF", "+6.2%")
+        st.metric("Float - Agents", f"{data['by_channel']['Agents']:.1f}M XOF",
+                  f"{format_change(data['agent_comparisons']['float_distributed']['mom'])} MoM")
     with col3:
         st.metric("Utilization Rate", "83.5%", "+3.2%")
     with col4:
@@ -1545,703 +4164,678 @@ def render_float_management_content(data):
     
     st.markdown('<div class="chart-title">📈 Float Distribution Trend</div>', unsafe_allow_html=True)
     
-    fig_float = go.Figure()
-    
-    categories = ['Agents', 'Dealers', 'Retailers', 'Direct']
-    colors = [MTN_YELLOW, MTN_BLACK, MTN_DARK_GRAY, MTN_GRAY]
-    
-    for i, category in enumerate(categories):
-        fig_float.add_trace(go.Scatter(
-            x=data['trend_data']['date'][-30:],
-            y=np.random.uniform(2, 8, 30) * (4 - i),
-            name=category,
-            mode='lines',
-            stackgroup='one',
-            fillcolor=colors[i],
-            line=dict(color=colors[i], width=0)
-        ))
-    
-    fig_float.update_layout(
-        height=380,
-        **get_mtn_plotly_theme()['layout'],
-        margin=dict(l=40, r=40, t=20, b=40)
-    )
+    def build_float():
+        fig_float = mtn_figure('bar')
+        
+        categories = FLOAT_CHANNELS
+        colors = [MTN_YELLOW, MTN_BLACK, MTN_DARK_GRAY, MTN_GRAY]
+        
+        for i, category in enumerate(categories):
+            fig_float.add_trace(go.Scatter(
+                x=data['trend'].index,
+                y=data['trend'][category],
+                name=category,
+                mode='lines',
+                stackgroup='one',
+                fillcolor=colors[i],
+                line=dict(color=colors[i], width=0)
+            ))
+        
+        fig_float.update_layout(height=380)
+        return fig_float
     
-    st.plotly_chart(fig_float, use_container_width=True, config={'displayModeBar': False})
+    show_figure(source, filters, load_float_management_data, ('trend',), build_float)
 
-def render_agent_network_content(data):
+def load_agent_network_data(source, filters):
+    """Query the Agent Network page: agent stock, movements and regional distribution"""
+    start, end, where = filters.start, filters.end, filters.where
+    panels = run_panels(load_agent_network_data, {
+        'totals': lambda: source.kpi_totals(
+            ['agents', 'active_agents', 'new_agents', 'churned_agents'], start, end, where=where
+        ),
+        'regional': lambda: source.kpi_totals(['agents'], start, end, by=['region'], where=where),
+        'comparisons': lambda: kpi_comparisons(source, ['agents', 'new_agents', 'churned_agents'], filters, days=0)
+    })
+    return {'totals': panels['totals'], 'comparisons': panels['comparisons']['window'], 'regional': panels['regional']}
+
+
+def render_agent_network_content(source, filters):
     """Render Agent Network page content"""
+    data = get_page_data(load_agent_network_data, source, filters)
+    totals = data['totals']
+    comparisons = data['comparisons']
+    
+    # Agent GPS points are indexed once per process; per-commune density is cached with the page data
+    locations = get_agent_locations(source)
+    if locations is not None:
+        areas = page_artifact(
+            source, filters, load_agent_network_data, ('density',), lambda: locations.density(filters.region)
+        )
     
     col1, col2, col3, col4, col5, col6 = st.columns(6)
     
     with col1:
-        st.metric("Total Agents", f"{data['kpi_data']['total_agents']:,}", "+125")
+        st.metric("Total Agents", f"{totals['agents']:,.0f}", f"{format_change(comparisons['agents']['mom'])} MoM")
     with col2:
-        st.metric("New Agents", "125", "+15")
+        st.metric("New Agents", f"{totals['new_agents']:,.0f}", f"{format_change(comparisons['new_agents']['mom'])} MoM")
     with col3:
-        st.metric("Churn", "85", "-12")
+        st.metric("Churn", f"{totals['churned_agents']:,.0f}", f"{format_change(comparisons['churned_agents']['mom'])} MoM")
     with col4:
-        st.metric("Net Growth", "40", "+3")
+        st.metric("Net Growth", f"{totals['new_agents'] - totals['churned_agents']:,.0f}", "+3")
     with col5:
-        st.metric("Activation Rate", "87.2%", "+2.1%")
+        st.metric("Activation Rate", f"{totals['active_agents'] / totals['agents'] * 100:.1f}%", "+2.1%")
     with col6:
-        st.metric("Per 1K Pop", "3.8", "+0.2")
+        if locations is None:
+            st.metric("Per 100 km²", "N/A")
+        else:
+            empty = int((areas['agents'] == 0).sum())
+            st.metric(
+                "Per 100 km²", f"{areas['agents'].sum() / areas['area_km2'].sum() * 100:.1f}",
+                f"{empty} commune{'' if empty == 1 else 's'} without agents", delta_color="off"
+            )
     
     st.markdown('<div class="chart-title">🗺️ Agent Distribution</div>', unsafe_allow_html=True)
     
-    # Simple bar chart for agent distribution instead of complex map
-    fig_agents = px.bar(
-        data['regional_data'].sort_values('agents', ascending=True),
-        y='region',
-        x='agents',
-        orientation='h',
-        color='agents',
-        color_continuous_scale=[[0, '#D32F2F'], [0.5, '#FFEB3B'], [1, '#4CAF50']],
-        text='agents'
-    )
+    # Density and coverage views need the agent spatial index, so they are offered only when it is available
+    col_view, col_empty = st.columns([2, 3])
+    with col_view:
+        view = st.selectbox(
+            "Select View",
+            ["Agents by Region"] + (["Density by Commune", "Coverage Gaps"] if locations is not None else []),
+            key="agent_map_view"
+        )
     
-    fig_agents.update_traces(texttemplate='%{text:,.0f}', textposition='outside')
-    fig_agents.update_layout(
-        height=500,
-        **get_mtn_plotly_theme()['layout'],
-        showlegend=False,
-        coloraxis_showscale=False,
-        margin=dict(l=100, r=40, t=20, b=40),
-        xaxis=dict(showgrid=True, gridcolor='#F0F0F0', title='Number of Agents'),
-        yaxis=dict(showgrid=False, title='')
-    )
+    def map_layout(fig, title):
+        fig.update_geos(fitbounds='locations', visible=False, projection_type='mercator')
+        fig.update_layout(
+            height=550,
+            margin={'l': 10, 'r': 10, 't': 10, 'b': 50},
+            coloraxis_colorbar=dict(title=title, orientation='h', y=-0.12, x=0.5, xanchor='center', thickness=15, len=0.6),
+            paper_bgcolor='white',
+            font=dict(family='Segoe UI', size=11)
+        )
+        return fig
+    
+    if view == "Density by Commune":
+        def build_density():
+            geometry = get_drill_geometry('commune')
+            departments = [filters.region] if filters.region else list(geometry)
+            geojson = {'type': 'FeatureCollection', 'features': [
+                feature for department in departments for feature in geometry.get(department, {'features': []})['features']
+            ]}
+            map_df = areas.rename(columns={'commune': 'area', 'per_100km2': 'kpi_value'})
+            fig_density = build_area_choropleth(map_df, geojson, 'area', 'Agents / 100 km²', ':,.1f')
+            # Cities are orders of magnitude denser than rural communes; cap the scale so both stay readable
+            fig_density.update_coloraxes(cmin=0, cmax=max(np.percentile(map_df['kpi_value'], 90), 1))
+            return map_layout(fig_density, 'Agents / 100 km²')
+        
+        show_figure(source, filters, load_agent_network_data, ('density',), build_density)
+        
+        st.markdown("<br>", unsafe_allow_html=True)
+        col_stat1, col_stat2, col_stat3, col_stat4 = st.columns(4)
+        densest = areas.loc[areas['per_100km2'].idxmax()]
+        sparsest = areas.loc[areas['per_100km2'].idxmin()]
+        with col_stat1:
+            st.metric("🏆 Densest Commune", densest['commune'], f"{densest['per_100km2']:,.1f} per 100 km²")
+        with col_stat2:
+            st.metric("📊 Median Commune", f"{areas['per_100km2'].median():,.1f}", "Agents per 100 km²")
+        with col_stat3:
+            st.metric("📈 Located Agents", f"{areas['agents'].sum():,.0f}", f"Over {areas['area_km2'].sum():,.0f} km²")
+        with col_stat4:
+            st.metric("📉 Sparsest Commune", sparsest['commune'], f"{sparsest['per_100km2']:,.1f}")
+    
+    elif view == "Coverage Gaps":
+        coverage = page_artifact(
+            source, filters, load_agent_network_data, ('coverage',), lambda: locations.coverage(filters.region)
+        )
+        
+        def build_coverage():
+            departments = [filters.region] if filters.region else REGIONS
+            fig_coverage = go.Figure()
+            # Department outlines under the sampled land, each sample coloured by its distance to the nearest agent
+            fig_coverage.add_trace(go.Choropleth(
+                geojson=get_benin_geometry()['detail'],
+                locations=departments,
+                z=[0] * len(departments),
+                colorscale=[[0, 'rgba(0,0,0,0)'], [1, 'rgba(0,0,0,0)']],
+                showscale=False,
+                marker_line_color=MTN_DARK_GRAY,
+                hoverinfo='skip'
+            ))
+            fig_coverage.add_trace(go.Scattergeo(
+                lon=coverage['lon'],
+                lat=coverage['lat'],
+                text=coverage['commune'],
+                mode='markers',
+                marker=dict(
+                    size=5, symbol='square', color=coverage['distance_km'], cmin=0, cmax=2 * COVERAGE_GAP_KM,
+                    colorscale='YlOrRd',
+                    colorbar=dict(title='km to nearest agent', orientation='h', y=-0.12, x=0.5, xanchor='center',
+                                  thickness=15, len=0.6)
+                ),
+                hovertemplate='%{text}<br>%{marker.color:.1f} km to nearest agent<extra></extra>'
+            ))
+            return map_layout(fig_coverage, 'km to nearest agent')
+        
+        show_figure(source, filters, load_agent_network_data, ('coverage',), build_coverage)
+        
+        st.markdown("<br>", unsafe_allow_html=True)
+        col_stat1, col_stat2, col_stat3, col_stat4 = st.columns(4)
+        gaps = coverage[coverage['distance_km'] > COVERAGE_GAP_KM]
+        farthest = coverage.loc[coverage['distance_km'].idxmax()]
+        with col_stat1:
+            st.metric(
+                "🚩 Land in Gaps", f"{len(gaps) / max(len(coverage), 1) * 100:.1f}%", f"Over {COVERAGE_GAP_KM} km from an agent"
+            )
+        with col_stat2:
+            st.metric("📊 Median Distance", f"{coverage['distance_km'].median():.1f} km", "To the nearest agent")
+        with col_stat3:
+            st.metric("📉 Farthest Point", f"{farthest['distance_km']:.1f} km", farthest['commune'])
+        with col_stat4:
+            worst = gaps['commune'].value_counts()
+            if len(worst):
+                st.metric("🗺️ Most Gap Area", worst.index[0], f"{worst.iloc[0]} sample cells")
+            else:
+                st.metric("🗺️ Most Gap Area", "None", "No gaps")
     
-    st.plotly_chart(fig_agents, use_container_width=True, config={'displayModeBar': False})
+    else:
+        # Simple bar chart for agent distribution instead of complex map
+        def build_agents():
+            import plotly.express as px
+            fig_agents = px.bar(
+                data['regional'].sort_values('agents', ascending=True),
+                y='region',
+                x='agents',
+                orientation='h',
+                color='agents',
+                color_continuous_scale=[[0, '#D32F2F'], [0.5, '#FFEB3B'], [1, '#4CAF50']],
+                text='agents'
+            )
+            
+            fig_agents.update_traces(texttemplate='%{text:,.0f}', textposition='outside')
+            fig_agents.update_layout(
+                height=500,
+                showlegend=False,
+                coloraxis_showscale=False,
+                margin=dict(l=100, r=40, t=20, b=40),
+                xaxis=dict(showgrid=True, gridcolor='#F0F0F0', title='Number of Agents'),
+                yaxis=dict(showgrid=False, title='')
+            )
+            return fig_agents
+        
+        show_figure(source, filters, load_agent_network_data, ('regional',), build_agents)
+
+def load_agent_performance_data(source, filters):
+    """Query the Agent Performance page: agent activity, revenue and productivity by tier
+
+    Activity, revenue and tiers come from the agent store; the previous
+    window of the same length gives the metric deltas.
+    """
+    start, end, where = filters.start, filters.end, filters.where
+    panels = run_panels(load_agent_performance_data, {
+        'totals': lambda: source.kpi_totals(['agents', 'active_agents'], start, end, where=where),
+        'current': lambda: source.agent_store.summary(start, end, where),
+        'previous': lambda: source.agent_store.summary(
+            start - (end - start) - pd.Timedelta(days=1), start - pd.Timedelta(days=1), where
+        )
+    })
+    totals, current, previous = panels['totals'], panels['current'], panels['previous']
+    tiers = current['tiers']
+    tiers['tier'] = tiers['tier'].map({
+        'Gold': 'Gold (Top 10%)', 'Silver': 'Silver (Next 20%)',
+        'Bronze': 'Bronze (Next 30%)', 'Inactive': 'Inactive (40%)'
+    })
+    return {'totals': totals, 'agents': current, 'previous': previous, 'agent_tiers': tiers}
+
 
-def render_agent_performance_content(data):
+def render_agent_performance_content(source, filters):
     """Render Agent Performance page content"""
+    data = get_page_data(load_agent_performance_data, source, filters)
+    totals, agents, previous = data['totals'], data['agents'], data['previous']
+    
+    def delta(key, unit=''):
+        change = agents[key] - previous[key]
+        return "N/A" if pd.isna(change) else f"{change:+.1f}{unit}"
     
     col1, col2, col3, col4, col5, col6 = st.columns(6)
     
     with col1:
-        st.metric("Active", "3,850", "85.6%")
+        st.metric("Active", f"{totals['active_agents']:,.0f}", f"{totals['active_agents'] / totals['agents'] * 100:.1f}%")
     with col2:
-        st.metric("Selling Airtime", "92.3%", "+1.8%")
+        st.metric("Selling Airtime", f"{agents['sells_airtime']:.1f}%", delta('sells_airtime', '%'))
     with col3:
-        st.metric("Registering SIMs", "78.5%", "+2.3%")
+        st.metric("Registering SIMs", f"{agents['registers_sims']:.1f}%", delta('registers_sims', '%'))
     with col4:
-        st.metric("Multi-Service", "65.2%", "+4.1%")
+        st.metric("Multi-Service", f"{agents['multi_service']:.1f}%", delta('multi_service', '%'))
     with col5:
-        st.metric("Avg Revenue", "40.6K XOF", "+3.2K")
+        st.metric("Avg Revenue", f"{agents['avg_revenue']:.1f}K XOF", delta('avg_revenue', 'K'))
     with col6:
-        st.metric("Productivity", "74.5", "+2.3")
+        st.metric("Productivity", f"{agents['productivity']:.1f}", delta('productivity'))
     
     st.markdown('<div class="chart-title">🏆 Agent Performance by Tier</div>', unsafe_allow_html=True)
     
     col1, col2 = st.columns(2)
     
     with col1:
-        fig_revenue = go.Figure(data=[go.Bar(
-            y=data['agent_tiers']['tier'],
-            x=data['agent_tiers']['avg_revenue'],
-            orientation='h',
-            marker=dict(color=[MTN_BLACK, MTN_YELLOW, MTN_DARK_GRAY, MTN_GRAY])
-        )])
-        
-        fig_revenue.update_layout(
-            height=320,
-            **get_mtn_plotly_theme()['layout'],
-            margin=dict(l=40, r=40, t=20, b=40)
-        )
+        def build_revenue():
+            fig_revenue = mtn_figure('bar', data=[go.Bar(
+                y=data['agent_tiers']['tier'],
+                x=data['agent_tiers']['avg_revenue'],
+                orientation='h',
+                marker=dict(color=[MTN_BLACK, MTN_YELLOW, MTN_DARK_GRAY, MTN_GRAY])
+            )])
+            
+            fig_revenue.update_layout(height=320)
+            return fig_revenue
         
-        st.plotly_chart(fig_revenue, use_container_width=True, config={'displayModeBar': False})
+        show_figure(source, filters, load_agent_performance_data, ('tier_revenue',), build_revenue)
     
     with col2:
-        fig_productivity = go.Figure(data=[go.Bar(
-            y=data['agent_tiers']['tier'],
-            x=data['agent_tiers']['productivity_score'],
-            orientation='h',
-            marker=dict(
-                color=data['agent_tiers']['productivity_score'],
-                colorscale=[[0, MTN_GRAY], [0.5, MTN_YELLOW], [1, MTN_BLACK]],
-                showscale=False
-            )
-        )])
-        
-        fig_productivity.update_layout(
-            height=320,
-            **get_mtn_plotly_theme()['layout'],
-            margin=dict(l=40, r=40, t=20, b=40)
-        )
+        def build_productivity():
+            fig_productivity = mtn_figure('bar', data=[go.Bar(
+                y=data['agent_tiers']['tier'],
+                x=data['agent_tiers']['productivity_score'],
+                orientation='h',
+                marker=dict(
+                    color=data['agent_tiers']['productivity_score'],
+                    colorscale=[[0, MTN_GRAY], [0.5, MTN_YELLOW], [1, MTN_BLACK]],
+                    showscale=False
+                )
+            )])
+            
+            fig_productivity.update_layout(height=320)
+            return fig_productivity
         
-        st.plotly_chart(fig_productivity, use_container_width=True, config={'displayModeBar': False})
+        show_figure(source, filters, load_agent_performance_data, ('tier_productivity',), build_productivity)
 
-def render_acquisition_content(data):
-    """Render Acquisition page content"""
-    
-    col1, col2, col3, col4 = st.columns(4)
-    
-    with col1:
-        st.metric("New Additions", "25.15K", "+2.1%")
-    with col2:
-        st.metric("Net Addition", "10.55K", "-44.52%")
-    with col3:
-        st.metric("Churn", "36.55K", "-5.94%")
-    with col4:
-        st.metric("Net Churn", "19.15K", "-31.9%")
-    
-    st.markdown('<div class="chart-title">📈 Acquisition Trends</div>', unsafe_allow_html=True)
-    
-    # Simple line chart
-    fig_acq = go.Figure()
-    
-    fig_acq.add_trace(go.Scatter(
-        x=data['trend_data']['date'][-30:],
-        y=np.random.uniform(20000, 30000, 30),
-        name='New Additions',
-        mode='lines+markers',
-        line=dict(color=MTN_YELLOW, width=3)
-    ))
-    
-    fig_acq.add_trace(go.Scatter(
-        x=data['trend_data']['date'][-30:],
-        y=np.random.uniform(30000, 45000, 30),
-        name='Churn',
-        mode='lines+markers',
-        line=dict(color='#D32F2F', width=3)
-    ))
-    
-    fig_acq.update_layout(
-        height=400,
-        **get_mtn_plotly_theme()['layout'],
-        margin=dict(l=40, r=40, t=20, b=40)
-    )
-    
-    st.plotly_chart(fig_acq, use_container_width=True, config={'displayModeBar': False})
+ACQUISITION_KPIS = {
+    "New Additions": ('gross_adds', 'budget_gross_adds'),
+    "Net Adds": ('net_adds', 'budget_net_adds'),
+    "Churn": ('churners', 'budget_churners'),
+    "Net Churn": ('net_churn', 'budget_net_churn'),
+    "Reconnection": ('reconnections', 'budget_reconnections')
+}
 
-def render_acquisition_content(data):
-    """Render Acquisition page content - Enhanced with Power BI inspiration"""
-    
-    # Top KPI Cards Row - Using standard MTN card format
-    st.markdown('<div style="margin-bottom: 20px;">', unsafe_allow_html=True)
-    col1, col2, col3, col4, col5 = st.columns(5)
-    
-    with col1:
-        st.markdown(create_mtn_kpi_card(
-            "New Additions",
-            25150,
-            "",
-            7.5,
-            {'ytd': '670.5K', 'wow': '+2.1%', 'mom': '+5.8%'}
-        ), unsafe_allow_html=True)
-    
-    with col2:
-        st.markdown(create_mtn_kpi_card(
-            "Net Adds",
-            10550,
-            "",
-            5.5,
-            {'ytd': '286.2K', 'wow': '+3.2%', 'mom': '+4.1%'}
-        ), unsafe_allow_html=True)
-    
-    with col3:
-        st.markdown(create_mtn_kpi_card(
-            "Churn",
-            36550,
-            "",
-            -3.8,
-            {'ytd': '2.08M', 'wow': '-2.4%', 'mom': '-3.8%'}
-        ), unsafe_allow_html=True)
-    
-    with col4:
-        st.markdown(create_mtn_kpi_card(
-            "Net Churn",
-            19150,
-            "",
-            -4.2,
-            {'ytd': '1.15M', 'wow': '-3.1%', 'mom': '-4.2%'}
-        ), unsafe_allow_html=True)
-    
-    with col5:
-        st.markdown(create_mtn_kpi_card(
-            "Reconnection",
-            17400,
-            "",
-            16.0,
-            {'ytd': '929.9K', 'wow': '+12.5%', 'mom': '+16.0%'}
-        ), unsafe_allow_html=True)
-    
-    st.markdown('</div>', unsafe_allow_html=True)
-    
-    # Main Content Row - Three Columns: Trend Chart, Market Share, Share of Gross Adds
+
+def acquisition_panels(source, filters):
+    """Panel queries of the Acquisition page: window KPIs, 60-day trends, market share and regional split"""
+    start, end, where = filters.start, filters.end, filters.where
+    measures = [m for pair in ACQUISITION_KPIS.values() for m in pair]
+
+    def regional():
+        return source.kpi_totals(
+            ['gross_adds', 'net_adds', 'churners', 'net_churn'], start, end, by=['region'], where=where
+        ).rename(columns={
+            'gross_adds': 'New Additions', 'net_adds': 'Net Adds', 'churners': 'Churn', 'net_churn': 'Net Churn'
+        })
+
+    return {
+        'comparisons': lambda: kpi_comparisons(source, [kpi for kpi, _ in ACQUISITION_KPIS.values()], filters),
+        'trend': lambda: source.kpi_series(measures + ['mpos_active'], end - pd.Timedelta(days=59), end, where=where),
+        'market': lambda: source.kpi_totals(['market_share'], end, end, where=where),
+        'regional': regional
+    }
+
+
+def load_acquisition_data(source, filters):
+    """Query the Acquisition page: every panel of `acquisition_panels`, run concurrently"""
+    return run_panels(load_acquisition_data, acquisition_panels(source, filters))
+
+
+def render_acquisition_content(source, filters):
+    """Render Acquisition page content - Enhanced with Power BI inspiration
+
+    Each panel is drawn as soon as its query lands, so the fast panels
+    show while the slowest query is still running.
+    """
+    # Slots in page order: Top KPI Cards Row, then Trend Chart, Market Share and Regional Map, then the daily table
+    kpi_row = st.container()
     col1, col2, col3 = st.columns([2, 1, 1])
+    daily = st.container()
     
-    with col1:
-        # KPI selector with title
-        st.markdown('<div class="chart-title">📈 Monthly Trend - Acquisition & Drivers</div>', unsafe_allow_html=True)
-        
-        selected_kpi = st.selectbox(
-            "Select KPI to view",
-            ["New Addition", "Churn", "Net Adds", "Reconnection", "MPOS Active Agent"],
-            key="acq_kpi_selector"
-        )
+    def render_comparisons(comparisons):
+        kpis = comparisons['window']
         
-        # Generate data for all KPIs
-        months = pd.date_range(end=datetime.now(), periods=60, freq='D')
-        
-        kpi_data_map = {
-            "New Addition": {
-                'values': np.random.uniform(20000, 30000, 60),
-                'color': '#FFCB05',
-                'fill_color': 'rgba(255, 203, 5, 0.2)',
-                'y_title': 'New Addition Count'
-            },
-            "Churn": {
-                'values': np.random.uniform(30000, 45000, 60),
-                'color': '#D32F2F',
-                'fill_color': 'rgba(211, 47, 47, 0.15)',
-                'y_title': 'Churn Count'
-            },
-            "Net Adds": {
-                'values': np.random.uniform(-8000, 5000, 60),
-                'color': '#0288D1',
-                'fill_color': 'rgba(2, 136, 209, 0.15)',
-                'y_title': 'Net Adds Count'
-            },
-            "Reconnection": {
-                'values': np.random.uniform(15000, 20000, 60),
-                'color': '#00897B',
-                'fill_color': 'rgba(0, 137, 123, 0.15)',
-                'y_title': 'Reconnection Count'
-            },
-            "MPOS Active Agent": {
-                'values': np.random.uniform(800000, 950000, 60),
-                'color': '#7B1FA2',
-                'fill_color': 'rgba(123, 31, 162, 0.15)',
-                'y_title': 'MPOS Active Agent Count'
-            }
-        }
+        with kpi_row:
+            st.markdown('<div style="margin-bottom: 20px;">', unsafe_allow_html=True)
+            col1, col2, col3, col4, col5 = st.columns(5)
+            
+            with col1:
+                st.markdown(create_comparison_card("New Additions", kpis['gross_adds'], ""), unsafe_allow_html=True)
+            
+            with col2:
+                st.markdown(create_comparison_card("Net Adds", kpis['net_adds'], ""), unsafe_allow_html=True)
+            
+            with col3:
+                st.markdown(create_comparison_card("Churn", kpis['churners'], ""), unsafe_allow_html=True)
+            
+            with col4:
+                st.markdown(create_comparison_card("Net Churn", kpis['net_churn'], ""), unsafe_allow_html=True)
+            
+            with col5:
+                st.markdown(create_comparison_card("Reconnection", kpis['reconnections'], ""), unsafe_allow_html=True)
+            
+            st.markdown('</div>', unsafe_allow_html=True)
         
-        # Get selected KPI data
-        kpi_config = kpi_data_map[selected_kpi]
-        
-        # Create single KPI trend chart
-        fig_trend = go.Figure()
-        
-        fig_trend.add_trace(go.Scatter(
-            x=months,
-            y=kpi_config['values'],
-            name=selected_kpi,
-            mode='lines+markers',
-            line=dict(color=kpi_config['color'], width=4, shape='spline'),
-            marker=dict(size=6, color=kpi_config['color'], line=dict(width=2, color='#FFF')),
-            fill='tozeroy',
-            fillcolor=kpi_config['fill_color'],
-            hovertemplate=f'<b>{selected_kpi}</b><br>%{{y:,.0f}}<extra></extra>'
-        ))
-        
-        fig_trend.update_layout(
-            height=400,
-            plot_bgcolor='rgba(248, 249, 250, 0.8)',
-            paper_bgcolor='white',
-            font=dict(color='#1A1A1A', size=11, family='Segoe UI'),
-            margin=dict(l=60, r=40, t=30, b=50),
-            showlegend=False,
-            xaxis=dict(
-                showgrid=True,
-                gridcolor='rgba(224, 224, 224, 0.5)',
-                gridwidth=1,
-                zeroline=False,
-                title=dict(text='Date', font=dict(size=11, color='#4A4A4A')),
-                tickfont=dict(size=10, color='#4A4A4A'),
-                showline=True,
-                linewidth=1,
-                linecolor='#E0E0E0'
-            ),
-            yaxis=dict(
-                showgrid=True,
-                gridcolor='rgba(224, 224, 224, 0.5)',
-                gridwidth=1,
-                zeroline=True,
-                zerolinecolor='#BDBDBD',
-                zerolinewidth=2,
-                title=dict(text=kpi_config['y_title'], font=dict(size=11, color='#4A4A4A')),
-                tickfont=dict(size=10, color='#4A4A4A'),
-                showline=True,
-                linewidth=1,
-                linecolor='#E0E0E0'
-            ),
-            hovermode='x unified',
-            hoverlabel=dict(
-                bgcolor="white",
-                font_size=11,
-                font_family="Segoe UI",
-                bordercolor=kpi_config['color']
-            ),
-            # Add subtle gradient background
-            shapes=[
-                dict(
-                    type='rect',
-                    xref='paper',
-                    yref='paper',
-                    x0=0,
-                    y0=0,
-                    x1=1,
-                    y1=1,
-                    fillcolor='rgba(255, 203, 5, 0.03)',
-                    layer='below',
-                    line_width=0
+        with daily:
+            # Bottom Section - Last 7 Days Performance Table with KPI Selector
+            st.markdown('<br><div class="chart-title">📋 Daily Performance - Last 7 Days</div>', unsafe_allow_html=True)
+            
+            # KPI Selector
+            col_selector, col_empty = st.columns([2, 3])
+            with col_selector:
+                selected_acq_kpi = st.selectbox(
+                    "Select KPI to View",
+                    ["New Additions", "Net Adds", "Churn", "Net Churn", "Reconnection"],
+                    index=0,
+                    key="acq_daily_kpi_selector"
                 )
-            ]
-        )
-        
-        st.plotly_chart(fig_trend, use_container_width=True, config={'displayModeBar': False})
-    
-    with col2:
-        # Market Share Donut
-        st.markdown('<div class="chart-title">📊 Market Share</div>', unsafe_allow_html=True)
-        
-        fig_market = go.Figure(data=[go.Pie(
-            labels=['MTN', 'Moov', 'Others'],
-            values=[43.83, 32.67, 23.50],
-            hole=0.6,
-            marker=dict(colors=[MTN_YELLOW, '#FF6B35', MTN_GRAY]),
-            textinfo='label+percent',
-            textfont=dict(size=10),
-            hovertemplate='<b>%{label}</b><br>%{value}%<extra></extra>'
-        )])
-        
-        fig_market.update_layout(
-            height=400,
-            paper_bgcolor='white',
-            margin=dict(l=20, r=20, t=20, b=20),
-            showlegend=True,
-            legend=dict(orientation="v", x=0, y=0, font=dict(size=9)),
-            annotations=[dict(
-                text='Latest Data:<br>10/7/2025',
-                x=0.5, y=0.5,
-                font_size=9,
-                showarrow=False
-            )]
-        )
-        
-        st.plotly_chart(fig_market, use_container_width=True, config={'displayModeBar': False})
-    
-    with col3:
-        # Regional Acquisition Map
-        st.markdown('<div class="chart-title">🗺️ Acquisition by Region</div>', unsafe_allow_html=True)
-        
-        # KPI selector for the map
-        acq_map_kpi = st.selectbox(
-            "Select Acquisition KPI",
-            ["New Additions", "Net Adds", "Churn", "Net Churn"],
-            index=0,
-            key="acq_map_kpi_selector"
-        )
-        
-        # Generate regional acquisition data
-        regions = ['Alibori', 'Atacora', 'Atlantique', 'Borgou', 'Collines', 'Couffo', 
-                   'Donga', 'Littoral', 'Mono', 'Oueme', 'Plateau', 'Zou']
-        
-        regional_acq = pd.DataFrame({
-            'region': regions,
-            'New Additions': np.random.uniform(1500, 4500, 12),
-            'Net Adds': np.random.uniform(-500, 2000, 12),
-            'Churn': np.random.uniform(2000, 5000, 12),
-            'Net Churn': np.random.uniform(800, 3000, 12)
-        })
-        
-        # Map selection to data column
-        acq_kpi_map = {
-            "New Additions": 'New Additions',
-            "Net Adds": 'Net Adds',
-            "Churn": 'Churn',
-            "Net Churn": 'Net Churn'
-        }
-        
-        selected_acq_col = acq_kpi_map[acq_map_kpi]
-        
-        # Try to load and display map
-        geojson_path = 'gadm41_BEN_1.json'
-        
-        try:
-            use_geopandas = False
-            try:
-                import geopandas as gpd
-                use_geopandas = True
-            except ImportError:
-                pass
             
-            if os.path.exists(geojson_path):
-                if use_geopandas:
-                    benin_gdf = gpd.read_file(geojson_path)
-                    
-                    # Find the department name column
-                    name_column = None
-                    for col in ['NAME_1', 'ADM1_NAME', 'name', 'Name', 'ADM1_EN']:
-                        if col in benin_gdf.columns:
-                            name_column = col
-                            break
-                    
-                    if name_column:
-                        # Map acquisition data to departments
-                        acq_dict = dict(zip(regional_acq['region'], regional_acq[selected_acq_col]))
-                        benin_gdf['kpi_value'] = benin_gdf[name_column].map(acq_dict)
-                        benin_gdf['department'] = benin_gdf[name_column]
-                        
-                        # Create choropleth
-                        fig_map = px.choropleth(
-                            benin_gdf,
-                            geojson=benin_gdf.geometry,
-                            locations=benin_gdf.index,
-                            color='kpi_value',
-                            hover_name='department',
-                            hover_data={'kpi_value': ':.0f'},
-                            color_continuous_scale='YlOrRd',
-                            labels={'kpi_value': acq_map_kpi}
-                        )
-                else:
-                    # Use regular JSON loading
-                    with open(geojson_path) as f:
-                        benin_geo = json.load(f)
-                    
-                    map_df = regional_acq[['region', selected_acq_col]].copy()
-                    map_df = map_df.rename(columns={'region': 'department', selected_acq_col: 'kpi_value'})
-                    
-                    fig_map = px.choropleth(
-                        map_df,
-                        geojson=benin_geo,
-                        locations='department',
-                        featureidkey='properties.NAME_1',
-                        color='kpi_value',
-                        hover_name='department',
-                        hover_data={'kpi_value': ':.0f'},
-                        color_continuous_scale='YlOrRd',
-                        labels={'kpi_value': acq_map_kpi}
-                    )
+            # Daily statistics of the selected KPI from the comparison engine
+            kpi_col, _ = ACQUISITION_KPIS[selected_acq_kpi]
+            daily_stats = comparisons['daily'][kpi_col]
+            
+            # Variance columns coloured on the CBU dashboard scale
+            render_daily_table(source, filters, load_acquisition_data, selected_acq_kpi, lambda: daily_table_html([
+                ('Date', daily_stats.index.strftime('%Y-%m-%d'), None, False),
+                (selected_acq_kpi, daily_stats['value'].values, '{:,.0f}', False),
+                ('DoD', daily_stats['dod'].values, '{:+.1f}%', True),
+                ('WoW', daily_stats['wow'].values, '{:+.1f}%', True),
+                ('MoM', daily_stats['mom'].values, '{:+.1f}%', True),
+                ('vs Budget', daily_stats['vs_budget'].values, '{:+.1f}%', True)
+            ], 'cbu'))
+            
+            st.markdown("<br>", unsafe_allow_html=True)
+    
+    def render_trend(trend):
+        with col1:
+            # KPI selector with title
+            st.markdown('<div class="chart-title">📈 Monthly Trend - Acquisition & Drivers</div>', unsafe_allow_html=True)
+            
+            selected_kpi = st.selectbox(
+                "Select KPI to view",
+                ["New Addition", "Churn", "Net Adds", "Reconnection", "MPOS Active Agent"],
+                key="acq_kpi_selector"
+            )
+            
+            months = trend['date']
+            
+            kpi_data_map = {
+                "New Addition": {
+                    'values': trend['gross_adds'],
+                    'color': '#FFCB05',
+                    'fill_color': 'rgba(255, 203, 5, 0.2)',
+                    'y_title': 'New Addition Count'
+                },
+                "Churn": {
+                    'values': trend['churners'],
+                    'color': '#D32F2F',
+                    'fill_color': 'rgba(211, 47, 47, 0.15)',
+                    'y_title': 'Churn Count'
+                },
+                "Net Adds": {
+                    'values': trend['net_adds'],
+                    'color': '#0288D1',
+                    'fill_color': 'rgba(2, 136, 209, 0.15)',
+                    'y_title': 'Net Adds Count'
+                },
+                "Reconnection": {
+                    'values': trend['reconnections'],
+                    'color': '#00897B',
+                    'fill_color': 'rgba(0, 137, 123, 0.15)',
+                    'y_title': 'Reconnection Count'
+                },
+                "MPOS Active Agent": {
+                    'values': trend['mpos_active'],
+                    'color': '#7B1FA2',
+                    'fill_color': 'rgba(123, 31, 162, 0.15)',
+                    'y_title': 'MPOS Active Agent Count'
+                }
+            }
+            
+            # Get selected KPI data
+            kpi_config = kpi_data_map[selected_kpi]
+            
+            # Create single KPI trend chart
+            window = zoom_window(months, "acq_trend_zoom")
+            
+            def build_trend():
+                fig_trend = go.Figure()
+                trend_x, trend_y = zoomed(months, kpi_config['values'], window)
                 
-                # Update layout
-                fig_map.update_geos(
-                    fitbounds='locations',
-                    visible=False,
-                    projection_type='mercator'
-                )
+                fig_trend.add_trace(scatter_trace(
+                    x=trend_x,
+                    y=trend_y,
+                    name=selected_kpi,
+                    mode='lines+markers',
+                    line=dict(color=kpi_config['color'], width=4, shape='spline'),
+                    marker=dict(size=6, color=kpi_config['color'], line=dict(width=2, color='#FFF')),
+                    fill='tozeroy',
+                    fillcolor=kpi_config['fill_color'],
+                    hovertemplate=f'<b>{selected_kpi}</b><br>%{{y:,.0f}}<extra></extra>'
+                ))
                 
-                fig_map.update_layout(
+                fig_trend.update_layout(
                     height=400,
-                    margin={'l': 5, 'r': 5, 't': 5, 'b': 30},
-                    coloraxis_colorbar=dict(
-                        title=acq_map_kpi,
-                        orientation='h',
-                        y=-0.15,
-                        x=0.5,
-                        xanchor='center',
-                        thickness=10,
-                        len=0.8,
-                        tickfont=dict(size=8)
-                    ),
+                    plot_bgcolor='rgba(248, 249, 250, 0.8)',
                     paper_bgcolor='white',
-                    plot_bgcolor='white',
-                    font=dict(family='Segoe UI', size=9)
+                    font=dict(color='#1A1A1A', size=11, family='Segoe UI'),
+                    margin=dict(l=60, r=40, t=30, b=50),
+                    showlegend=False,
+                    xaxis=dict(
+                        showgrid=True,
+                        gridcolor='rgba(224, 224, 224, 0.5)',
+                        gridwidth=1,
+                        zeroline=False,
+                        title=dict(text='Date', font=dict(size=11, color='#4A4A4A')),
+                        tickfont=dict(size=10, color='#4A4A4A'),
+                        showline=True,
+                        linewidth=1,
+                        linecolor='#E0E0E0'
+                    ),
+                    yaxis=dict(
+                        showgrid=True,
+                        gridcolor='rgba(224, 224, 224, 0.5)',
+                        gridwidth=1,
+                        zeroline=True,
+                        zerolinecolor='#BDBDBD',
+                        zerolinewidth=2,
+                        title=dict(text=kpi_config['y_title'], font=dict(size=11, color='#4A4A4A')),
+                        tickfont=dict(size=10, color='#4A4A4A'),
+                        showline=True,
+                        linewidth=1,
+                        linecolor='#E0E0E0'
+                    ),
+                    hovermode='x unified',
+                    hoverlabel=dict(
+                        bgcolor="white",
+                        font_size=11,
+                        font_family="Segoe UI",
+                        bordercolor=kpi_config['color']
+                    ),
+                    # Add subtle gradient background
+                    shapes=[
+                        dict(
+                            type='rect',
+                            xref='paper',
+                            yref='paper',
+                            x0=0,
+                            y0=0,
+                            x1=1,
+                            y1=1,
+                            fillcolor='rgba(255, 203, 5, 0.03)',
+                            layer='below',
+                            line_width=0
+                        )
+                    ]
                 )
-                
-                st.plotly_chart(fig_map, use_container_width=True, config={'displayModeBar': False})
+                return fig_trend
             
-            else:
-                raise FileNotFoundError("GeoJSON file not found")
+            show_figure(source, filters, load_acquisition_data, ('trend', selected_kpi, window), build_trend)
+    
+    def render_market(market):
+        with col2:
+            # Market Share Donut
+            st.markdown('<div class="chart-title">📊 Market Share</div>', unsafe_allow_html=True)
+            
+            # Competitor split keeps the Moov/Others ratio of the last market survey
+            mtn_share = market['market_share']
+            competitor_share = 100 - mtn_share
+            
+            def build_market():
+                fig_market = go.Figure(data=[go.Pie(
+                    labels=['MTN', 'Moov', 'Others'],
+                    values=[mtn_share, competitor_share * 0.5816, competitor_share * 0.4184],
+                    hole=0.6,
+                    marker=dict(colors=[MTN_YELLOW, '#FF6B35', MTN_GRAY]),
+                    textinfo='label+percent',
+                    textfont=dict(size=10),
+                    hovertemplate='<b>%{label}</b><br>%{value}%<extra></extra>'
+                )])
                 
-        except Exception as e:
-            # Fallback: Display simple message
-            st.warning("📍 Map requires 'gadm41_BEN_1.json' file.")
+                fig_market.update_layout(
+                    height=400,
+                    paper_bgcolor='white',
+                    margin=dict(l=20, r=20, t=20, b=20),
+                    showlegend=True,
+                    legend=dict(orientation="v", x=0, y=0, font=dict(size=9)),
+                    annotations=[dict(
+                        text=f"Latest Data:<br>{filters.end:%d/%m/%Y}",
+                        x=0.5, y=0.5,
+                        font_size=9,
+                        showarrow=False
+                    )]
+                )
+                return fig_market
             
-            # Show key stats
-            top_region = regional_acq.nlargest(1, selected_acq_col)['region'].values[0]
-            top_value = regional_acq.nlargest(1, selected_acq_col)[selected_acq_col].values[0]
-            total_value = regional_acq[selected_acq_col].sum()
+            show_figure(source, filters, load_acquisition_data, ('market_share',), build_market)
+    
+    def render_regional(regional_acq):
+        with col3:
+            # Regional Acquisition Map
+            st.markdown('<div class="chart-title">🗺️ Acquisition by Region</div>', unsafe_allow_html=True)
             
-            st.markdown(f"""
-            <div style="margin-top: 20px; text-align: center;">
-                <div style="background: #F8F8F8; padding: 12px; border-radius: 4px; margin-bottom: 10px;">
-                    <div style="font-size: 9px; color: #666;">🏆 Top Region</div>
-                    <div style="font-size: 14px; font-weight: 600; color: #000;">{top_region}</div>
-                    <div style="font-size: 12px; color: #4CAF50; font-weight: 600;">{top_value:.0f}</div>
-                </div>
-                <div style="background: #F8F8F8; padding: 12px; border-radius: 4px;">
-                    <div style="font-size: 9px; color: #666;">📈 Total National</div>
-                    <div style="font-size: 14px; font-weight: 600; color: #000;">{total_value:.0f}</div>
+            # KPI selector for the map
+            acq_map_kpi = st.selectbox(
+                "Select Acquisition KPI",
+                ["New Additions", "Net Adds", "Churn", "Net Churn"],
+                index=0,
+                key="acq_map_kpi_selector"
+            )
+            
+            selected_acq_col = acq_map_kpi
+            
+            # Department polygons come decoded and pre-simplified from the process-wide geometry cache
+            try:
+                map_df = regional_acq[['region', selected_acq_col]].rename(columns={selected_acq_col: 'kpi_value'})
+                def build_map():
+                    fig_map = build_region_choropleth(map_df, acq_map_kpi, ':.0f', zoom='coarse')
+                    
+                    # Update layout
+                    fig_map.update_geos(
+                        fitbounds='locations',
+                        visible=False,
+                        projection_type='mercator'
+                    )
+                    
+                    fig_map.update_layout(
+                        height=400,
+                        margin={'l': 5, 'r': 5, 't': 5, 'b': 30},
+                        coloraxis_colorbar=dict(
+                            title=acq_map_kpi,
+                            orientation='h',
+                            y=-0.15,
+                            x=0.5,
+                            xanchor='center',
+                            thickness=10,
+                            len=0.8,
+                            tickfont=dict(size=8)
+                        ),
+                        paper_bgcolor='white',
+                        plot_bgcolor='white',
+                        font=dict(family='Segoe UI', size=9)
+                    )
+                    return fig_map
+                
+                show_figure(source, filters, load_acquisition_data, ('map', acq_map_kpi), build_map)
+                
+                    
+            except Exception as e:
+                # Fallback: Display simple message
+                st.warning("📍 Map requires 'gadm41_BEN_1.json' file.")
+                
+                # Show key stats
+                stats = rank_regions(regional_acq, selected_acq_col)
+                top_region, top_value, total_value = stats['top_region'], stats['top_value'], stats['total']
+                
+                st.markdown(f"""
+                <div style="margin-top: 20px; text-align: center;">
+                    <div style="background: #F8F8F8; padding: 12px; border-radius: 4px; margin-bottom: 10px;">
+                        <div style="font-size: 9px; color: #666;">🏆 Top Region</div>
+                        <div style="font-size: 14px; font-weight: 600; color: #000;">{top_region}</div>
+                        <div style="font-size: 12px; color: #4CAF50; font-weight: 600;">{top_value:.0f}</div>
+                    </div>
+                    <div style="background: #F8F8F8; padding: 12px; border-radius: 4px;">
+                        <div style="font-size: 9px; color: #666;">📈 Total National</div>
+                        <div style="font-size: 14px; font-weight: 600; color: #000;">{total_value:.0f}</div>
+                    </div>
                 </div>
-            </div>
-            """, unsafe_allow_html=True)
-    
-    # Bottom Section - Last 7 Days Performance Table with KPI Selector
-    st.markdown('<br><div class="chart-title">📋 Daily Performance - Last 7 Days</div>', unsafe_allow_html=True)
-    
-    # KPI Selector
-    col_selector, col_empty = st.columns([2, 3])
-    with col_selector:
-        selected_acq_kpi = st.selectbox(
-            "Select KPI to View",
-            ["New Additions", "Net Adds", "Churn", "Net Churn", "Reconnection"],
-            index=0,
-            key="acq_daily_kpi_selector"
-        )
+                """, unsafe_allow_html=True)
     
-    # Generate daily performance data for last 7 days
-    last_7_days = pd.date_range(end=datetime.now(), periods=7, freq='D')
-    
-    # KPI data mapping with realistic values
-    kpi_values_map = {
-        "New Additions": np.random.uniform(20000, 30000, 7),
-        "Net Adds": np.random.uniform(5000, 15000, 7),
-        "Churn": np.random.uniform(30000, 45000, 7),
-        "Net Churn": np.random.uniform(15000, 25000, 7),
-        "Reconnection": np.random.uniform(10000, 20000, 7)
-    }
-    
-    # Budget/target values
-    budget_map = {
-        "New Additions": 25000,
-        "Net Adds": 10000,
-        "Churn": 38000,
-        "Net Churn": 20000,
-        "Reconnection": 15000
-    }
-    
-    # Create DataFrame
-    selected_values = kpi_values_map[selected_acq_kpi]
-    budget_value = budget_map[selected_acq_kpi]
-    
-    # Calculate variances
-    dod_values = [(selected_values[i] - selected_values[i-1]) / selected_values[i-1] * 100 if i > 0 else np.nan 
-                  for i in range(len(selected_values))]
-    wow_values = [np.random.uniform(-5, 15, 1)[0] for _ in range(7)]  # Sample WoW data
-    mom_values = [np.random.uniform(-10, 20, 1)[0] for _ in range(7)]  # Sample MoM data
-    vs_budget = [(val - budget_value) / budget_value * 100 for val in selected_values]
-    
-    daily_performance = pd.DataFrame({
-        'Date': last_7_days.strftime('%Y-%m-%d'),
-        selected_acq_kpi: selected_values,
-        'DoD': dod_values,
-        'WoW': wow_values,
-        'MoM': mom_values,
-        'vs Budget': vs_budget
+    renderers = {
+        'comparisons': render_comparisons, 'trend': render_trend,
+        'market': render_market, 'regional': render_regional
+    }
+    for panel, value in stream_page_data(load_acquisition_data, acquisition_panels, source, filters):
+        renderers[panel](value)
+
+CONVERSION_RATES = {
+    "MoMo Conversion Rate": 'momo_rate',
+    "Data Conversion Rate": 'data_rate',
+    "Bundle Rate": 'bundle_rate',
+    "Multi-Service Rate": 'multi_service_rate',
+    "Xtratime Rate": 'xtratime_rate',
+    "VAS Rate": 'vas_rate'
+}
+
+
+def load_customer_conversion_data(source, filters):
+    """Query the Customer Conversion page: window conversions and 90-day conversion rates"""
+    end, where = filters.end, filters.where
+    return run_panels(load_customer_conversion_data, {
+        'comparisons': lambda: kpi_comparisons(
+            source, ['momo_conversions', 'data_conversions'] + list(CONVERSION_RATES.values()), filters
+        ),
+        'trend': lambda: source.kpi_series(list(CONVERSION_RATES.values()), end - pd.Timedelta(days=89), end, where=where)
     })
-    
-    # Format display DataFrame
-    display_df = daily_performance.copy()
-    
-    # Format the KPI value column
-    display_df[selected_acq_kpi] = display_df[selected_acq_kpi].apply(lambda x: f"{x:,.0f}")
-    
-    # Format the variance columns with +/- signs
-    for col in ['DoD', 'WoW', 'MoM', 'vs Budget']:
-        display_df[col] = display_df[col].apply(lambda x: f"{x:+.1f}%" if pd.notna(x) else "-")
-    
-    # Color function for variance columns (matching CBU dashboard)
-    def get_color_for_percentage(value):
-        """Return color based on percentage value"""
-        if value >= 5:
-            return '#107C10'  # Green
-        elif value >= 2:
-            return '#FFA500'  # Orange
-        elif value >= -2:
-            return '#FFD700'  # Yellow
-        else:
-            return '#D13438'  # Red
-    
-    def color_variance(val):
-        """Apply color to variance cells"""
-        if pd.isna(val) or val == '-':
-            return ''
-        try:
-            # Extract numeric value from formatted string
-            num_val = float(val.replace('%', '').replace('+', ''))
-            color = get_color_for_percentage(num_val)
-            return f'background-color: {color}; color: white; font-weight: bold; padding: 4px;'
-        except:
-            return ''
-    
-    # Apply styling only to variance columns
-    styled_df = display_df.style.applymap(
-        color_variance,
-        subset=['DoD', 'WoW', 'MoM', 'vs Budget']
-    ).set_properties(**{
-        'text-align': 'center',
-        'font-size': '11px',
-        'border': '1px solid #E0E0E0'
-    }).set_table_styles([
-        {'selector': 'th', 'props': [
-            ('background-color', '#000000'),
-            ('color', '#FFCB05'),
-            ('font-weight', 'bold'),
-            ('text-align', 'center'),
-            ('font-size', '10px'),
-            ('padding', '8px')
-        ]},
-        {'selector': 'td', 'props': [
-            ('padding', '6px')
-        ]}
-    ])
-    
-    st.dataframe(styled_df, use_container_width=True, height=350)
-    
-    st.markdown("<br>", unsafe_allow_html=True)
 
-def render_customer_conversion_content(data):
+
+def render_customer_conversion_content(source, filters):
     """Render Customer Conversion page content - Enhanced with comprehensive KPIs"""
+    data = get_page_data(load_customer_conversion_data, source, filters)
+    comparisons = data['comparisons']['window']
     
     # Top KPI Cards Row - All Conversion Metrics
     st.markdown('<div style="margin-bottom: 20px;">', unsafe_allow_html=True)
     col1, col2, col3, col4, col5, col6 = st.columns(6)
     
     with col1:
-        st.markdown(create_mtn_kpi_card(
-            "MoMo Conv.",
-            3120,
-            "",
-            7.7,
-            {'ytd': '98.5K', 'wow': '+240', 'mom': '+6.8%'}
-        ), unsafe_allow_html=True)
+        st.markdown(create_comparison_card("MoMo Conv.", comparisons['momo_conversions'], ""), unsafe_allow_html=True)
     
     with col2:
-        st.markdown(create_mtn_kpi_card(
-            "MoMo Rate",
-            19.2,
-            "%",
-            6.1,
-            {'ytd': '18.5%', 'wow': '+1.2%', 'mom': '+0.9%'}
-        ), unsafe_allow_html=True)
+        st.markdown(create_comparison_card("MoMo Rate", comparisons['momo_rate'], "%"), unsafe_allow_html=True)
     
     with col3:
-        st.markdown(create_mtn_kpi_card(
-            "Data Conv.",
-            4020,
-            "",
-            8.5,
-            {'ytd': '127K', 'wow': '+340', 'mom': '+7.5%'}
-        ), unsafe_allow_html=True)
+        st.markdown(create_comparison_card("Data Conv.", comparisons['data_conversions'], ""), unsafe_allow_html=True)
     
     with col4:
-        st.markdown(create_mtn_kpi_card(
-            "Data Rate",
-            24.7,
-            "%",
-            7.3,
-            {'ytd': '23.8%', 'wow': '+1.8%', 'mom': '+1.2%'}
-        ), unsafe_allow_html=True)
+        st.markdown(create_comparison_card("Data Rate", comparisons['data_rate'], "%"), unsafe_allow_html=True)
     
     with col5:
-        st.markdown(create_mtn_kpi_card(
-            "Bundle Rate",
-            35.8,
-            "%",
-            6.7,
-            {'ytd': '34.2%', 'wow': '+2.4%', 'mom': '+1.8%'}
-        ), unsafe_allow_html=True)
+        st.markdown(create_comparison_card("Bundle Rate", comparisons['bundle_rate'], "%"), unsafe_allow_html=True)
     
     with col6:
-        st.markdown(create_mtn_kpi_card(
-            "Multi-Service",
-            13.4,
-            "%",
-            6.7,
-            {'ytd': '12.8%', 'wow': '+0.9%', 'mom': '+0.6%'}
-        ), unsafe_allow_html=True)
+        st.markdown(create_comparison_card("Multi-Service", comparisons['multi_service_rate'], "%"), unsafe_allow_html=True)
     
     st.markdown('</div>', unsafe_allow_html=True)
     
@@ -2258,37 +4852,36 @@ def render_customer_conversion_content(data):
             key="conversion_kpi_selector"
         )
         
-        # Generate trend data for all conversion KPIs
-        dates = pd.date_range(end=datetime.now(), periods=90, freq='D')
+        dates = data['trend']['date']
         
         conversion_data_map = {
             "MoMo Conversion Rate": {
-                'values': np.random.uniform(17, 21, 90) + np.linspace(0, 2, 90),
+                'values': data['trend'][CONVERSION_RATES["MoMo Conversion Rate"]],
                 'color': '#9C27B0',
                 'y_title': 'MoMo Conversion Rate (%)'
             },
             "Data Conversion Rate": {
-                'values': np.random.uniform(22, 27, 90) + np.linspace(0, 2.5, 90),
+                'values': data['trend'][CONVERSION_RATES["Data Conversion Rate"]],
                 'color': '#2196F3',
                 'y_title': 'Data Conversion Rate (%)'
             },
             "Bundle Rate": {
-                'values': np.random.uniform(32, 38, 90) + np.linspace(0, 3, 90),
+                'values': data['trend'][CONVERSION_RATES["Bundle Rate"]],
                 'color': '#4CAF50',
                 'y_title': 'Bundle Rate (%)'
             },
             "Multi-Service Rate": {
-                'values': np.random.uniform(11, 15, 90) + np.linspace(0, 1.5, 90),
+                'values': data['trend'][CONVERSION_RATES["Multi-Service Rate"]],
                 'color': '#FF9800',
                 'y_title': 'Multi-Service Rate (%)'
             },
             "Xtratime Rate": {
-                'values': np.random.uniform(8, 12, 90) + np.linspace(0, 1, 90),
+                'values': data['trend'][CONVERSION_RATES["Xtratime Rate"]],
                 'color': '#E91E63',
                 'y_title': 'Xtratime Rate (%)'
             },
             "VAS Rate": {
-                'values': np.random.uniform(15, 20, 90) + np.linspace(0, 2, 90),
+                'values': data['trend'][CONVERSION_RATES["VAS Rate"]],
                 'color': '#00897B',
                 'y_title': 'VAS Rate (%)'
             }
@@ -2297,79 +4890,74 @@ def render_customer_conversion_content(data):
         conversion_config = conversion_data_map[selected_conversion_kpi]
         
         # Create conversion trend chart
-        fig_conversion = go.Figure()
-        
-        fig_conversion.add_trace(go.Scatter(
-            x=dates,
-            y=conversion_config['values'],
-            name=selected_conversion_kpi,
-            mode='lines+markers',
-            line=dict(color=conversion_config['color'], width=3),
-            marker=dict(size=4),
-            fill='tozeroy',
-            fillcolor=f'rgba({int(conversion_config["color"][1:3], 16)}, {int(conversion_config["color"][3:5], 16)}, {int(conversion_config["color"][5:7], 16)}, 0.2)'
-        ))
-        
-        fig_conversion.update_layout(
-            height=450,
-            plot_bgcolor=MTN_WHITE,
-            paper_bgcolor=MTN_WHITE,
-            font=dict(family='Segoe UI', size=11, color=MTN_BLACK),
-            margin=dict(l=40, r=40, t=40, b=40),
-            hovermode='x unified',
-            xaxis=dict(showgrid=True, gridcolor='#F0F0F0', title='Date'),
-            yaxis=dict(showgrid=True, gridcolor='#F0F0F0', title=conversion_config['y_title'])
-        )
+        window = zoom_window(dates, "conversion_trend_zoom")
+        
+        def build_conversion():
+            fig_conversion = mtn_figure('trend')
+            trend_x, trend_y = zoomed(dates, conversion_config['values'], window)
+            
+            fig_conversion.add_trace(scatter_trace(
+                x=trend_x,
+                y=trend_y,
+                name=selected_conversion_kpi,
+                mode='lines+markers',
+                line=dict(color=conversion_config['color'], width=3),
+                marker=dict(size=4),
+                fill='tozeroy',
+                fillcolor=f'rgba({int(conversion_config["color"][1:3], 16)}, {int(conversion_config["color"][3:5], 16)}, {int(conversion_config["color"][5:7], 16)}, 0.2)'
+            ))
+            
+            fig_conversion.update_layout(height=450, xaxis_title='Date', yaxis_title=conversion_config['y_title'])
+            return fig_conversion
         
-        st.plotly_chart(fig_conversion, use_container_width=True, config={'displayModeBar': False})
+        show_figure(source, filters, load_customer_conversion_data, ('trend', selected_conversion_kpi, window), build_conversion)
     
     with col_chart_right:
         st.markdown('<div class="chart-title">📊 Conversion Mix Distribution</div>', unsafe_allow_html=True)
         
         conversion_dist = pd.DataFrame({
             'Type': ['MoMo', 'Data', 'Bundle', 'Multi-Service', 'Xtratime', 'VAS'],
-            'Rate': [19.2, 24.7, 35.8, 13.4, 10.5, 18.2]
+            'Rate': [comparisons[rate]['value'] for rate in CONVERSION_RATES.values()]
         })
         
-        fig_conv_mix = go.Figure(data=[go.Pie(
-            labels=conversion_dist['Type'],
-            values=conversion_dist['Rate'],
-            hole=0.5,
-            marker=dict(colors=['#9C27B0', '#2196F3', '#4CAF50', '#FF9800', '#E91E63', '#00897B']),
-            textinfo='label+percent',
-            textfont=dict(size=10),
-            hovertemplate='<b>%{label}</b><br>%{value:.1f}%<extra></extra>'
-        )])
-        
-        fig_conv_mix.update_layout(
-            height=450,
-            plot_bgcolor=MTN_WHITE,
-            paper_bgcolor=MTN_WHITE,
-            showlegend=True,
-            legend=dict(orientation="v", yanchor="middle", y=0.5, xanchor="left", x=1.05, font=dict(size=10)),
-            margin=dict(l=20, r=20, t=20, b=20)
-        )
+        def build_conv_mix():
+            fig_conv_mix = go.Figure(data=[go.Pie(
+                labels=conversion_dist['Type'],
+                values=conversion_dist['Rate'],
+                hole=0.5,
+                marker=dict(colors=['#9C27B0', '#2196F3', '#4CAF50', '#FF9800', '#E91E63', '#00897B']),
+                textinfo='label+percent',
+                textfont=dict(size=10),
+                hovertemplate='<b>%{label}</b><br>%{value:.1f}%<extra></extra>'
+            )])
+            
+            fig_conv_mix.update_layout(
+                height=450,
+                showlegend=True,
+                legend=dict(orientation="v", yanchor="middle", y=0.5, xanchor="left", x=1.05, font=dict(size=10)),
+                margin=dict(l=20, r=20, t=20, b=20)
+            )
+            return fig_conv_mix
         
-        st.plotly_chart(fig_conv_mix, use_container_width=True, config={'displayModeBar': False})
+        show_figure(source, filters, load_customer_conversion_data, ('mix',), build_conv_mix)
     
     # Daily Performance Table - Last 7 Days with All Conversion KPIs
     st.markdown('<br><div class="chart-title">📋 Daily Performance - Conversion Metrics (Last 7 Days)</div>', unsafe_allow_html=True)
     
-    # Generate daily performance data
-    last_7_days = pd.date_range(end=datetime.now(), periods=7, freq='D')
-    
+    # Last 7 days of every rate; variances and target track the MoMo conversion rate
+    daily = data['comparisons']['daily']
     daily_conversion = pd.DataFrame({
-        'Date': last_7_days.strftime('%d %b'),
-        'MoMo Rate (%)': np.random.uniform(18.0, 20.5, 7),
-        'Data Rate (%)': np.random.uniform(23.0, 26.0, 7),
-        'Bundle Rate (%)': np.random.uniform(33.0, 38.0, 7),
-        'Multi-Service (%)': np.random.uniform(12.0, 15.0, 7),
-        'Xtratime (%)': np.random.uniform(9.0, 12.0, 7),
-        'VAS Rate (%)': np.random.uniform(16.0, 20.0, 7),
-        'DoD %': np.random.uniform(-3, 8, 7),
-        'MoM %': np.random.uniform(-5, 10, 7),
-        'Target (%)': np.repeat(20.0, 7),
-        'Actual vs Target %': np.random.uniform(-12, 8, 7)
+        'Date': daily.index.strftime('%d %b'),
+        'MoMo Rate (%)': daily['momo_rate']['value'].values,
+        'Data Rate (%)': daily['data_rate']['value'].values,
+        'Bundle Rate (%)': daily['bundle_rate']['value'].values,
+        'Multi-Service (%)': daily['multi_service_rate']['value'].values,
+        'Xtratime (%)': daily['xtratime_rate']['value'].values,
+        'VAS Rate (%)': daily['vas_rate']['value'].values,
+        'DoD %': daily['momo_rate']['dod'].values,
+        'MoM %': daily['momo_rate']['mom'].values,
+        'Target (%)': daily['momo_rate']['budget'].values,
+        'Actual vs Target %': daily['momo_rate']['vs_budget'].values
     })
     
     st.dataframe(
@@ -2466,9 +5054,684 @@ def render_customer_conversion_content(data):
     #     st.plotly_chart(fig_growth, use_container_width=True, config={'displayModeBar': False})
 
 
+# ==================== RESULT CACHE ====================
+# Page results are shared by every session for this long, matching the footer's refresh promise
+RESULT_CACHE_TTL = int(os.environ.get('MTN_CACHE_TTL', 900))
+RESULT_CACHE_MAX_BYTES = int(os.environ.get('MTN_CACHE_MAX_MB', 256)) * 1024 * 1024
+_MISSING = object()
+
+
+# Trace properties holding per-point data; the rest of a figure is styling of negligible size
+FIGURE_DATA_PROPERTIES = ['x', 'y', 'z', 'lat', 'lon', 'locations', 'values', 'labels', 'text', 'hovertext', 'customdata', 'ids']
+
+
+def _geojson_positions(coordinates):
+    """Number of positions in GeoJSON coordinates, counted per ring rather than per point"""
+    if not coordinates:
+        return 0
+    if not isinstance(coordinates[0], (list, tuple)):
+        return 1
+    if not isinstance(coordinates[0][0], (list, tuple)):
+        return len(coordinates)
+    return sum(_geojson_positions(part) for part in coordinates)
+
+
+def figure_size(figure):
+    """Approximate bytes of a figure's trace data, read in place instead of through a to_dict() copy
+
+    Arrays count their nbytes and GeoJSON (copied into each map figure) 16
+    bytes per position, as two float64 coordinates.
+    """
+    size = 0
+    for trace in figure.data:
+        for name in FIGURE_DATA_PROPERTIES:
+            value = trace[name] if name in trace else None
+            if value is not None:
+                size += value.nbytes if isinstance(value, np.ndarray) else estimate_size(value)
+        geojson = trace['geojson'] if 'geojson' in trace else None
+        if isinstance(geojson, dict):
+            size += 16 * sum(
+                _geojson_positions((feature.get('geometry') or {}).get('coordinates'))
+                for feature in geojson.get('features', [])
+            )
+    return size
+
+
+def estimate_size(value):
+    """Approximate bytes held by a cached result (frames, arrays, figures and their containers)"""
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(index=True, deep=True).sum())
+    if isinstance(value, (pd.Series, pd.Index)):
+        return int(value.memory_usage(deep=True))
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if isinstance(value, go.Figure):
+        return figure_size(value)
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(estimate_size(k) + estimate_size(v) for k, v in value.items())
+    if isinstance(value, (list, tuple, set)):
+        return sys.getsizeof(value) + sum(estimate_size(v) for v in value)
+    return sys.getsizeof(value)
+
+
+class ResultCache:
+    """Process-wide query result cache shared by all sessions
+
+    Entries are keyed by (query, filter context, data version), expire after
+    `ttl` seconds and are evicted least-recently-used once their estimated
+    size passes `max_bytes`. Concurrent requests for a missing key wait on
+    the single computation already running instead of repeating it.
+    """
+
+    def __init__(self, ttl=RESULT_CACHE_TTL, max_bytes=RESULT_CACHE_MAX_BYTES):
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.pending = {}
+        self.size = 0
+        self.lock = threading.Lock()
+        self.counters = {'hits': 0, 'misses': 0, 'evictions': 0, 'expirations': 0}
+
+    def _lookup(self, key):
+        """Fresh cached value (marked recently used) or _MISSING; call with the lock held"""
+        entry = self.entries.get(key)
+        if entry is None:
+            return _MISSING
+        value, expires, _ = entry
+        if expires <= time.monotonic():
+            self._drop(key)
+            self.counters['expirations'] += 1
+            return _MISSING
+        self.entries.move_to_end(key)
+        return value
+
+    def _drop(self, key):
+        """Remove an entry and release its bytes; call with the lock held"""
+        _, _, size = self.entries.pop(key)
+        self.size -= size
+
+    def __contains__(self, key):
+        with self.lock:
+            return key in self.pending or self._lookup(key) is not _MISSING
+
+    def expires_in(self, key):
+        """Seconds until a cached entry expires; 0 when it is missing"""
+        with self.lock:
+            entry = self.entries.get(key)
+            return 0.0 if entry is None else max(0.0, entry[1] - time.monotonic())
+
+    def get_or_compute(self, key, compute):
+        """Cached value of `key`, computing it once across all waiting sessions on a miss"""
+        with self.lock:
+            value = self._lookup(key)
+            if value is not _MISSING:
+                self.counters['hits'] += 1
+                annotate_span(cache='hit', bytes=self.entries[key][2])
+                return value
+            self.counters['misses'] += 1
+            future = self.pending.get(key)
+            owner = future is None
+            if owner:
+                future = self.pending[key] = Future()
+        if not owner:
+            annotate_span(cache='miss')
+            return future.result()
+        return self.settle(key, future, compute)
+
+    def claim(self, key):
+        """Take on computing a missing key: a Future to pass to `settle`, or None when cached or already running"""
+        with self.lock:
+            if key in self.pending or self._lookup(key) is not _MISSING:
+                return None
+            self.counters['misses'] += 1
+            future = self.pending[key] = Future()
+            return future
+
+    def settle(self, key, future, compute):
+        """Finish a claimed key: cache `compute()` and hand it (or its error) to every waiting session"""
+        try:
+            value = compute()
+        except BaseException as error:
+            with self.lock:
+                self.pending.pop(key, None)
+            future.set_exception(error)
+            raise
+        annotate_span(cache='miss', bytes=self.put(key, value))
+        with self.lock:
+            self.pending.pop(key, None)
+        future.set_result(value)
+        return value
+
+    def put(self, key, value):
+        """Store a value, evicting least recently used entries beyond the memory cap; returns its size"""
+        size = estimate_size(value)
+        with self.lock:
+            if key in self.entries:
+                self._drop(key)
+            self.entries[key] = (value, time.monotonic() + self.ttl, size)
+            self.size += size
+            while self.size > self.max_bytes and len(self.entries) > 1:
+                self._drop(next(iter(self.entries)))
+                self.counters['evictions'] += 1
+        return size
+
+    def invalidate(self, predicate=None):
+        """Drop every entry whose key matches `predicate` (all entries when None)"""
+        with self.lock:
+            for key in [k for k in self.entries if predicate is None or predicate(k)]:
+                self._drop(key)
+
+    def stats(self):
+        """Entry count, bytes held and hit/miss/eviction counters"""
+        with self.lock:
+            return {'entries': len(self.entries), 'bytes': self.size, **self.counters}
+
+
+@st.cache_resource(show_spinner=False)
+def get_result_cache():
+    """Process-wide result cache; new data drops only the pages that read the changed tables"""
+    cache = ResultCache()
+
+    def on_change(source, tables):
+        if tables is None:
+            cache.invalidate()
+        else:
+            cache.invalidate(lambda key: not LOADER_TABLES[key[0]].isdisjoint(tables))
+
+    get_data_source().on_change(on_change)
+    return cache
+
+
+# ==================== PAGE ROUTING ====================
+# Tab label -> (render function, data loader); only the active page is rendered
+PAGES = {
+    "📊 Overview": (render_overview_content, load_overview_data),
+    "💰 Airtime Sales": (render_airtime_sales_content, load_airtime_sales_data),
+    "💸 Float Management": (render_float_management_content, load_float_management_data),
+    "👥 Agent Network": (render_agent_network_content, load_agent_network_data),
+    "🏆 Agent Performance": (render_agent_performance_content, load_agent_performance_data),
+    "📈 Acquisition": (render_acquisition_content, load_acquisition_data),
+    "🔄 Customer Conversion": (render_customer_conversion_content, load_customer_conversion_data)
+}
+PAGE_LABELS = list(PAGES)
+
+# Fact tables each loader reads; a delta landing in one only invalidates the pages that depend on it
+LOADER_TABLES = {
+    'load_overview_data': {'market', 'acquisition', 'sales', 'float', 'agents'},
+    'load_airtime_sales_data': {'sales'},
+    'load_float_management_data': {'float'},
+    'load_agent_network_data': {'agents'},
+    'load_agent_performance_data': {'agents'},
+    'load_acquisition_data': {'acquisition', 'agents', 'market'},
+    'load_customer_conversion_data': {'conversions'}
+}
+
+# Set MTN_PREFETCH=0 to disable warming the next likely page in the background
+PREFETCH_ENABLED = os.environ.get('MTN_PREFETCH', '1') != '0'
+
+
+@st.cache_resource(show_spinner=False)
+def get_page_prefetcher():
+    """Process-wide navigation statistics and prefetch worker"""
+    return {
+        'transitions': {},
+        'lock': threading.Lock(),
+        'executor': ThreadPoolExecutor(max_workers=2, thread_name_prefix='page-prefetch')
+    }
+
+
+def page_data_key(loader, source, filters):
+    """Result cache key of a page loader: query, filter context and the versions of its tables
+
+    The filters go in as plain values: every rerun redefines FilterContext,
+    and dataclass instances of different class objects never compare equal.
+    """
+    tables = sorted(LOADER_TABLES[loader.__name__])
+    return (loader.__name__, astuple(filters), id(source), source.table_versions(tables))
+
+
+def get_page_data(loader, source, filters):
+    """Return a page's data from the shared result cache, running the loader once on a miss"""
+    key = page_data_key(loader, source, filters)
+    with profile('data', loader.__name__):
+        return get_result_cache().get_or_compute(key, lambda: loader(source, filters))
+
+
+def page_artifact(source, filters, loader, name, build):
+    """Something rendered from a page's data (a table, a figure), cached and invalidated with that data"""
+    key = page_data_key(loader, source, filters) + name
+    return get_result_cache().get_or_compute(key, build)
+
+
+def record_navigation(previous_page, page):
+    """Count page-to-page moves so prefetch follows how analysts actually navigate"""
+    state = get_page_prefetcher()
+    with state['lock']:
+        counts = state['transitions'].setdefault(previous_page, {})
+        counts[page] = counts.get(page, 0) + 1
+
+
+def predict_next_page(page):
+    """Most frequent next page seen from `page`, defaulting to the tab on its right"""
+    state = get_page_prefetcher()
+    with state['lock']:
+        counts = dict(state['transitions'].get(page, {}))
+    if counts:
+        return max(counts, key=counts.get)
+    return PAGE_LABELS[(PAGE_LABELS.index(page) + 1) % len(PAGE_LABELS)]
+
+
+def prefetch_page(page, source, filters):
+    """Load a page's data on the prefetch worker unless it is cached or already loading"""
+    loader = PAGES[page][1]
+    cache = get_result_cache()
+    key = page_data_key(loader, source, filters)
+    if key not in cache:
+        get_page_prefetcher()['executor'].submit(cache.get_or_compute, key, lambda: loader(source, filters))
+
+
+# ==================== PAGE PANELS ====================
+# Threads running the independent queries of a page side by side; set MTN_PANEL_WORKERS=0 to run them in turn
+PANEL_WORKERS = int(os.environ.get('MTN_PANEL_WORKERS', 4))
+
+
+@st.cache_resource(show_spinner=False)
+def get_panel_executor():
+    """Process-wide pool for panel queries, shared by sessions, prefetch and precompute"""
+    return ThreadPoolExecutor(max_workers=PANEL_WORKERS, thread_name_prefix='page-panel')
+
+
+def submit_panels(loader, panels):
+    """Start the panel queries of a page (name -> no-argument function); returns name -> Future
+
+    Queries run on the panel pool, so a page takes as long as its slowest
+    query rather than the sum of them. Their spans land in the calling
+    rerun's trace. A panel query must never wait on another panel: the pool
+    is bounded, and a query blocking on a queued one could stall it.
+    """
+    trace = get_profiler().current_trace() if PROFILE_ENABLED else None
+
+    def run(name, query):
+        if not PROFILE_ENABLED:
+            return query()
+        with get_profiler().joined(trace), profile('panel', f"{loader.__name__}:{name}"):
+            return query()
+
+    if PANEL_WORKERS > 0:
+        executor = get_panel_executor()
+        return {name: executor.submit(run, name, query) for name, query in panels.items()}
+    futures = {}
+    for name, query in panels.items():
+        future = futures[name] = Future()
+        try:
+            future.set_result(run(name, query))
+        except Exception as error:
+            future.set_exception(error)
+    return futures
+
+
+def run_panels(loader, panels):
+    """Run the panel queries of a page concurrently and return name -> result once all are done"""
+    return {name: future.result() for name, future in submit_panels(loader, panels).items()}
+
+
+def stream_page_data(loader, panels, source, filters):
+    """Yield a page's data as (panel, result) pairs, each as soon as its query finishes
+
+    `panels(source, filters)` returns the page's panel queries; `loader`
+    must return exactly their results, since both share one cache entry.
+    Cached (or already loading) data is yielded at once. Otherwise the
+    queries start together and the assembled data is cached when the last
+    one lands, even if the page stops reading early.
+    """
+    cache = get_result_cache()
+    key = page_data_key(loader, source, filters)
+    queries = panels(source, filters)
+    claim = cache.claim(key)
+    if claim is None:
+        yield from get_page_data(loader, source, filters).items()
+        return
+
+    futures = submit_panels(loader, queries)
+    remaining = [len(futures)]
+    lock = threading.Lock()
+
+    def landed(_):
+        with lock:
+            remaining[0] -= 1
+            if remaining[0]:
+                return
+        try:
+            cache.settle(key, claim, lambda: {name: future.result() for name, future in futures.items()})
+        except Exception:
+            # The failed panel raises on the page itself; waiting sessions get the error through the claim
+            pass
+
+    names = {future: name for name, future in futures.items()}
+    for future in futures.values():
+        future.add_done_callback(landed)
+    for future in as_completed(names):
+        yield names[future], future.result()
+
+
+# ==================== BACKGROUND PRECOMPUTE ====================
+# Set MTN_PRECOMPUTE=0 to stop warming the default views between user visits
+PRECOMPUTE_ENABLED = os.environ.get('MTN_PRECOMPUTE', '1') != '0'
+# Seconds between warm-up passes; views expiring before the next pass are recomputed
+PRECOMPUTE_INTERVAL = int(os.environ.get('MTN_PRECOMPUTE_INTERVAL', RESULT_CACHE_TTL // 3))
+PRECOMPUTE_THREAD = 'page-precompute'
+
+
+class _HeadlessRenderLogFilter(logging.Filter):
+    """Drop the warnings Streamlit logs for each call made outside a script run, on the precompute thread only"""
+
+    def filter(self, record):
+        return threading.current_thread().name != PRECOMPUTE_THREAD
+
+
+def default_views(source):
+    """Filter contexts a fresh session lands on: the default date range, every region, all channels and tiers"""
+    return [
+        build_filter_context(source, DATE_RANGE_OPTIONS[0], datetime.now(), region=region)
+        for region in ["All Regions"] + REGIONS
+    ]
+
+
+class PrecomputeScheduler:
+    """Background thread that keeps every page's default views in the result cache
+
+    A pass runs every `interval` seconds and as soon as new data lands. It
+    first picks up delta partitions (so overnight deltas are ingested before
+    anyone logs in), then loads each page for each default view whose cache
+    entry is missing or would expire before the next pass, and renders the
+    page headless to build its figures and tables for the default
+    selections. The first session of the day then renders from memory,
+    without querying the fact tables or building charts.
+    """
+
+    def __init__(self, source, cache, interval=PRECOMPUTE_INTERVAL):
+        self.source = source
+        self.cache = cache
+        self.interval = interval
+        self.wake = threading.Event()
+        self.thread = threading.Thread(target=self._run, name=PRECOMPUTE_THREAD, daemon=True)
+        self.counters = {'passes': 0, 'views_computed': 0, 'last_pass_seconds': 0.0, 'last_error': None}
+        source.on_change(lambda source, tables: self.wake.set())
+        for name in ('streamlit.runtime.scriptrunner_utils.script_run_context', 'streamlit.deprecation_util'):
+            logging.getLogger(name).addFilter(_HeadlessRenderLogFilter())
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def _run(self):
+        while True:
+            try:
+                ingest_new_partitions(self.source)
+                self.warm()
+            except Exception as error:
+                # A failed pass leaves the cache as it was; users compute on demand until the next one
+                self.counters['last_error'] = repr(error)
+            self.wake.wait(self.interval)
+            self.wake.clear()
+
+    def warm(self):
+        """Compute every default view that is missing or about to expire; returns how many ran"""
+        started = time.perf_counter()
+        computed = 0
+        for filters in default_views(self.source):
+            for render, loader in PAGES.values():
+                key = page_data_key(loader, self.source, filters)
+                remaining = self.cache.expires_in(key)
+                if remaining > self.interval:
+                    continue
+                if remaining:
+                    self.cache.put(key, loader(self.source, filters))
+                    # Its figures and tables would expire right after it: rebuild them below
+                    self.cache.invalidate(lambda entry: len(entry) > len(key) and entry[:len(key)] == key)
+                else:
+                    # Shares the computation with a session that asks for the same view meanwhile
+                    self.cache.get_or_compute(key, lambda: loader(self.source, filters))
+                self.render(render, filters)
+                computed += 1
+        self.counters['passes'] += 1
+        self.counters['views_computed'] += computed
+        self.counters['last_pass_seconds'] = time.perf_counter() - started
+        return computed
+
+    def render(self, render, filters):
+        """Build a page's figures and tables for the default selections by rendering it headless
+
+        Outside a script run Streamlit calls draw nothing and every widget
+        returns its default, so the page's artifacts land in the cache under
+        the keys a fresh session looks up. A failing page is logged and
+        skipped; sessions then build its charts on demand.
+        """
+        try:
+            render(self.source, filters)
+        except Exception as error:
+            logger.warning("Precomputing %s failed: %s", render.__name__, error)
+
+    def stats(self):
+        """Pass count, views computed so far, duration of the last pass and its error if any"""
+        return dict(self.counters)
+
+
+@st.cache_resource(show_spinner=False)
+def get_precompute_scheduler():
+    """Start the process-wide precompute thread once; None when MTN_PRECOMPUTE=0"""
+    if not PRECOMPUTE_ENABLED:
+        return None
+    return PrecomputeScheduler(get_data_source(), get_result_cache()).start()
+
+
+# ==================== EXPORT ====================
+# Format label -> (file extension, MIME type); Excel needs the optional openpyxl package
+EXPORT_FORMATS = {
+    'CSV': ('csv', 'text/csv'),
+    'Parquet': ('parquet', 'application/vnd.apache.parquet'),
+    'Excel': ('xlsx', 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
+}
+
+# Days of fact rows held in memory at once while exporting
+EXPORT_CHUNK_DAYS = int(os.environ.get('MTN_EXPORT_CHUNK_DAYS', '31'))
+
+# Data rows per worksheet; Excel stops at 1,048,576 rows including the header
+EXCEL_SHEET_ROWS = 1_048_575
+
+# Exports are written under the app's static folder and served from disk by
+# Streamlit's static file serving (server.enableStaticServing in .streamlit/config.toml),
+# which refuses files over 200 MB. Without it they go through st.download_button,
+# which holds the file in memory, up to MTN_EXPORT_MEMORY_MB. Exports expire after MTN_EXPORT_TTL seconds.
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static')
+EXPORT_DIR = os.path.join(STATIC_DIR, 'exports')
+STATIC_FILE_BYTES = 200 * 1024 * 1024
+EXPORT_MEMORY_BYTES = int(os.environ.get('MTN_EXPORT_MEMORY_MB', '50')) * 1024 * 1024
+EXPORT_TTL = int(os.environ.get('MTN_EXPORT_TTL', '3600'))
+
+
+def export_formats():
+    """Export formats this install can write"""
+    import importlib.util
+    excel = importlib.util.find_spec('openpyxl') is not None
+    return [label for label in EXPORT_FORMATS if label != 'Excel' or excel]
+
+
+# Exports that are not fact tables: name -> rows for the filters, and the pages that add them
+DERIVED_EXPORTS = {
+    'agent_summary': lambda source, filters: source.agent_store.agents(filters.start, filters.end, filters.where)
+}
+LOADER_EXPORTS = {'load_agent_performance_data': ['agent_summary']}
+
+
+def iter_export_chunks(source, filters, table):
+    """Filtered rows of an export table; fact tables EXPORT_CHUNK_DAYS at a time, oldest first"""
+    if table in DERIVED_EXPORTS:
+        # One row per agent: small next to the fact tables, so built in one go
+        yield DERIVED_EXPORTS[table](source, filters)
+        return
+    step = pd.Timedelta(days=EXPORT_CHUNK_DAYS)
+    start = filters.start
+    while start <= filters.end:
+        end = min(start + step - pd.Timedelta(days=1), filters.end)
+        chunk = source.read(table, start=start, end=end, where=filters.where)
+        if len(chunk):
+            yield chunk
+        start = end + pd.Timedelta(days=1)
+
+
+def _write_csv(chunks, handle):
+    """Append chunks to a binary handle as one CSV with a single header"""
+    import io
+    text = io.TextIOWrapper(handle, encoding='utf-8', newline='', write_through=True)
+    header = True
+    for chunk in chunks:
+        chunk.to_csv(text, header=header, index=False, date_format='%Y-%m-%d')
+        header = False
+    text.detach()
+
+
+def _write_parquet(chunks, handle):
+    """Append chunks to a binary handle as row groups of one Parquet file"""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    writer = None
+    for chunk in chunks:
+        # Chunks can carry different category sets; plain strings keep the schema stable
+        dims = {column: str for column in chunk.columns if isinstance(chunk[column].dtype, pd.CategoricalDtype)}
+        batch = pa.Table.from_pandas(chunk.astype(dims), preserve_index=False)
+        if writer is None:
+            writer = pq.ParquetWriter(handle, batch.schema)
+        writer.write_table(batch.cast(writer.schema))
+    if writer is not None:
+        writer.close()
+
+
+def _write_excel(sheets, handle):
+    """Stream (sheet name, chunks) pairs into a write-only workbook, rolling over full sheets"""
+    from openpyxl import Workbook
+    workbook = Workbook(write_only=True)
+    for name, chunks in sheets:
+        sheet, rows, part, header = None, EXCEL_SHEET_ROWS, 1, None
+        for chunk in chunks:
+            header = list(chunk.columns)
+            if 'date' in chunk:
+                chunk = chunk.assign(date=chunk['date'].dt.date)
+            for row in chunk.itertuples(index=False, name=None):
+                if rows == EXCEL_SHEET_ROWS:
+                    sheet = workbook.create_sheet(name if part == 1 else f"{name} ({part})")
+                    sheet.append(list(chunk.columns))
+                    rows, part = 0, part + 1
+                sheet.append(row)
+                rows += 1
+        if sheet is None:
+            if header is None:
+                schema = FACT_SCHEMAS[name]
+                header = ['date'] + schema['dims'] + list(schema['measures'])
+            workbook.create_sheet(name).append(header)
+    workbook.save(handle)
+
+
+def export_tables(page):
+    """Fact tables behind a page, then its derived exports, in export order"""
+    loader = PAGES[page][1].__name__
+    return sorted(LOADER_TABLES[loader]) + LOADER_EXPORTS.get(loader, [])
+
+
+def export_target(page, filters, label):
+    """File name and MIME type of a page export; pages over several tables zip CSV and Parquet"""
+    extension, mime = EXPORT_FORMATS[label]
+    if label != 'Excel' and len(export_tables(page)) > 1:
+        extension, mime = 'zip', 'application/zip'
+    name = page.split(' ', 1)[-1].lower().replace(' ', '_')
+    return f"mtn_{name}_{filters.start:%Y%m%d}_{filters.end:%Y%m%d}.{extension}", mime
+
+
+def write_export(source, filters, page, label, handle):
+    """Write the filtered tables behind a page to a binary handle, one chunk at a time
+
+    CSV and Parquet hold one table per file, zipped together when the page
+    reads several; Excel puts each table on its own sheet.
+    """
+    import zipfile
+    extension = EXPORT_FORMATS[label][0]
+    tables = export_tables(page)
+    if label == 'Excel':
+        _write_excel(((table, iter_export_chunks(source, filters, table)) for table in tables), handle)
+    else:
+        write = _write_csv if label == 'CSV' else _write_parquet
+        if len(tables) == 1:
+            write(iter_export_chunks(source, filters, tables[0]), handle)
+        else:
+            with zipfile.ZipFile(handle, 'w', zipfile.ZIP_DEFLATED) as archive:
+                for table in tables:
+                    with archive.open(f"{table}.{extension}", 'w', force_zip64=True) as member:
+                        write(iter_export_chunks(source, filters, table), member)
+
+
+def clean_exports(now=None):
+    """Delete export folders older than EXPORT_TTL seconds"""
+    import shutil
+    if not os.path.isdir(EXPORT_DIR):
+        return
+    now = time.time() if now is None else now
+    for entry in os.scandir(EXPORT_DIR):
+        if now - entry.stat().st_mtime > EXPORT_TTL:
+            shutil.rmtree(entry.path, ignore_errors=True)
+
+
+def export_page(source, filters, page, label):
+    """Write a page export to its own folder under EXPORT_DIR; returns the file's path
+
+    Only one chunk of rows is in memory while writing, so long date ranges
+    cost disk, not RAM. Each export gets a random folder name, so its URL
+    cannot be guessed, and expired exports are cleaned up first.
+    """
+    import uuid
+    clean_exports()
+    folder = os.path.join(EXPORT_DIR, uuid.uuid4().hex)
+    os.makedirs(folder)
+    path = os.path.join(folder, export_target(page, filters, label)[0])
+    with open(path, 'wb') as handle:
+        write_export(source, filters, page, label, handle)
+    return path
+
+
+def show_export(path, mime):
+    """Offer a written export for download without loading it into the script
+
+    With static serving on, a link points at the file and the server streams
+    it from disk. Otherwise it goes through st.download_button, which holds
+    the whole file in memory, so files over EXPORT_MEMORY_BYTES are refused.
+    """
+    name, size = os.path.basename(path), os.path.getsize(path)
+    if st.get_option('server.enableStaticServing') and size <= STATIC_FILE_BYTES:
+        url = 'app/static/' + os.path.relpath(path, STATIC_DIR).replace(os.sep, '/')
+        st.markdown(
+            f'<a href="{url}" download="{name}">⬇️ {name} ({size / 1e6:,.1f} MB)</a>', unsafe_allow_html=True
+        )
+    elif size <= EXPORT_MEMORY_BYTES:
+        def read():
+            with open(path, 'rb') as handle:
+                return handle.read()
+        st.download_button(
+            f"⬇️ {name} ({size / 1e6:,.1f} MB)", data=read, file_name=name, mime=mime,
+            on_click="ignore", key="export_download", use_container_width=True
+        )
+    else:
+        limit = STATIC_FILE_BYTES if st.get_option('server.enableStaticServing') else EXPORT_MEMORY_BYTES
+        st.warning(
+            f"This export is {size / 1e6:,.0f} MB, over the {limit / 1e6:,.0f} MB download limit. "
+            "Narrow the date range or filters."
+        )
+
+
 # ==================== MAIN APP ====================
 def main():
-    data = generate_sample_data()
+    trace = get_profiler().begin_run() if PROFILE_ENABLED else []
+    source = get_data_source()
+    ingest_new_partitions(source)
+    get_precompute_scheduler()
     
     # ==================== TOP HEADER WITH LOGO ====================
     st.markdown('<div style="margin-top: 0; position: relative; z-index: 100;">', unsafe_allow_html=True)
@@ -2538,14 +5801,15 @@ def main():
         st.markdown('<div class="filter-label">📅 Date Range</div>', unsafe_allow_html=True)
         date_option = st.selectbox(
             "date_range",
-            ["MTD", "QTD", "YTD", "Last 7 Days", "Last 30 Days", "Last 90 Days", "Custom"],
+            DATE_RANGE_OPTIONS,
             label_visibility="collapsed",
             key="date_filter"
         )
         
+        custom_start = custom_end = None
         if date_option == "Custom":
-            st.date_input("From", datetime.now() - timedelta(days=30), key="start_date")
-            st.date_input("To", datetime.now(), key="end_date")
+            custom_start = st.date_input("From", datetime.now() - timedelta(days=30), key="start_date")
+            custom_end = st.date_input("To", datetime.now(), key="end_date")
         st.markdown('</div>', unsafe_allow_html=True)
         
         # Region Filter
@@ -2553,7 +5817,7 @@ def main():
         st.markdown('<div class="filter-label">🗺️ Region</div>', unsafe_allow_html=True)
         selected_region = st.selectbox(
             "region",
-            ["All Regions"] + list(data['regional_data']['region']),
+            ["All Regions"] + REGIONS,
             label_visibility="collapsed",
             key="region_filter"
         )
@@ -2564,7 +5828,7 @@ def main():
         st.markdown('<div class="filter-label">📡 Channel</div>', unsafe_allow_html=True)
         selected_channel = st.selectbox(
             "channel",
-            ["All Channels", "YC (Yellow Centers)", "DTC (MTN Shops)", "DTR (Dealers)", "Digital"],
+            ["All Channels"] + ACQUISITION_CHANNELS,
             label_visibility="collapsed",
             key="channel_filter"
         )
@@ -2581,6 +5845,12 @@ def main():
         )
         st.markdown('</div>', unsafe_allow_html=True)
         
+        # Every page loader receives the same filters and pushes them into its queries
+        filters = build_filter_context(
+            source, date_option, selected_date, custom_start, custom_end,
+            selected_region, selected_channel, selected_tier
+        )
+        
         st.markdown('<div style="margin-top: 30px;">', unsafe_allow_html=True)
         
         # Action Buttons - Modified
@@ -2590,44 +5860,44 @@ def main():
                 st.info("Redirecting to home...")
         
         with col_btn2:
-            if st.button("📥 Export", key="export_btn", use_container_width=True):
-                st.info("Export functionality")
+            with st.popover("📥 Export", use_container_width=True):
+                # The file is written to disk for the page being viewed and offered until the selection changes
+                export_page_label = st.session_state.get('active_page', PAGE_LABELS[0])
+                export_format = st.selectbox("Format", export_formats(), key="export_format")
+                export_mime = export_target(export_page_label, filters, export_format)[1]
+                export_key = page_data_key(PAGES[export_page_label][1], source, filters) + (export_format,)
+                if st.button("Prepare export", key="export_btn", use_container_width=True):
+                    with st.spinner("Writing export..."):
+                        path = export_page(source, filters, export_page_label, export_format)
+                    st.session_state['export_file'] = (export_key, path)
+                prepared = st.session_state.get('export_file')
+                if prepared and prepared[0] == export_key and os.path.exists(prepared[1]):
+                    show_export(prepared[1], export_mime)
         
         st.markdown('</div>', unsafe_allow_html=True)
     
     # ==================== RIGHT CONTENT AREA WITH TAB NAVIGATION ====================
     with col_content:
-        # Tab Navigation - Power BI Style
-        tab1, tab2, tab3, tab4, tab5, tab6, tab7 = st.tabs([
-            "📊 Overview",
-            "💰 Airtime Sales",
-            "💸 Float Management",
-            "👥 Agent Network",
-            "🏆 Agent Performance",
-            "📈 Acquisition",
-            "🔄 Customer Conversion"
-        ])
-        
-        with tab1:
-            render_overview_content(data)
-        
-        with tab2:
-            render_airtime_sales_content(data)
-        
-        with tab3:
-            render_float_management_content(data)
-        
-        with tab4:
-            render_agent_network_content(data)
+        # Tab Navigation - Power BI Style; the selection lives in session state
+        active_page = st.radio(
+            "page",
+            PAGE_LABELS,
+            horizontal=True,
+            label_visibility="collapsed",
+            key="active_page"
+        )
         
-        with tab5:
-            render_agent_performance_content(data)
+        previous_page = st.session_state.get('previous_page')
+        if previous_page and previous_page != active_page:
+            record_navigation(previous_page, active_page)
+        st.session_state['previous_page'] = active_page
         
-        with tab6:
-            render_acquisition_content(data)
+        render_page, _ = PAGES[active_page]
+        with profile('page', active_page):
+            render_page(source, filters)
         
-        with tab7:
-            render_customer_conversion_content(data)
+        if PREFETCH_ENABLED:
+            prefetch_page(predict_next_page(active_page), source, filters)
     
     # ==================== FOOTER ====================
     st.markdown("---")
@@ -2637,10 +5907,15 @@ def main():
             MTN Benin - Sales & Distribution Dashboard
         </p>
         <p style="color: #4A4A4A; font-size: 10px; margin: 6px 0 0 0;">
-            Powered by Streamlit • Data refreshes every 15 minutes • © 2025 MTN Benin
+            Powered by Streamlit • Data refreshes every {RESULT_CACHE_TTL // 60} minutes • © 2025 MTN Benin
         </p>
     </div>
     """, unsafe_allow_html=True)
+    
+    if PROFILE_ENABLED:
+        get_profiler().write_metrics()
+        if st.query_params.get('debug') == '1':
+            render_debug_panel(trace)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,254 @@
+"""
+MTN Benin - Sales & Distribution Dashboard
+Benchmarks: cold import cost of the app and its dependencies, and headless render
+time of every page, map and daily table against a synthetic dataset of chosen size
+Run: python benchmark.py [--suite all|startup|render] [--runs 5] [--days 730] [--agents 4500]
+                         [--grain commune|region] [--seed 2025] [--json] [--save results.json]
+                         [--compare baseline.json]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+APP_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'S&D_Final.py')
+
+# Stacks that must stay off the startup path; the app imports them on first use
+LAZY_MODULES = ['geopandas', 'PIL.Image', 'plotly.express', 'plotly.subplots']
+
+# Every child starts from a fresh interpreter so nothing is already in sys.modules
+IMPORT_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+print(json.dumps({{'seconds': time.perf_counter() - start}}))
+"""
+
+APP_PROBE = """
+import json, runpy, sys, time, warnings
+warnings.simplefilter('ignore')
+start = time.perf_counter()
+runpy.run_path({path!r}, run_name='benchmark')
+seconds = time.perf_counter() - start
+print(json.dumps({{'seconds': seconds, 'loaded': [m for m in {lazy!r} if m in sys.modules]}}))
+"""
+
+FIRST_RENDER_PROBE = """
+import json, time, warnings
+warnings.simplefilter('ignore')
+from streamlit.testing.v1 import AppTest
+start = time.perf_counter()
+app = AppTest.from_file({path!r}, default_timeout=300)
+app.run()
+print(json.dumps({{'seconds': time.perf_counter() - start, 'exceptions': len(app.exception)}}))
+"""
+
+# Writes the app's seeded sample data: fact tables and agent activity, as Parquet
+DATASET_PROBE = """
+import json, runpy, warnings
+warnings.simplefilter('ignore')
+app = runpy.run_path({path!r}, run_name='benchmark')
+written = app['write_synthetic_dataset'](
+    {directory!r}, days={days}, seed={seed}, communes={communes}, agents={agents}
+)
+print(json.dumps({{'rows': sum(written.values())}}))
+"""
+
+# Opens every page twice (cold, then from the result cache) and reads the app's own profiling spans
+RENDER_PROBE = """
+import json, os, time, warnings
+warnings.simplefilter('ignore')
+from streamlit.testing.v1 import AppTest
+log = os.environ['MTN_PROFILE_LOG']
+
+def spans():
+    with open(log, encoding='utf-8') as f:
+        lines = f.readlines()
+    open(log, 'w').close()
+    return [json.loads(line) for line in lines]
+
+app = AppTest.from_file({path!r}, default_timeout=300)
+results = {{}}
+for page in {pages!r}:
+    for phase in ('cold', 'warm'):
+        if results:
+            app.radio(key='active_page').set_value(page)
+        start = time.perf_counter()
+        app.run()
+        seconds = time.perf_counter() - start
+        if app.exception:
+            raise RuntimeError(page + ': ' + str(app.exception[0].value))
+        results[page + '|' + phase] = {{'seconds': seconds, 'spans': spans()}}
+print(json.dumps(results))
+"""
+
+
+# Pages in tab order, and the daily tables and choropleths the render benchmark breaks out
+PAGES = [
+    "📊 Overview", "💰 Airtime Sales", "💸 Float Management", "👥 Agent Network",
+    "🏆 Agent Performance", "📈 Acquisition", "🔄 Customer Conversion"
+]
+COMPONENT_SPANS = {
+    'map': ('chart', ':map'),
+    'daily_table': ('table', ':daily')
+}
+
+# A step slower than the baseline by more than this fraction is reported as a regression
+REGRESSION_TOLERANCE = 0.20
+
+
+# ==================== PROBES ====================
+def run_probe(code, env=None):
+    """Run a probe in a fresh interpreter and return its JSON result"""
+    result = subprocess.run(
+        [sys.executable, '-c', code],
+        capture_output=True, text=True, cwd=os.path.dirname(APP_PATH),
+        env=dict(os.environ, MTN_PREFETCH='0', MTN_PRECOMPUTE='0', **(env or {})),
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1] if result.stderr else 'probe failed')
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def time_probe(code, runs):
+    """Median and best wall time of a probe over `runs` cold starts"""
+    samples = [run_probe(code) for _ in range(runs)]
+    seconds = [sample['seconds'] for sample in samples]
+    return {'median': statistics.median(seconds), 'best': min(seconds), 'last': samples[-1]}
+
+
+def summarize(samples):
+    """Median and best of a list of seconds"""
+    return {'median': statistics.median(samples), 'best': min(samples)}
+
+
+# ==================== BENCHMARKS ====================
+def bench_startup(runs=5):
+    """Cold-start timings: each heavy dependency alone, the app module, and its first render"""
+    results = {'dependencies': {}}
+    for module in ['streamlit', 'pandas'] + LAZY_MODULES:
+        timing = time_probe(IMPORT_PROBE.format(module=module), runs)
+        results['dependencies'][module] = {'median': timing['median'], 'best': timing['best']}
+
+    app = time_probe(APP_PROBE.format(path=APP_PATH, lazy=LAZY_MODULES), runs)
+    results['app_import'] = {'median': app['median'], 'best': app['best'], 'eager_lazy_modules': app['last']['loaded']}
+
+    render = time_probe(FIRST_RENDER_PROBE.format(path=APP_PATH), max(1, runs // 2))
+    results['first_render'] = {'median': render['median'], 'best': render['best'], 'exceptions': render['last']['exceptions']}
+    return results
+
+
+def bench_render(runs=3, days=730, agents=4500, grain='commune', seed=2025):
+    """Render timings of each page (cold and cached), each choropleth and each daily table
+
+    The seeded dataset is written once and every run renders it in a fresh
+    interpreter through AppTest, so runs are comparable across commits.
+    Per-component times come from the app's own profiling spans.
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        dataset = run_probe(DATASET_PROBE.format(
+            path=APP_PATH, directory=directory, days=days, seed=seed, communes=grain == 'commune', agents=agents
+        ))
+        env = {'MTN_DATA_DIR': directory, 'MTN_PROFILE': '1', 'MTN_PROFILE_LOG': os.path.join(directory, 'spans.jsonl')}
+        samples = [run_probe(RENDER_PROBE.format(path=APP_PATH, pages=PAGES), env) for _ in range(runs)]
+
+    steps = {}
+    for sample in samples:
+        for run, result in sample.items():
+            page, phase = run.split('|')
+            steps.setdefault(f"page {page} ({phase})", []).append(result['seconds'])
+            for component, (kind, suffix) in COMPONENT_SPANS.items():
+                for span in result['spans']:
+                    if span['kind'] == kind and span['name'].endswith(suffix):
+                        name = f"{component} {span['name'][:-len(suffix)].replace('load_', '').replace('_data', '')} ({phase})"
+                        steps.setdefault(name, []).append(span['seconds'])
+    return {
+        'dataset': {'days': days, 'agents': agents, 'grain': grain, 'seed': seed, 'rows': dataset['rows']},
+        'steps': {name: summarize(seconds) for name, seconds in steps.items()}
+    }
+
+
+def flatten(results):
+    """Every timed step of a result set as name -> {'median', 'best'}"""
+    steps = {}
+    if 'startup' in results:
+        startup = results['startup']
+        steps.update({f"import {module}": t for module, t in startup['dependencies'].items()})
+        steps.update({step: startup[step] for step in ('app_import', 'first_render')})
+    if 'render' in results:
+        steps.update(results['render']['steps'])
+    return steps
+
+
+def compare(results, baseline, tolerance=REGRESSION_TOLERANCE):
+    """Steps whose median got slower than the baseline by more than `tolerance`"""
+    current, previous = flatten(results), flatten(baseline)
+    return {
+        step: {'baseline': previous[step]['median'], 'current': t['median']}
+        for step, t in current.items()
+        if step in previous and t['median'] > previous[step]['median'] * (1 + tolerance)
+    }
+
+
+def print_report(results, regressions=None):
+    """Human-readable summary of the benchmark results"""
+    if 'render' in results:
+        dataset = results['render']['dataset']
+        print(f"Dataset: {dataset['days']} days by {dataset['grain']}, {dataset['agents']} agents, "
+              f"{dataset['rows']:,} rows (seed {dataset['seed']})\n")
+    print(f"{'Step':<48}{'median (s)':>12}{'best (s)':>12}")
+    for step, t in flatten(results).items():
+        flag = '  REGRESSION' if regressions and step in regressions else ''
+        print(f"{step:<48}{t['median']:>12.3f}{t['best']:>12.3f}{flag}")
+
+    startup = results.get('startup')
+    if startup and startup['app_import']['eager_lazy_modules']:
+        print(f"\nWARNING: imported at startup but meant to be lazy: {', '.join(startup['app_import']['eager_lazy_modules'])}")
+    if startup and startup['first_render']['exceptions']:
+        print(f"\nWARNING: first render raised {startup['first_render']['exceptions']} exception(s)")
+    for step, change in (regressions or {}).items():
+        print(f"\nREGRESSION: {step} {change['baseline']:.3f}s -> {change['current']:.3f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Dashboard startup and render benchmark")
+    parser.add_argument('--suite', choices=['all', 'startup', 'render'], default='all', help="what to measure")
+    parser.add_argument('--runs', type=int, default=5, help="cold starts per measurement")
+    parser.add_argument('--days', type=int, default=730, help="days of synthetic fact data to render")
+    parser.add_argument('--agents', type=int, default=4500, help="agent headcount of the synthetic data")
+    parser.add_argument('--grain', choices=['commune', 'region'], default='commune', help="geographic grain of the rows")
+    parser.add_argument('--seed', type=int, default=2025, help="seed of the synthetic data")
+    parser.add_argument('--json', action='store_true', help="print raw results as JSON")
+    parser.add_argument('--save', help="write raw results to this JSON file (a baseline for --compare)")
+    parser.add_argument('--compare', help="baseline JSON file; steps slower by more than --tolerance fail the run")
+    parser.add_argument('--tolerance', type=float, default=REGRESSION_TOLERANCE, help="allowed slowdown, as a fraction")
+    args = parser.parse_args()
+
+    results = {}
+    if args.suite in ('all', 'startup'):
+        results['startup'] = bench_startup(args.runs)
+    if args.suite in ('all', 'render'):
+        results['render'] = bench_render(max(1, args.runs // 2), args.days, args.agents, args.grain, args.seed)
+
+    regressions = {}
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump(results, f, indent=2)
+    if args.json:
+        print(json.dumps({**results, 'regressions': regressions}, indent=2))
+    else:
+        print_report(results, regressions)
+    # A lazy stack leaking onto the startup path or a slower step fails the run, so CI can gate on it
+    eager = results.get('startup', {}).get('app_import', {}).get('eager_lazy_modules')
+    return 1 if eager or regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
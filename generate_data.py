@@ -0,0 +1,48 @@
+"""
+MTN Benin - Sales & Distribution Dashboard
+Sample data generator: seeded fact tables and agent activity at production volume, as Parquet
+Run: python generate_data.py data/ [--days 1095] [--agents 20000] [--grain commune] [--seed 2025]
+Then: MTN_DATA_DIR=data/ streamlit run "S&D_Final.py"
+"""
+
+import argparse
+import json
+import os
+import runpy
+import sys
+import time
+import warnings
+
+APP_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'S&D_Final.py')
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write seeded sample data for the dashboard as Parquet")
+    parser.add_argument('path', help="output directory (created if missing)")
+    parser.add_argument('--days', type=int, default=1095, help="days of history ending on --end")
+    parser.add_argument('--end', help="last day (YYYY-MM-DD), default today")
+    parser.add_argument('--agents', type=int, default=20000, help="agent headcount on the last day")
+    parser.add_argument('--no-activity', action='store_true', help="skip agent_activity.parquet (one row per agent per day)")
+    parser.add_argument('--grain', choices=['commune', 'region'], default='commune', help="geographic grain of the rows")
+    parser.add_argument('--seed', type=int, default=2025, help="same seed and end date give the same data")
+    parser.add_argument('--chunk-days', type=int, default=31, help="days of agent activity generated at a time")
+    args = parser.parse_args()
+
+    # Load the app's generators without starting the dashboard
+    warnings.simplefilter('ignore')
+    app = runpy.run_path(APP_PATH, run_name='generate')
+    start = time.perf_counter()
+    written = app['write_synthetic_dataset'](
+        args.path, days=args.days, end=args.end, seed=args.seed,
+        communes=args.grain == 'commune', agents=args.agents, activity=not args.no_activity,
+        chunk_days=args.chunk_days
+    )
+    seconds = time.perf_counter() - start
+
+    size = sum(os.path.getsize(os.path.join(args.path, name)) for name in os.listdir(args.path))
+    print(json.dumps({'rows': written, 'megabytes': round(size / 1e6, 1), 'seconds': round(seconds, 1)}, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,23 @@
+"""
+MTN Benin - Sales & Distribution Dashboard
+Shared test fixtures: the app module, loaded once per test session
+"""
+
+import os
+import runpy
+import warnings
+
+import pytest
+
+APP_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'S&D_Final.py')
+
+# No background threads: each test sees only the work it starts
+os.environ.setdefault('MTN_PREFETCH', '0')
+os.environ.setdefault('MTN_PRECOMPUTE', '0')
+
+
+@pytest.fixture(scope='session')
+def app():
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        return runpy.run_path(APP_PATH, run_name='app_test')
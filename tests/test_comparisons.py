@@ -0,0 +1,74 @@
+"""
+MTN Benin - Sales & Distribution Dashboard
+Period comparison tests: DoD/WoW/MoM/QTD/YTD/YoY windows and changes on a hand-built daily frame
+Run: python -m pytest tests
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+# Reporting window: the week ending Friday 15 March 2024
+START, END = pd.Timestamp('2024-03-09'), pd.Timestamp('2024-03-15')
+
+# The windows each comparison should use, worked out by hand: (current, reference)
+EXPECTED_WINDOWS = {
+    'dod': (('2024-03-15', '2024-03-15'), ('2024-03-14', '2024-03-14')),
+    'wow': (('2024-03-09', '2024-03-15'), ('2024-03-02', '2024-03-08')),
+    'mom': (('2024-03-01', '2024-03-15'), ('2024-02-01', '2024-02-15')),
+    'qtd': (('2024-01-01', '2024-03-15'), ('2023-10-01', '2023-12-15')),
+    'ytd': (('2024-01-01', '2024-03-15'), ('2023-01-01', '2023-03-15')),
+    'yoy': (('2024-03-09', '2024-03-15'), ('2023-03-09', '2023-03-15'))
+}
+
+
+def daily_frame(first='2023-01-01', last='2024-03-31'):
+    """Gross adds growing by one a day, a budget of 100 a day, a saw-tooth market share and a stock of agents"""
+    dates = pd.date_range(first, last, freq='D')
+    day = np.arange(1, len(dates) + 1, dtype='float64')
+    return pd.DataFrame({
+        'gross_adds': day,
+        'budget_gross_adds': 100.0,
+        'market_share': 40 + day % 10,
+        'budget_market_share': 45.0,
+        'agents': 1000 + day
+    }, index=dates)
+
+
+def change(current, reference):
+    return (current - reference) / abs(reference) * 100
+
+
+def test_windows_match_the_calendar(app):
+    windows = app['comparison_windows'](pd.DatetimeIndex([START]), pd.DatetimeIndex([END]))
+    assert set(windows) == set(app['PERIOD_COMPARISONS'])
+    for comparison, expected in EXPECTED_WINDOWS.items():
+        actual = tuple((bounds[0][0], bounds[1][0]) for bounds in windows[comparison])
+        assert actual == tuple(tuple(map(pd.Timestamp, window)) for window in expected), comparison
+
+
+def test_changes_sum_flows_average_rates_and_read_stocks_on_the_last_day(app):
+    daily = daily_frame()
+    result = app['compare_periods'](daily, ['gross_adds', 'market_share', 'agents'], [START], [END]).iloc[0]
+    for comparison, (current, reference) in EXPECTED_WINDOWS.items():
+        flows = daily.loc[slice(*current), 'gross_adds'].sum(), daily.loc[slice(*reference), 'gross_adds'].sum()
+        rates = daily.loc[slice(*current), 'market_share'].mean(), daily.loc[slice(*reference), 'market_share'].mean()
+        stocks = daily.loc[current[1], 'agents'], daily.loc[reference[1], 'agents']
+        assert result[('gross_adds', comparison)] == pytest.approx(change(*flows)), comparison
+        assert result[('market_share', comparison)] == pytest.approx(change(*rates)), comparison
+        assert result[('agents', comparison)] == pytest.approx(change(*stocks)), comparison
+
+    window = daily.loc[START:END]
+    assert result[('gross_adds', 'value')] == window['gross_adds'].sum()
+    assert result[('gross_adds', 'budget')] == 700.0
+    assert result[('gross_adds', 'vs_budget')] == pytest.approx(change(window['gross_adds'].sum(), 700.0))
+    assert result[('market_share', 'budget')] == pytest.approx(45.0)
+    assert np.isnan(result[('agents', 'budget')])
+
+
+def test_windows_before_the_history_are_unavailable(app):
+    result = app['compare_periods'](daily_frame(first='2024-01-01'), ['gross_adds'], [START], [END]).iloc[0]
+    for comparison in ('qtd', 'ytd', 'yoy'):
+        assert np.isnan(result[('gross_adds', comparison)]), comparison
+    for comparison in ('dod', 'wow', 'mom'):
+        assert not np.isnan(result[('gross_adds', comparison)]), comparison
@@ -0,0 +1,68 @@
+"""
+MTN Benin - Sales & Distribution Dashboard
+KPI cube tests: cube answers match a raw scan of the fact table rows
+Run: python -m pytest tests
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+
+@pytest.fixture(scope='module')
+def sources(app):
+    """The same sample tables with and without a KPI cube attached"""
+    tables = app['synthesize_fact_tables'](days=120, seed=7, agents=300)
+    scan, cubed = app['DataSource'](tables), app['DataSource'](tables)
+    cubed.cube = app['KpiCube'](cubed)
+    return scan, cubed
+
+
+def raw(source, table, measures, by, start, end, where=None, agg='sum'):
+    """Aggregate straight from DataSource.read rows, without the query engine"""
+    rows = source.read(table, start=start, end=end, where=where)
+    values = rows[measures].astype('float64')
+    if not by:
+        return getattr(values, agg)()
+    return getattr(values.groupby([rows[col] for col in by], observed=True), agg)()
+
+
+@pytest.mark.parametrize('where', [None, {'region': 'Borgou'}, {'region': ['Zou', 'Mono'], 'channel': 'MoMo'}])
+def test_cube_totals_match_a_raw_scan(sources, where):
+    scan, cubed = sources
+    start, end = cubed.latest_date - pd.Timedelta(days=44), cubed.latest_date - pd.Timedelta(days=3)
+    measures = ['airtime_sales', 'transactions']
+    total = cubed.query('sales', measures, by=[], start=start, end=end, where=where)
+    expected = raw(scan, 'sales', measures, [], start, end, where)
+    assert np.allclose(total[measures].iloc[0].to_numpy(), expected.to_numpy(), rtol=1e-6)
+
+    by_region = cubed.query('sales', measures, by=['region'], start=start, end=end, where=where).set_index('region')
+    expected = raw(scan, 'sales', measures, ['region'], start, end, where)
+    assert np.allclose(by_region.loc[expected.index, measures].to_numpy(), expected.to_numpy(), rtol=1e-6)
+
+
+def test_cube_series_match_a_raw_scan(sources):
+    scan, cubed = sources
+    start, end = cubed.first_date + pd.Timedelta(days=10), cubed.latest_date
+    series = cubed.query('acquisition', ['gross_adds'], by=['date'], start=start, end=end).set_index('date')
+    expected = raw(scan, 'acquisition', ['gross_adds'], ['date'], start, end)
+    assert series.index.equals(expected.index)
+    assert np.allclose(series['gross_adds'].to_numpy(), expected['gross_adds'].to_numpy())
+
+    # Rates are averaged, not summed
+    share = cubed.query('market', ['market_share'], by=['date'], start=start, end=end, agg='mean').set_index('date')
+    expected = raw(scan, 'market', ['market_share'], ['date'], start, end, agg='mean')
+    assert np.allclose(share['market_share'].to_numpy(), expected['market_share'].to_numpy(), rtol=1e-6)
+
+
+def test_cube_kpis_match_the_scan_engine(sources):
+    scan, cubed = sources
+    measures = ['airtime_sales', 'gross_adds', 'net_adds', 'market_share', 'agents']
+    start, end = cubed.latest_date - pd.Timedelta(days=29), cubed.latest_date
+    pd.testing.assert_frame_equal(
+        cubed.kpi_totals(measures, start, end, by=['region']), scan.kpi_totals(measures, start, end, by=['region']),
+        check_dtype=False, rtol=1e-6
+    )
+    pd.testing.assert_frame_equal(
+        cubed.kpi_series(measures, start, end), scan.kpi_series(measures, start, end), check_dtype=False, rtol=1e-6
+    )
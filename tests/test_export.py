@@ -0,0 +1,112 @@
+"""
+MTN Benin - Sales & Distribution Dashboard
+Export tests: every page and format is written to disk and offered for download
+Run: python -m pytest tests
+"""
+
+import io
+import os
+import shutil
+import zipfile
+
+import pandas as pd
+import pytest
+import streamlit
+from streamlit.testing.v1 import AppTest
+
+APP_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'S&D_Final.py')
+EXPORT_DIR = os.path.join(os.path.dirname(APP_PATH), 'static', 'exports')
+
+
+@pytest.fixture(autouse=True, scope='module')
+def remove_exports():
+    """Delete the export folders these tests write"""
+    before = set(os.listdir(EXPORT_DIR)) if os.path.isdir(EXPORT_DIR) else set()
+    yield
+    for name in set(os.listdir(EXPORT_DIR) if os.path.isdir(EXPORT_DIR) else []) - before:
+        shutil.rmtree(os.path.join(EXPORT_DIR, name), ignore_errors=True)
+
+
+def read_export(data, extension, table):
+    """Rows of one table of an export, from the bytes Streamlit would serve"""
+    if extension == 'csv':
+        return pd.read_csv(io.BytesIO(data))
+    if extension == 'parquet':
+        return pd.read_parquet(io.BytesIO(data))
+    if extension == 'xlsx':
+        return pd.read_excel(io.BytesIO(data), sheet_name=table)
+    with zipfile.ZipFile(io.BytesIO(data)) as archive:
+        name = next(name for name in archive.namelist() if name.startswith(f"{table}."))
+        member = archive.read(name)
+    return read_export(member, name.rsplit('.', 1)[1], table)
+
+
+def expected_rows(app, source, filters, table):
+    """Row count of one export table, straight from the data source"""
+    if table in app['DERIVED_EXPORTS']:
+        return len(app['DERIVED_EXPORTS'][table](source, filters))
+    return len(source.read(table, start=filters.start, end=filters.end, where=filters.where))
+
+
+def read_file(path):
+    with open(path, 'rb') as handle:
+        return handle.read()
+
+
+def test_every_page_and_format_is_written_to_disk(app):
+    source = app['get_data_source']()
+    filters = app['build_filter_context'](source, "Last 7 Days", source.latest_date)
+    for page in app['PAGE_LABELS']:
+        for label in app['export_formats']():
+            path = app['export_page'](source, filters, page, label)
+            name, _ = app['export_target'](page, filters, label)
+            assert os.path.basename(path) == name and path.startswith(EXPORT_DIR)
+            for table in app['export_tables'](page):
+                assert len(read_export(read_file(path), name.rsplit('.', 1)[1], table)) == expected_rows(
+                    app, source, filters, table
+                ), (page, label, table)
+
+
+def test_expired_exports_are_cleaned_up(app):
+    source = app['get_data_source']()
+    filters = app['build_filter_context'](source, "Last 7 Days", source.latest_date)
+    path = app['export_page'](source, filters, app['PAGE_LABELS'][0], 'CSV')
+    app['clean_exports'](now=os.path.getmtime(os.path.dirname(path)) + app['EXPORT_TTL'] - 1)
+    assert os.path.exists(path)
+    app['clean_exports'](now=os.path.getmtime(os.path.dirname(path)) + app['EXPORT_TTL'] + 1)
+    assert not os.path.exists(os.path.dirname(path))
+
+
+def test_prepared_export_is_linked_from_the_static_folder():
+    app_test = AppTest.from_file(APP_PATH, default_timeout=300)
+    app_test.run()
+    for label in app_test.selectbox(key='export_format').options:
+        app_test.selectbox(key='export_format').set_value(label).run()
+        app_test.button(key='export_btn').click().run()
+        assert not app_test.exception
+        link = next(node.value for node in app_test.markdown if 'app/static/exports/' in node.value)
+        url = link.split('href="', 1)[1].split('"', 1)[0]
+        assert read_file(os.path.join(EXPORT_DIR, *url.split('/')[3:])), label
+
+
+def test_agent_performance_exports_the_agent_store(app):
+    source = app['get_data_source']()
+    filters = app['build_filter_context'](source, "Last 7 Days", source.latest_date)
+    page = next(page for page in app['PAGE_LABELS'] if 'Agent Performance' in page)
+    assert app['export_tables'](page) == ['agents', 'agent_summary']
+    agents = read_export(read_file(app['export_page'](source, filters, page, 'CSV')), 'zip', 'agent_summary')
+    assert len(agents) == source.agent_store.summary(filters.start, filters.end, filters.where)['agents']
+    assert set(agents['tier']) <= set(app['AGENT_TIERS'])
+
+
+def test_without_static_serving_the_export_is_a_download_button(monkeypatch):
+    get_option = streamlit.get_option
+    monkeypatch.setattr(
+        'streamlit.get_option', lambda key: False if key == 'server.enableStaticServing' else get_option(key)
+    )
+    app_test = AppTest.from_file(APP_PATH, default_timeout=300)
+    app_test.run()
+    app_test.button(key='export_btn').click().run()
+    assert not app_test.exception
+    assert [node for node in app_test.get('download_button') if node.proto.id.endswith('export_download')]
+    assert not [node for node in app_test.markdown if 'app/static/exports/' in node.value]
@@ -0,0 +1,104 @@
+"""
+MTN Benin - Sales & Distribution Dashboard
+Incremental ingestion tests: delta partitions that load, get rejected, get dropped or are rewritten
+Run: python -m pytest tests
+"""
+
+import logging
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+
+@pytest.fixture
+def dataset(app, tmp_path):
+    """A small on-disk dataset, its data source with a KPI cube, and the loaded sales rows"""
+    app['write_synthetic_dataset'](str(tmp_path), days=30, seed=3, communes=False, agents=100)
+    source = app['DataSource'].from_path(str(tmp_path), mmap=False)
+    source.cube = app['KpiCube'](source)
+    os.makedirs(tmp_path / 'deltas' / 'sales')
+    return source, tmp_path, pd.read_parquet(tmp_path / 'sales.parquet')
+
+
+def day(sales, offset):
+    """The last loaded day's sales rows, moved `offset` days later"""
+    last = sales['date'].max()
+    return sales[sales['date'] == last].assign(date=last + pd.Timedelta(days=offset))
+
+
+def write(frame, path, bump=0):
+    """Write a partition; `bump` pushes its modification time forward as a rewrite would"""
+    frame.to_parquet(path)
+    if bump:
+        stat = os.stat(path)
+        os.utime(path, (stat.st_atime, stat.st_mtime + bump))
+
+
+def daily_sales(source, start):
+    """Airtime sales per day from the cube, and from a raw scan of the rows"""
+    cube = source.query('sales', ['airtime_sales'], by=['date'], start=start).set_index('date')['airtime_sales']
+    rows = source.read('sales', start=start)
+    return cube, rows.groupby('date', observed=True)['airtime_sales'].sum()
+
+
+def test_new_partitions_are_appended(app, dataset):
+    source, root, sales = dataset
+    write(day(sales, 1), root / 'deltas' / 'sales' / 'day1.parquet')
+    write(day(sales, 1), root / 'deltas' / 'sales' / '.day1.parquet.tmp')
+    assert app['ingest_partitions'](source, str(root)) == ['sales']
+    assert source.latest_date == sales['date'].max() + pd.Timedelta(days=1)
+    cube, scan = daily_sales(source, source.latest_date)
+    assert np.allclose(cube.to_numpy(), day(sales, 1)['airtime_sales'].sum(), rtol=1e-6)
+    assert np.allclose(scan.to_numpy(), cube.to_numpy(), rtol=1e-6)
+    assert app['ingest_partitions'](source, str(root)) == []
+
+
+def test_malformed_partitions_are_rejected_until_rewritten(app, dataset, caplog):
+    source, root, sales = dataset
+    path = root / 'deltas' / 'sales' / 'day1.parquet'
+    write(day(sales, 1).drop(columns=['airtime_sales']), path)
+    (root / 'deltas' / 'sales' / 'day2.parquet').write_bytes(b'PAR1 truncated')
+    with caplog.at_level(logging.WARNING):
+        assert app['ingest_partitions'](source, str(root)) == []
+    assert sorted(os.path.basename(p) for p in source.rejected) == ['day1.parquet', 'day2.parquet']
+    assert sum('Skipping delta partition' in record.message for record in caplog.records) == 2
+    assert app['ingest_partitions'](source, str(root)) == []
+
+    write(day(sales, 1), path, bump=5)
+    assert app['ingest_partitions'](source, str(root)) == ['sales']
+    assert str(path) in source.ingested
+
+
+def test_rows_on_loaded_days_are_dropped_and_logged(app, dataset, caplog):
+    source, root, sales = dataset
+    loaded = len(source.read('sales'))
+    write(pd.concat([day(sales, 0), day(sales, 1)]), root / 'deltas' / 'sales' / 'mixed.parquet')
+    with caplog.at_level(logging.WARNING):
+        assert app['ingest_partitions'](source, str(root)) == ['sales']
+    assert len(source.read('sales')) == loaded + len(day(sales, 1))
+    assert any(f"Dropping {len(day(sales, 0))} rows of" in record.message for record in caplog.records)
+
+
+def test_rewritten_partitions_replace_their_rows(app, dataset):
+    source, root, sales = dataset
+    path = root / 'deltas' / 'sales' / 'day1.parquet'
+    write(day(sales, 1), path)
+    write(day(sales, 2), root / 'deltas' / 'sales' / 'day2.parquet')
+    app['ingest_partitions'](source, str(root))
+
+    corrected = day(sales, 1).assign(airtime_sales=lambda frame: frame['airtime_sales'] * 2)
+    write(corrected, path, bump=5)
+    assert app['ingest_partitions'](source, str(root)) == ['sales']
+    cube, scan = daily_sales(source, sales['date'].max() + pd.Timedelta(days=1))
+    expected = [corrected['airtime_sales'].sum(), day(sales, 2)['airtime_sales'].sum()]
+    assert np.allclose(cube.to_numpy(), expected, rtol=1e-6)
+    assert np.allclose(scan.to_numpy(), expected, rtol=1e-6)
+
+    # Another file for a day that came from a delta adds to it
+    extra = day(sales, 2).iloc[:3]
+    write(extra, root / 'deltas' / 'sales' / 'day2_late.parquet')
+    app['ingest_partitions'](source, str(root))
+    cube, _ = daily_sales(source, sales['date'].max() + pd.Timedelta(days=2))
+    assert cube.iloc[0] == pytest.approx(expected[1] + extra['airtime_sales'].sum(), rel=1e-6)
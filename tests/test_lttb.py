@@ -0,0 +1,38 @@
+"""
+MTN Benin - Sales & Distribution Dashboard
+Downsampling tests: LTTB keeps the endpoints, the point budget and the peaks
+Run: python -m pytest tests
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+
+@pytest.mark.parametrize('n, threshold', [(1000, 100), (1001, 3), (5000, 600), (601, 600)])
+def test_keeps_endpoints_and_point_count(app, n, threshold):
+    rng = np.random.default_rng(n)
+    x, y = np.arange(n), rng.normal(size=n).cumsum()
+    keep = app['lttb_indices'](x, y, threshold)
+    assert len(keep) == threshold
+    assert keep[0] == 0 and keep[-1] == n - 1
+    assert np.all(np.diff(keep) > 0)
+
+
+def test_short_series_are_left_alone(app):
+    assert app['lttb_indices'](np.arange(50), np.ones(50), 100).tolist() == list(range(50))
+
+
+def test_a_spike_survives(app):
+    y = np.zeros(10_000)
+    y[4321] = 50.0
+    assert 4321 in app['lttb_indices'](np.arange(len(y)), y, 200)
+
+
+def test_dates_downsample_to_the_budget(app):
+    dates = pd.date_range('2020-01-01', periods=2000, freq='D')
+    values = np.sin(np.arange(2000) / 30)
+    x, y = app['downsample_series'](dates, values, 300)
+    assert len(x) == len(y) == 300
+    assert x[0] == dates[0] and x[-1] == dates[-1]
+    assert np.array_equal(y, values[dates.get_indexer(x)])
@@ -0,0 +1,75 @@
+"""
+MTN Benin - Sales & Distribution Dashboard
+Result cache tests: TTL expiry, LRU eviction by size and single-flight computation
+Run: python -m pytest tests
+"""
+
+import threading
+import time
+
+import numpy as np
+import pytest
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Replace time.monotonic with a clock the test moves by hand"""
+    now = [1000.0]
+    monkeypatch.setattr(time, 'monotonic', lambda: now[0])
+    return now
+
+
+def test_entries_expire_after_the_ttl(app, clock):
+    cache = app['ResultCache'](ttl=60, max_bytes=10**6)
+    calls = []
+    compute = lambda: calls.append(1) or len(calls)
+    assert cache.get_or_compute('key', compute) == 1
+    clock[0] += 59
+    assert cache.get_or_compute('key', compute) == 1
+    assert cache.expires_in('key') == pytest.approx(1)
+    clock[0] += 1
+    assert 'key' not in cache
+    assert cache.get_or_compute('key', compute) == 2
+    assert cache.stats()['expirations'] == 1
+
+
+def test_least_recently_used_entries_are_evicted_past_the_size_cap(app, clock):
+    block = np.zeros(100)
+    cache = app['ResultCache'](ttl=60, max_bytes=3 * block.nbytes)
+    for key in 'abc':
+        cache.put(key, block.copy())
+    cache.get_or_compute('a', lambda: pytest.fail("'a' should still be cached"))
+    cache.put('d', block.copy())
+    assert [key in cache for key in 'abcd'] == [True, False, True, True]
+    assert cache.stats()['evictions'] == 1
+    assert cache.stats()['bytes'] == 3 * block.nbytes
+
+
+def test_concurrent_misses_compute_once(app):
+    cache = app['ResultCache'](ttl=60, max_bytes=10**6)
+    started, release, calls = threading.Event(), threading.Event(), []
+
+    def compute():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return 'value'
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get_or_compute('key', compute))) for _ in range(4)]
+    threads[0].start()
+    started.wait(5)
+    for thread in threads[1:]:
+        thread.start()
+    release.set()
+    for thread in threads:
+        thread.join(5)
+    assert calls == [1] and results == ['value'] * 4
+
+
+def test_invalidate_drops_matching_keys_only(app):
+    cache = app['ResultCache'](ttl=60, max_bytes=10**6)
+    cache.put(('sales', 1), 1)
+    cache.put(('float', 1), 2)
+    cache.invalidate(lambda key: key[0] == 'sales')
+    assert ('sales', 1) not in cache and ('float', 1) in cache
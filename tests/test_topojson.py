@@ -0,0 +1,67 @@
+"""
+MTN Benin - Sales & Distribution Dashboard
+TopoJSON decoder tests: a hand-built quantized topology of two squares sharing an edge
+Run: python -m pytest tests
+"""
+
+import numpy as np
+import pytest
+
+# Quantized arcs as deltas; the transform maps x to longitude 2..4 and y to latitude 6..6.5
+#   arc 0: the shared edge (2,0) -> (2,2)
+#   arc 1: west square's other sides (2,2) -> (0,2) -> (0,0) -> (2,0)
+#   arc 2: east square's other sides (2,0) -> (4,0) -> (4,2) -> (2,2)
+TOPOLOGY = {
+    'type': 'Topology',
+    'transform': {'scale': [0.5, 0.25], 'translate': [2.0, 6.0]},
+    'arcs': [
+        [[2, 0], [0, 2]],
+        [[2, 2], [-2, 0], [0, -2], [2, 0]],
+        [[2, 0], [2, 0], [0, 2], [-2, 0]]
+    ],
+    'objects': {
+        'areas': {
+            'type': 'GeometryCollection',
+            'geometries': [
+                {'type': 'Polygon', 'arcs': [[0, 1]], 'properties': {'name': 'West', 'group': 'Both'}},
+                {'type': 'Polygon', 'arcs': [[2, ~0]], 'properties': {'name': 'East', 'group': 'Both'}}
+            ]
+        }
+    }
+}
+
+
+def signed_area(ring):
+    ring = np.asarray(ring)
+    return 0.5 * np.sum(ring[:-1, 0] * ring[1:, 1] - ring[1:, 0] * ring[:-1, 1])
+
+
+def test_arcs_decode_to_absolute_positions(app):
+    coords, keys, offsets = app['decode_topojson_arcs'](TOPOLOGY)
+    assert offsets.tolist() == [0, 2, 6, 10]
+    assert coords[offsets[1]:offsets[2]].tolist() == [[3.0, 6.5], [2.0, 6.5], [2.0, 6.0], [3.0, 6.0]]
+    assert keys[offsets[2]:offsets[3]].tolist() == [[2, 0], [4, 0], [4, 2], [2, 2]]
+
+
+def test_polygon_matches_the_known_square(app):
+    geojson = app['topojson_to_geojson'](TOPOLOGY, id_property='name')
+    features = {feature['id']: feature['geometry'] for feature in geojson['features']}
+    assert features['West'] == {
+        'type': 'Polygon',
+        'coordinates': [[[3.0, 6.0], [2.0, 6.0], [2.0, 6.5], [3.0, 6.5], [3.0, 6.0]]]
+    }
+    # Walked through the shared arc backwards, then wound clockwise like every exterior
+    east = features['East']['coordinates'][0]
+    assert east[0] == east[-1]
+    assert signed_area(east) == pytest.approx(-0.5)
+    assert {tuple(point) for point in east} == {(3.0, 6.0), (4.0, 6.0), (4.0, 6.5), (3.0, 6.5)}
+
+
+def test_dissolving_drops_the_shared_edge(app):
+    geojson = app['topojson_to_geojson'](TOPOLOGY, group_by=lambda properties: properties['group'], id_property='group')
+    assert [feature['id'] for feature in geojson['features']] == ['Both']
+    geometry = geojson['features'][0]['geometry']
+    assert geometry['type'] == 'Polygon' and len(geometry['coordinates']) == 1
+    ring = geometry['coordinates'][0]
+    assert signed_area(ring) == pytest.approx(-1.0)
+    assert {tuple(point) for point in ring} == {(2.0, 6.0), (3.0, 6.0), (4.0, 6.0), (4.0, 6.5), (3.0, 6.5), (2.0, 6.5)}